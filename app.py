@@ -1,147 +1,462 @@
-from flask import Flask, request, jsonify, send_file, Response
+from flask import Flask, Request, request, jsonify, Response, g
 from flask_cors import CORS
-import speech_recognition as sr
-from gtts import gTTS
 import io
 import os
-import uuid
 import json
+import time
+import itertools
 import logging
-from pydub import AudioSegment
+import threading
 
 # Imports based on project structure
-from model import GeminiAPI
+from model import GeminiAPI, GeminiStreamError
 from utils.session_manager import SessionManager
-from deep_translator import GoogleTranslator
-
-import joblib
-
-from helpers import extract_features
-
-import numpy as np
+from utils.session_store import make_session_store
+from utils.prompt_builder import PromptBuilder
+from utils.model_registry import ModelRegistry
+from utils.link_cascade import LinkCascade
+from utils.ttl_cache import TTLCache
+from utils.tts_pipeline import iter_sentences, run_ahead, pipelined_tts
+from utils.audio_cache import AudioCache
+from utils.audio_ingest import decode_to_pcm, AudioTooLargeError, PCM_BYTES_PER_SECOND
+from utils.translation import TranslationService
+from utils.metrics import REGISTRY
+from utils.governor import Governor, Overloaded
 
 from dotenv import load_dotenv
-from elevenlabs.client import ElevenLabs
 
+# Heavy dependencies (elevenlabs, speech_recognition, numpy, scikit-learn/joblib, deep_translator)
+# and the upstream clients are loaded on first use by the routes that need them; see warm_up().
 load_dotenv()
 tts_api_key = os.getenv("ELEVENLABS_API_KEY2")
-client = ElevenLabs(api_key=tts_api_key)
 
 
+class InMemoryRequest(Request):
+    """Keeps multipart file uploads in memory instead of spooling large ones to temp files."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return io.BytesIO()
+
+
+STT_MAX_UPLOAD_BYTES = int(os.getenv("STT_MAX_UPLOAD_BYTES", 25 * 1024 * 1024))
+STT_MAX_SECONDS = int(os.getenv("STT_MAX_SECONDS", 600))
+STT_DECODE_TIMEOUT_SECONDS = float(os.getenv("STT_DECODE_TIMEOUT_SECONDS", 120))
+
 app = Flask(__name__)
+app.request_class = InMemoryRequest
+# Bounds the memory an in-memory upload can take (Flask answers 413 above this).
+app.config['MAX_CONTENT_LENGTH'] = int(os.getenv("MAX_CONTENT_LENGTH", 32 * 1024 * 1024))
 CORS(app)
 
+# --- Metrics ---
+STAGE_SECONDS = REGISTRY.histogram(
+    "pipeline_stage_seconds", "Time spent in each request pipeline stage (stt_decode, stt_recognize, prompt_build, "
+    "llm, llm_first_token, history_update, tts_first_byte, translate, link_classify).", ["stage"],
+)
+HTTP_REQUESTS = REGISTRY.counter("http_requests_total", "HTTP requests by route, method and status.", ["route", "method", "status"])
+HTTP_SECONDS = REGISTRY.histogram("http_request_seconds", "Time until the response headers are sent, by route.", ["route"])
+
+
+@app.before_request
+def _start_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def _record_request(response):
+    start = g.pop("request_start", None)
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule else "unmatched"  # the rule, not the path, keeps session ids out
+        HTTP_SECONDS.observe(time.perf_counter() - start, route=route)
+        HTTP_REQUESTS.inc(route=route, method=request.method, status=response.status_code)
+    return response
+
+@app.errorhandler(Overloaded)
+def _shed_request(e):
+    logging.warning(f"Shedding {request.method} {request.path}: {e}")
+    return jsonify({
+        "error": f"The {e.upstream} service is busy, please retry later.",
+        "retry_after": e.retry_after
+    }), 503, {"Retry-After": str(e.retry_after)}
+
 # --- Global Objects ---
-try:
-    gemini = GeminiAPI()
-except EnvironmentError as e:
-    logging.critical(f"Failed to initialize GeminiAPI: {e}")
-    gemini = None
-except Exception as e:
-    logging.critical(f"An unexpected error occurred initializing GeminiAPI: {e}", exc_info=True)
-    gemini = None
-
-session_manager = SessionManager()
-recognizer = sr.Recognizer()
+# Per-upstream concurrency limits; requests beyond the limit wait in a bounded queue for at most the
+# queue timeout and are then shed with 503 + Retry-After. Override with e.g. LLM_MAX_INFLIGHT=64.
+UPSTREAM_LIMIT_DEFAULTS = {
+    "llm": (32, 64, 5.0),
+    "tts": (16, 32, 5.0),
+    "stt": (8, 16, 5.0),
+    "translate": (16, 64, 3.0),
+}
+upstream_governor = Governor({
+    name: {
+        "max_inflight": int(os.getenv(f"{name.upper()}_MAX_INFLIGHT", max_inflight)),
+        "max_queue": int(os.getenv(f"{name.upper()}_MAX_QUEUE", max_queue)),
+        "queue_timeout": float(os.getenv(f"{name.upper()}_QUEUE_TIMEOUT_SECONDS", queue_timeout)),
+    }
+    for name, (max_inflight, max_queue, queue_timeout) in UPSTREAM_LIMIT_DEFAULTS.items()
+})
+
+# 'memory' keeps sessions in this process; 'sqlite' shares them between workers and restarts.
+session_manager = SessionManager(make_session_store(
+    os.getenv("SESSION_STORE", "memory").lower(),
+    path=os.getenv("SESSION_DB_PATH", "./data/sessions.db"),
+    ttl_seconds=float(os.getenv("SESSION_TTL_SECONDS", 6 * 3600)),
+    max_sessions=int(os.getenv("SESSION_MAX_SESSIONS", 10000)),
+    max_history=int(os.getenv("SESSION_HISTORY_TURNS", 10)),
+), summary_max_chars=int(os.getenv("PROMPT_SUMMARY_MAX_CHARS", 1500)))
+# Keeps prompts within a character budget; turns that no longer fit are carried by a rolling summary.
+prompt_builder = PromptBuilder(
+    max_chars=int(os.getenv("PROMPT_MAX_CHARS", 6000)),
+    summary_max_chars=int(os.getenv("PROMPT_SUMMARY_MAX_CHARS", 1500)),
+    profile_cache_size=int(os.getenv("SESSION_MAX_SESSIONS", 10000)),
+    profile_cache_ttl=float(os.getenv("SESSION_TTL_SECONDS", 6 * 3600)),
+)
+# Translators are reused per language pair and translations cached by (source, target, text).
+translation_service = TranslationService(
+    cache_size=int(os.getenv("TRANSLATE_CACHE_MAX_ENTRIES", 20000)),
+    cache_ttl=float(os.getenv("TRANSLATE_CACHE_TTL_SECONDS", 24 * 3600)),
+    max_workers=int(os.getenv("TRANSLATE_WORKERS", 8)),
+    limiter=upstream_governor["translate"],
+)
+TRANSLATE_BATCH_MAX_TEXTS = int(os.getenv("TRANSLATE_BATCH_MAX_TEXTS", 100))
+# Synthesized sentences are cached by hash(text, voice, model, format) in memory and on disk.
+tts_audio_cache = AudioCache(
+    os.getenv("TTS_CACHE_DIR", "./data/tts_cache"),
+    memory_max_bytes=int(float(os.getenv("TTS_CACHE_MEMORY_MB", 32)) * 2**20),
+    disk_max_bytes=int(float(os.getenv("TTS_CACHE_DISK_MB", 512)) * 2**20),
+)
+
+# The URL classifier is unpickled once and shared by all request threads.
+LINK_MODEL_PATH = os.getenv("LINK_MODEL_PATH", "./weights/rf_model.pkl")
+
+
+def _feature_schema_version():
+    from helpers import FEATURE_SCHEMA_VERSION  # helpers pulls in numpy, so only when the model loads
+    return FEATURE_SCHEMA_VERSION
+
+
+link_model_registry = ModelRegistry(LINK_MODEL_PATH, schema_version=_feature_schema_version)
+LINK_BATCH_MAX_URLS = int(os.getenv("LINK_BATCH_MAX_URLS", 100000))
+# 'cascade' only asks Gemini when the RF model is unsure, 'full' always asks it.
+LINK_CLASSIFIER_MODE = os.getenv("LINK_CLASSIFIER_MODE", "full").lower()
+link_cascade = LinkCascade(
+    link_model_registry,
+    get_llm=lambda: get_gemini(),
+    low=float(os.getenv("LINK_CASCADE_BAND_LOW", 0.35)),
+    high=float(os.getenv("LINK_CASCADE_BAND_HIGH", 0.65)),
+)
+# Verdicts keyed by (mode, model version, normalized URL); concurrent misses share one upstream call.
+link_verdict_cache = TTLCache(
+    maxsize=int(os.getenv("LINK_CACHE_MAX_ENTRIES", 50000)),
+    ttl=float(os.getenv("LINK_CACHE_TTL_SECONDS", 3600)),
+)
+
+# Upstream clients, created by the get_* functions below on first use (tests and benchmarks may
+# assign fakes directly).
+gemini = None
+client = None  # ElevenLabs
+transcriber = None
+_gemini_error = None
+_lazy_lock = threading.Lock()
+
+
+def get_gemini():
+    """Returns the shared GeminiAPI client, creating it on first use; None if it cannot be configured."""
+    global gemini, _gemini_error
+    if gemini is None and _gemini_error is None:
+        with _lazy_lock:
+            if gemini is None and _gemini_error is None:
+                try:
+                    gemini = GeminiAPI(limiter=upstream_governor["llm"])
+                except EnvironmentError as e:
+                    logging.critical(f"Failed to initialize GeminiAPI: {e}")
+                    _gemini_error = e
+                except Exception as e:
+                    logging.critical(f"An unexpected error occurred initializing GeminiAPI: {e}", exc_info=True)
+                    _gemini_error = e
+    return gemini
+
+
+def get_tts_client():
+    """Returns the shared ElevenLabs client; the elevenlabs package is imported on first use."""
+    global client
+    if client is None:
+        with _lazy_lock:
+            if client is None:
+                from elevenlabs.client import ElevenLabs
+                client = ElevenLabs(api_key=tts_api_key)
+    return client
+
+
+def get_transcriber():
+    """Returns the shared SpeechTranscriber; speech_recognition is imported on first use."""
+    global transcriber
+    if transcriber is None:
+        with _lazy_lock:
+            if transcriber is None:
+                from utils.stt_pipeline import SpeechTranscriber, GoogleRecognizerBackend
+                # Long voice notes are silence-trimmed, split at pauses and recognized chunk by chunk in parallel.
+                transcriber = SpeechTranscriber(
+                    GoogleRecognizerBackend(),
+                    max_workers=int(os.getenv("STT_WORKERS", 4)),
+                    max_chunk_seconds=float(os.getenv("STT_MAX_CHUNK_SECONDS", 15)),
+                )
+    return transcriber
+
+
+WARMUP_STEPS = {
+    "gemini": get_gemini,
+    "tts": get_tts_client,
+    "stt": get_transcriber,
+    "translate": lambda: translation_service.warm_up(),
+    "link_model": lambda: link_model_registry.load(),
+}
+
+
+def warm_up(steps):
+    """Loads the given dependencies and clients now instead of on the first request that needs them.
+
+    ``steps`` is a list of names from WARMUP_STEPS, or ["all"]. Failures are logged, not raised.
+    """
+    if "all" in steps:
+        steps = list(WARMUP_STEPS)
+    for step in steps:
+        start = time.perf_counter()
+        try:
+            WARMUP_STEPS[step]()
+        except KeyError:
+            logging.warning(f"Unknown warm-up step '{step}' (expected one of {', '.join(WARMUP_STEPS)} or all)")
+            continue
+        except Exception as e:
+            logging.warning(f"Warm-up step '{step}' failed, will load on first use: {e}")
+            continue
+        logging.info(f"Warm-up | {step} ready in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+
+# APP_WARMUP=all (or e.g. "gemini,link_model") preloads before serving; by default nothing is.
+_warmup_steps = [s.strip() for s in os.getenv("APP_WARMUP", "").lower().split(",") if s.strip()]
+if os.getenv("PRELOAD_LINK_MODEL", "false").lower() in ['true', '1', 't'] and "link_model" not in _warmup_steps:
+    _warmup_steps.append("link_model")
+if _warmup_steps:
+    warm_up(_warmup_steps)
 
 # --- Helper Functions ---
 
 def speech_to_text(audio_file, language="en-US"):
-    """Converts audio file to text using SpeechRecognition."""
+    """Converts an uploaded audio file to text using SpeechRecognition, entirely in memory."""
     if not audio_file or not audio_file.filename:
         return None, "No audio file provided or filename missing."
 
     filename = audio_file.filename
     _, ext = os.path.splitext(filename)
     ext = ext.lower()
-    temp_wav_path = f"temp_{uuid.uuid4()}.wav"
-    temp_orig_path = temp_wav_path.replace(".wav", ext)
 
     try:
-        audio_file.save(temp_orig_path)
-        try:
-            audio_segment = AudioSegment.from_file(temp_orig_path)
-            audio_segment = audio_segment.set_channels(1).set_frame_rate(16000)
-            audio_segment.export(temp_wav_path, format="wav")
-            logging.info(f"Successfully converted {temp_orig_path} to {temp_wav_path}")
-        except Exception as e:
-            logging.error(f"Error converting audio format {ext} using pydub: {e}", exc_info=True)
-            if ext == ".wav":
-                 logging.warning("Conversion failed, trying original WAV file.")
-                 temp_wav_path = temp_orig_path
-            else:
-                 raise Exception(f"Audio conversion failed: {e}")
-
-        with sr.AudioFile(temp_wav_path) as source:
-            logging.info(f"Recording audio from {temp_wav_path}")
-            audio_data = recognizer.record(source)
-            logging.info("Audio recorded, attempting recognition...")
-            try:
-                text = recognizer.recognize_google(audio_data, language=language)
-                logging.info(f"Speech recognized (lang: {language}): {text}")
-                return text, None
-            except sr.UnknownValueError:
-                logging.warning(f"Speech Recognition could not understand audio (lang: {language})")
-                return None, "Speech Recognition could not understand audio"
-            except sr.RequestError as e:
-                logging.error(f"Could not request results from Google Speech Recognition service (lang: {language}); {e}")
-                return None, f"Could not request results from Google Speech Recognition service; {e}"
+        with STAGE_SECONDS.time(stage="stt_decode"):
+            pcm = decode_to_pcm(audio_file.stream, ext, max_bytes=STT_MAX_UPLOAD_BYTES,
+                                max_seconds=STT_MAX_SECONDS, timeout=STT_DECODE_TIMEOUT_SECONDS)
+        logging.info(f"Decoded {filename} to {len(pcm) / PCM_BYTES_PER_SECOND:.1f}s of 16 kHz mono PCM")
+    except AudioTooLargeError as e:
+        logging.warning(f"Rejected audio file {filename}: {e}")
+        return None, str(e)
+    except Exception as e:
+        logging.error(f"Error processing audio file {filename}: {e}", exc_info=True)
+        return None, f"Error processing audio file: {e}"
 
+    logging.info("Audio decoded, attempting recognition...")
+    stt = get_transcriber()
+    import speech_recognition as sr  # already loaded by get_transcriber()
+    try:
+        with STAGE_SECONDS.time(stage="stt_recognize"), upstream_governor["stt"].slot():
+            text = stt.transcribe(pcm, language)
+        logging.info(f"Speech recognized (lang: {language}): {text}")
+        return text, None
+    except sr.UnknownValueError:
+        logging.warning(f"Speech Recognition could not understand audio (lang: {language})")
+        return None, "Speech Recognition could not understand audio"
+    except sr.RequestError as e:
+        logging.error(f"Could not request results from Google Speech Recognition service (lang: {language}); {e}")
+        return None, f"Could not request results from Google Speech Recognition service; {e}"
+    except Overloaded:
+        raise
     except Exception as e:
         logging.error(f"Error processing audio file {filename}: {e}", exc_info=True)
         return None, f"Error processing audio file: {e}"
-    finally:
-        # Cleanup temporary files
-        if os.path.exists(temp_wav_path):
-            try: os.remove(temp_wav_path)
-            except OSError as e: logging.error(f"Error removing temp file {temp_wav_path}: {e}")
-        if temp_orig_path != temp_wav_path and os.path.exists(temp_orig_path):
-             try: os.remove(temp_orig_path)
-             except OSError as e: logging.error(f"Error removing temp file {temp_orig_path}: {e}")
-
-
-def text_to_speech(text, lang="ar"): # Removed output_file parameter
-    """Converts text to speech using ElevenLabs and returns an in-memory audio file object."""
-    voice_settings = {
-        "ar": "a1KZUXKFVFDOb33I1uqr", # Replace with your actual Arabic voice ID
-        "en": "tQ4MEZFJOzsahSEEZtHK"  # Replace with your actual English voice ID
-        # Add other languages/voices as needed
-    }
 
-    voice_id = voice_settings.get(lang)
+
+TTS_VOICES = {
+    "ar": "a1KZUXKFVFDOb33I1uqr", # Replace with your actual Arabic voice ID
+    "en": "tQ4MEZFJOzsahSEEZtHK"  # Replace with your actual English voice ID
+    # Add other languages/voices as needed
+}
+TTS_MODEL_ID = "eleven_multilingual_v2" # Or your preferred model
+TTS_OUTPUT_FORMAT = "mp3_44100_128" # Choose desired format
+
+
+def synthesize_speech(text, voice_id, previous_text=None):
+    """Returns an iterator over the MP3 chunks for one piece of text, from the audio cache or ElevenLabs."""
+    key = AudioCache.key(text, voice_id, TTS_MODEL_ID, TTS_OUTPUT_FORMAT)
+    cached = tts_audio_cache.get(key)
+    if cached is not None:
+        logging.info(f"TTS cache hit for voice '{voice_id}': '{text[:40]}'")
+        return cached
+    extra = {"previous_text": previous_text} if previous_text else {}
+    # Each uncached sentence holds a TTS slot while it streams.
+    return upstream_governor["tts"].stream(tts_audio_cache.tee(key, get_tts_client().text_to_speech.convert_as_stream(
+        voice_id,
+        text=text,
+        model_id=TTS_MODEL_ID,
+        output_format=TTS_OUTPUT_FORMAT,
+        **extra
+    )))
+
+
+def text_to_speech(sentences, lang="ar"):
+    """Streams TTS audio for an iterable of sentences using ElevenLabs.
+
+    Each sentence is synthesized as soon as it is available, so audio can start
+    before the full text exists. Returns (audio chunk iterator, None) once the
+    first chunk has arrived, or (None, error message). Errors raised while
+    producing ``sentences`` (e.g. GeminiStreamError) are not TTS errors and propagate.
+    """
+    voice_id = TTS_VOICES.get(lang)
     if not voice_id:
         error_msg = f"Unsupported language/voice selected for TTS: {lang}"
         logging.error(error_msg)
         return None, error_msg # Return None for audio, error message
 
+    logging.info(f"Requesting streamed TTS from ElevenLabs for lang '{lang}' with voice ID '{voice_id}'")
+    start = time.perf_counter()
+    audio = pipelined_tts(sentences, lambda text, previous: synthesize_speech(text, voice_id, previous))
     try:
-        logging.info(f"Requesting TTS from ElevenLabs for lang '{lang}' with voice ID '{voice_id}'")
-        # The client.text_to_speech.convert returns a generator yielding bytes chunks
-        audio_stream = client.text_to_speech.convert(
-            text=text,
-            voice_id=voice_id,
-            model_id="eleven_multilingual_v2", # Or your preferred model
-            output_format="mp3_44100_128" # Choose desired format
-        )
+        # Pull the first chunk now so a failing TTS call can still fall back to a text reply.
+        first_chunk = next(audio)
+    except StopIteration:
+        logging.error("ElevenLabs returned empty audio stream.")
+        return None, "TTS service returned empty audio."
+    except GeminiStreamError:
+        raise
+    except Overloaded as e:
+        if e.upstream != "tts":  # the LLM producing the sentences was shed
+            raise
+        logging.warning(f"TTS shed for lang '{lang}': {e}")
+        return None, f"TTS service is busy: {e}"
+    except Exception as e:
+        logging.error(f"ElevenLabs TTS API error for lang '{lang}': {e}", exc_info=True)
+        # You might want to check for specific API error types from the elevenlabs library
+        return None, f"TTS API error: {e}" # Return None for audio, error object/message
 
-        # Consume the generator and store bytes in memory
-        audio_bytes = b"".join(audio_stream)
+    elapsed = time.perf_counter() - start
+    STAGE_SECONDS.observe(elapsed, stage="tts_first_byte")
+    logging.info(f"TTS stream started for lang '{lang}', time-to-first-audio-byte: {elapsed * 1000:.0f} ms")
+    return itertools.chain([first_chunk], audio), None
+
+
+def classify_url_batch(model, urls):
+    """Labels a list of URLs with one vectorized feature pass and one model call."""
+    import numpy as np
+    from helpers import extract_features_batch
+    features = extract_features_batch(urls)
+    proba = model.predict_proba(features)
+    best = proba.argmax(axis=1)
+    preds = model.classes_[best]
+    confidences = proba[np.arange(len(urls)), best]
+    return [
+        {'url': url, 'label': 'Safe' if pred == 1 else 'Unsafe', 'confidence': round(float(conf), 4)}
+        for url, pred, conf in zip(urls, preds, confidences)
+    ]
+
+
+def _sse(payload, event=None):
+    """Formats one server-sent event."""
+    data = json.dumps(payload, ensure_ascii=False)
+    return f"event: {event}\ndata: {data}\n\n" if event else f"data: {data}\n\n"
+
+
+def stream_chat_response(session_id, prompt, user_input_text):
+    """Forwards Gemini's reply as server-sent events and saves the full text to history at the end."""
+    start = time.perf_counter()
+    chunks = get_gemini().stream_report(prompt)
+    try:
+        # Wait for the first token before committing to a 200 so startup failures still get a JSON error.
+        first = next(chunks)
+    except (GeminiStreamError, StopIteration) as e:
+        logging.error(f"Gemini stream error for session {session_id}: {e}")
+        return jsonify({"error": "Failed to get response from language model."}), 500
+    ttft = time.perf_counter() - start
+    STAGE_SECONDS.observe(ttft, stage="llm_first_token")
+    logging.info(f"Gemini stream started for session {session_id}, time-to-first-token: {ttft * 1000:.0f} ms")
+
+    def generate():
+        parts = [first]
+        yield _sse({"delta": first})
+        try:
+            for chunk in chunks:
+                parts.append(chunk)
+                yield _sse({"delta": chunk})
+        except GeminiStreamError as e:
+            logging.error(f"Gemini stream interrupted for session {session_id}: {e}")
+            yield _sse({"error": "Response from language model was interrupted."}, event="error")
+            return
+
+        response_text = "".join(parts)
+        with STAGE_SECONDS.time(stage="history_update"):
+            session_manager.update_session_chat_history(session_id, user_input_text, response_text)
+        total = time.perf_counter() - start
+        logging.info(f"Gemini stream finished for session {session_id}, total: {total * 1000:.0f} ms")
+        yield _sse({"response": response_text, "ttft_ms": round(ttft * 1000, 1), "total_ms": round(total * 1000, 1)}, event="done")
+
+    return Response(generate(), mimetype='text/event-stream', headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+def stream_chat_audio_response(session_id, prompt, user_input_text, lang):
+    """Pipelines Gemini's streamed reply into sentence-by-sentence TTS and streams the MP3 to the client."""
+    start = time.perf_counter()
+    parts = []
+
+    def recorded_reply():
+        for chunk in get_gemini().stream_report(prompt):
+            parts.append(chunk)
+            yield chunk
+
+    # The LLM keeps generating in the background while earlier sentences are synthesized.
+    sentences = run_ahead(iter_sentences(recorded_reply()))
+    try:
+        audio, tts_error = text_to_speech(sentences, lang=lang)
+        if tts_error:
+            for _ in sentences:  # let the LLM finish so the text fallback is complete
+                pass
+    except GeminiStreamError as e:
+        logging.error(f"Gemini stream error for session {session_id}: {e}")
+        return jsonify({"error": "Failed to get response from language model."}), 500
+
+    if tts_error:
+        response_text = "".join(parts)
+        if not response_text:
+            logging.error(f"Gemini returned an empty reply for session {session_id}")
+            return jsonify({"error": "Failed to get response from language model."}), 500
+        with STAGE_SECONDS.time(stage="history_update"):
+            session_manager.update_session_chat_history(session_id, user_input_text, response_text)
+        logging.error(f"TTS Error for session {session_id} (lang: {lang}): {tts_error}")
+        return jsonify({
+            "warning": f"Could not generate audio response: {tts_error}. Returning text instead.",
+            "response": response_text
+            }), 200
 
-        if not audio_bytes:
-             logging.error("ElevenLabs returned empty audio stream.")
-             return None, "TTS service returned empty audio."
+    logging.info(f"Streaming audio response for session {session_id}, time-to-first-audio-byte: {(time.perf_counter() - start) * 1000:.0f} ms")
 
-        # Wrap the bytes in a BytesIO object to make it file-like for send_file
-        audio_fp = io.BytesIO(audio_bytes)
-        audio_fp.seek(0) # Reset stream position to the beginning
+    def generate():
+        try:
+            yield from audio
+        except Exception as e:
+            logging.error(f"Audio stream interrupted for session {session_id}: {e}", exc_info=True)
+            return
+        with STAGE_SECONDS.time(stage="history_update"):
+            session_manager.update_session_chat_history(session_id, user_input_text, "".join(parts))
+        logging.info(f"Audio stream finished for session {session_id}, total: {(time.perf_counter() - start) * 1000:.0f} ms")
 
-        logging.info(f"TTS generation successful for lang '{lang}'. Size: {len(audio_bytes)} bytes.")
-        return audio_fp, None # Return file-like object and None for error
+    return Response(generate(), mimetype='audio/mpeg')
 
-    except Exception as e:
-        logging.error(f"ElevenLabs TTS API error for lang '{lang}': {e}", exc_info=True)
-        # You might want to check for specific API error types from the elevenlabs library
-        return None, f"TTS API error: {e}" # Return None for audio, error object/message
 # --- API Routes ---
 
 @app.route('/api/start_chat', methods=['POST'])
@@ -168,6 +483,7 @@ def start_chat():
 @app.route('/api/chat/<session_id>', methods=['POST'])
 def chat(session_id):
     """Handles chat interaction (text/audio in, text/audio out)."""
+    gemini = get_gemini()
     if not gemini:
          logging.error(f"Gemini API not initialized. Cannot process chat for session {session_id}.")
          return jsonify({"error": "Chat service is unavailable due to configuration error."}), 503
@@ -178,7 +494,7 @@ def chat(session_id):
             logging.warning(f"Invalid session ID requested: {session_id}")
             return jsonify({"error": "Invalid session ID"}), 404
 
-        user_data = session.get("user_data", {})
+        user_data = session.user_data or {}
         user_language = user_data.get('language', 'en-US')
         base_user_language = user_language.split('-')[0]
         logging.info(f"Chat request for session {session_id}, lang: {user_language}")
@@ -228,67 +544,50 @@ def chat(session_id):
              logging.warning(f"Proceeding for session {session_id} despite STT error: {input_error}")
 
         # --- Process with Gemini ---
-        chat_history = session.get("chat_history", [])
+        chat_history = session_manager.get_chat_history(session_id)
 
-        prompt = f"""
-        **Instructions for the Language Model:**
-        You are a real human friend to {user_data.get("name", "the user")}. Your goal is to provide natural, enjoyable conversations tailored to the user's personality, interests, and communication style. You are the same age as the user ({user_data.get("age_range", "unknown")} years old) and share similar interests. You also speak the same language as the user and use the same accent from their country.
+        with STAGE_SECONDS.time(stage="prompt_build"):
+            prompt = prompt_builder.build(
+                session_id, user_data, chat_history, session.summary, user_input_text, input_type, user_language
+            )
 
-        * **Speak ONLY in the user's specific language ({user_language}). Use phrasing and tone appropriate for that language and region.**
-        * **Keep your responses casual, friendly, and natural—just like a real person talking.**
-        * **Incorporate the user's interests smoothly into conversations.**
-        * **Acknowledge their goals and support them in a realistic way.**
-        * **Adapt to their personality, humor, and way of speaking.**
-        * **Avoid sensitive or unethical topics.**
-        * **Remember you are a true human.**
-
-        **Important:** Ensure your speech feels natural and authentic, matching the user's cultural and linguistic background ({user_language}). Use chat history to maintain consistency. Avoid mentioning you are an AI or language model.
-
-        **User Profile:**
-        {json.dumps(user_data, indent=2)}
-
-        **Chat History (Last ~10 exchanges):**
-        {json.dumps(chat_history[-10:], indent=2)}
+        # --- Determine Response Format ---
+        response_format = request.args.get('format', 'text').lower()
 
-        **User Input (Type: {input_type}, Language: {user_language}):**
-        {user_input_text}
+        if response_format == 'audio':
+            logging.info(f"Generating streamed audio response (TTS) for session {session_id}, lang: {base_user_language}")
+            return stream_chat_audio_response(session_id, prompt, user_input_text, base_user_language)
 
-        **Your Response (in {user_language}):**
-        """
+        if request.args.get('stream', 'false').lower() in ['true', '1', 't']:
+            logging.info(f"Streaming Gemini response for session {session_id}")
+            return stream_chat_response(session_id, prompt, user_input_text)
 
         logging.info(f"Generating Gemini report for session {session_id}")
-        response_text = gemini.get_report(prompt)
+        with STAGE_SECONDS.time(stage="llm"):
+            response_text = gemini.get_report(prompt)
 
         if not response_text or response_text.startswith("Error:"):
              logging.error(f"Gemini Error for session {session_id}: {response_text}")
              return jsonify({"error": "Failed to get response from language model."}), 500
 
         logging.info(f"Gemini response received for session {session_id}")
-        session_manager.update_session_chat_history(session_id, user_input_text, response_text)
-
-        # --- Determine Response Format ---
-        response_format = request.args.get('format', 'text').lower()
+        with STAGE_SECONDS.time(stage="history_update"):
+            session_manager.update_session_chat_history(session_id, user_input_text, response_text)
 
-        if response_format == 'audio':
-            logging.info(f"Generating audio response (TTS) for session {session_id}, lang: {base_user_language}")
-            audio_fp, tts_error = text_to_speech(response_text, lang=base_user_language)
-            if tts_error:
-                logging.error(f"TTS Error for session {session_id} (lang: {base_user_language}): {tts_error}")
-                return jsonify({
-                    "warning": f"Could not generate audio response: {tts_error}. Returning text instead.",
-                    "response": response_text
-                    }), 200
-            else:
-                logging.info(f"Sending audio response for session {session_id}")
-                return send_file(audio_fp, mimetype='audio/mpeg', as_attachment=False)
-        else:
-            logging.info(f"Sending text response for session {session_id}")
-            return jsonify({"response": response_text}), 200
+        logging.info(f"Sending text response for session {session_id}")
+        return jsonify({"response": response_text}), 200
 
+    except Overloaded:
+        raise
     except Exception as e:
         logging.error(f"Unexpected error in /api/chat/{session_id}: {e}", exc_info=True)
         return jsonify({"error": "An internal server error occurred during chat processing."}), 500
 
+@app.route('/api/sessions/stats', methods=['GET'])
+def session_stats():
+    """Reports live sessions, approximate memory held and evictions."""
+    return jsonify(session_manager.stats()), 200
+
 @app.route('/api/translator/', methods=['POST'])
 def do_translation():
     """Translates text or speech."""
@@ -360,10 +659,12 @@ def do_translation():
         try:
             base_source = source_lang.split('-')[0] if source_lang else None
             app.logger.info(f"Translate | Using source='{base_source}' and target='{target_lang}'")
-            translator = GoogleTranslator(source=source_lang or 'auto', target=target_lang)
-            translated_text = translator.translate(input_text)
+            with STAGE_SECONDS.time(stage="translate"):
+                translated_text, cached = translation_service.translate(input_text, target_lang, source=source_lang)
             actual_src_lang = source_lang or "auto-detect"
-            app.logger.info(f"Translate | Success | Output: '{translated_text[:100]}...'")
+            app.logger.info(f"Translate | Success (cached: {cached}) | Output: '{translated_text[:100]}...'")
+        except Overloaded:
+            raise
         except Exception as e:
             app.logger.error(f"Translate | Error: {e}", exc_info=True)
             return jsonify({"error": f"Translation failed: {e}"}), 500
@@ -382,7 +683,7 @@ def do_translation():
             if translated_text is None:
                 return jsonify({"error": "Internal error: Translation result is missing."}), 500
 
-            audio_fp, tts_error = text_to_speech(translated_text, lang=base_target_lang)
+            audio, tts_error = text_to_speech(iter_sentences([translated_text]), lang=base_target_lang)
             if tts_error:
                 app.logger.warning(f"TTS | Error: {tts_error}")
                 return jsonify({
@@ -391,19 +692,72 @@ def do_translation():
                     "source_language_detected": actual_src_lang
                 }), 200
             else:
-                app.logger.info("TTS | Sending audio file.")
-                return send_file(audio_fp, mimetype='audio/mpeg', as_attachment=False)
+                app.logger.info("TTS | Streaming audio.")
+                return Response(audio, mimetype='audio/mpeg')
 
         # --- Return JSON response ---
         return jsonify({
             "translated_text": translated_text,
-            "source_language_detected": actual_src_lang
+            "source_language_detected": actual_src_lang,
+            "cached": cached
         }), 200
 
+    except Overloaded:
+        raise
     except Exception as e:
         app.logger.error(f"Translator | Unexpected Error: {e}", exc_info=True)
         return jsonify({"error": "Internal server error occurred."}), 500
 
+@app.route('/api/translator/batch', methods=['POST'])
+def do_translation_batch():
+    """Translates a list of texts to one target language, concurrently and through the cache."""
+    data = request.get_json(silent=True) or {}
+    texts = data.get('texts')
+    target_lang = data.get('target_lang')
+    source_lang = data.get('source_lang')
+
+    if not target_lang:
+        return jsonify({"error": "'target_lang' is required."}), 400
+    if not isinstance(texts, list) or not texts:
+        return jsonify({"error": "'texts' must be a non-empty list of strings."}), 400
+    if len(texts) > TRANSLATE_BATCH_MAX_TEXTS:
+        return jsonify({"error": f"Too many texts in one batch (max {TRANSLATE_BATCH_MAX_TEXTS})."}), 413
+    if not all(isinstance(t, str) and t.strip() for t in texts):
+        return jsonify({"error": "Every entry in 'texts' must be a non-empty string."}), 400
+
+    results, elapsed = translation_service.translate_batch(texts, target_lang, source=source_lang)
+    cache_hits = sum(1 for r in results if r.get("cached"))
+    failed = sum(1 for r in results if "error" in r)
+    app.logger.info(f"Translate batch | {len(texts)} texts, {cache_hits} cached, {failed} failed, {elapsed * 1000:.0f} ms")
+    return jsonify({
+        "count": len(results),
+        "results": results,
+        "source_language_detected": source_lang or "auto-detect",
+        "cache_hits": cache_hits,
+        "failed": failed,
+        "elapsed_ms": round(elapsed * 1000, 1)
+    }), 200
+
+@app.route('/api/translator/stats', methods=['GET'])
+def translator_stats():
+    """Reports translation cache hit rate and batch latency."""
+    return jsonify(translation_service.stats()), 200
+
+@app.route('/api/tts/stats', methods=['GET'])
+def tts_stats():
+    """Reports TTS audio cache hit rate and tier sizes."""
+    return jsonify(tts_audio_cache.stats()), 200
+
+@app.route('/api/upstreams/stats', methods=['GET'])
+def upstream_stats():
+    """Reports in-flight calls, queue depth and shed counts per upstream."""
+    return jsonify(upstream_governor.stats()), 200
+
+def _link_model_unavailable(e):
+    """The 503 both link classifier routes send when the model can't be loaded or run (missing, corrupt, wrong schema)."""
+    logging.error(f"Link classifier model unavailable: {e}", exc_info=True)
+    return jsonify({'error': 'Link classifier model is unavailable.'}), 503
+
 @app.route('/api/link_classifier/', methods=['POST'])
 def predict_url_safety():
     data = request.get_json()
@@ -412,19 +766,61 @@ def predict_url_safety():
     if not url:
         return jsonify({'error': 'URL is missing'}), 400
 
-    model = joblib.load('./weights/rf_model.pkl')
-    features = extract_features(url)
-    features = np.array(features).reshape(1, -1)  # ensure it's 2D
-    pred = model.predict(features)[0]  # Make sure this returns a 2D array
-    label = 'Safe' if pred == 1 else 'Unsafe'
+    mode = request.args.get('mode', LINK_CLASSIFIER_MODE).lower()
+    if mode not in ('cascade', 'full'):
+        return jsonify({'error': "'mode' must be 'cascade' or 'full'"}), 400
+
+    try:
+        link_model_registry.get()  # make sure the model version used in the cache key is current
+        cache_key = (mode, link_model_registry.version, url)  # the exact string the features are computed from
+        with STAGE_SECONDS.time(stage="link_classify"):
+            result, cached = link_verdict_cache.get_or_compute(
+                cache_key,
+                lambda: link_cascade.classify(url, mode=mode),
+                cache_if=lambda r: r['stage'] != 'rf_fallback',  # don't pin a degraded verdict
+            )
+    except Exception as e:
+        return _link_model_unavailable(e)
 
-    m2_label = gemini.get_report(f"I will send you a link. Respond with only one word: safe or unsafe. No explanation, no punctuation, no newline—just the word,  link : {url} ")
+    logging.info(f"Link classifier | {url} -> {result['label']} (stage: {result['stage']}, mode: {mode}, cached: {cached})")
+    return jsonify({**result, 'cached': cached})
 
-    if label == m2_label:
-        return jsonify({'label': label})
-    else:
-        return jsonify({'label': m2_label.strip()})
+@app.route('/api/link_classifier/batch', methods=['POST'])
+def predict_url_safety_batch():
+    """Classifies a list of URLs with one vectorized feature pass and one model call."""
+    data = request.get_json(silent=True) or {}
+    urls = data.get('urls')
 
+    if not isinstance(urls, list) or not urls:
+        return jsonify({'error': "'urls' must be a non-empty list of URLs"}), 400
+    if len(urls) > LINK_BATCH_MAX_URLS:
+        return jsonify({'error': f"Too many URLs in one batch (max {LINK_BATCH_MAX_URLS})"}), 413
+    if not all(isinstance(u, str) and u for u in urls):
+        return jsonify({'error': "Every entry in 'urls' must be a non-empty string"}), 400
+
+    try:
+        model = link_model_registry.get()
+    except Exception as e:
+        return _link_model_unavailable(e)
+
+    results = classify_url_batch(model, urls)
+    logging.info(f"Link classifier batch | Classified {len(urls)} URLs")
+    return jsonify({'count': len(results), 'results': results}), 200
+
+@app.route('/api/link_classifier/stats', methods=['GET'])
+def link_classifier_stats():
+    """Reports cascade stage hit counts and verdict cache statistics."""
+    return jsonify({**link_cascade.stats(), "cache": link_verdict_cache.stats()}), 200
+
+@app.route('/api/link_classifier/model', methods=['GET'])
+def link_model_info():
+    """Reports the version and load time of the URL classifier being served."""
+    return jsonify(link_model_registry.info()), 200
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Exposes stage latency histograms and request/upstream counters in Prometheus text format."""
+    return Response(REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
 
 
 if __name__ == '__main__':
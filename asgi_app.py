@@ -0,0 +1,634 @@
+"""Async (ASGI) serving mode for the same API as ``app.py``.
+
+    uvicorn asgi_app:app --host 0.0.0.0 --port 5000 --workers 2
+
+Gemini and ElevenLabs are called through async clients, so a request that is
+waiting on them holds no thread and thousands of conversations can be in
+flight per process. Speech recognition, translation, the URL model and the
+session store have no async clients; they run in a bounded thread pool.
+Sessions, caches, the model registry and metrics are the ones defined in
+``app.py``, so both apps are configured by the same environment variables.
+"""
+import os
+import time
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from quart import Quart, request, jsonify, Response, g
+from quart_cors import cors
+
+import app as sync_app
+from app import STAGE_SECONDS, HTTP_REQUESTS, HTTP_SECONDS, _sse
+from model import AsyncGeminiAPI, GeminiStreamError
+from utils.tts_pipeline import aiter_sentences, arun_ahead, apipelined_tts
+from utils.audio_cache import AudioCache
+from utils.metrics import REGISTRY
+from utils.governor import Overloaded
+
+app = cors(Quart(__name__))
+app.config['MAX_CONTENT_LENGTH'] = sync_app.app.config['MAX_CONTENT_LENGTH']
+# Quart cancels responses that take longer than this; streamed audio replies can be long.
+app.config['RESPONSE_TIMEOUT'] = float(os.getenv("ASGI_RESPONSE_TIMEOUT", 300))
+# Threads for the blocking steps (STT, translation, RF model, session store).
+ASGI_BLOCKING_THREADS = int(os.getenv("ASGI_BLOCKING_THREADS", 64))
+
+# Created by get_gemini() / get_tts_client() on first use, inside the event loop that will use their
+# connection pools (tests and benchmarks may assign fakes directly).
+gemini = None
+tts_client = None
+_tts_http = None  # the httpx pool behind tts_client, closed on shutdown
+_gemini_error = None
+
+
+def get_gemini():
+    """Returns the shared AsyncGeminiAPI client, creating it on first use; None if it cannot be configured."""
+    global gemini, _gemini_error
+    if gemini is None and _gemini_error is None:
+        try:
+            gemini = AsyncGeminiAPI(limiter=sync_app.upstream_governor["llm"])
+        except EnvironmentError as e:
+            logging.critical(f"Failed to initialize AsyncGeminiAPI: {e}")
+            _gemini_error = e
+        except Exception as e:
+            logging.critical(f"An unexpected error occurred initializing AsyncGeminiAPI: {e}", exc_info=True)
+            _gemini_error = e
+    return gemini
+
+
+def get_tts_client():
+    """Returns the shared AsyncElevenLabs client; the elevenlabs package is imported on first use."""
+    global tts_client, _tts_http
+    if tts_client is None:
+        import httpx
+        from elevenlabs.client import AsyncElevenLabs
+        _tts_http = httpx.AsyncClient(timeout=240)  # the SDK's default timeout
+        tts_client = AsyncElevenLabs(api_key=sync_app.tts_api_key, httpx_client=_tts_http)
+    return tts_client
+
+
+@app.before_serving
+async def _start_clients():
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=ASGI_BLOCKING_THREADS, thread_name_prefix="blocking")
+    )
+    # APP_WARMUP is handled by app.py at import; the async clients are created here.
+    steps = sync_app._warmup_steps
+    if "all" in steps or "gemini" in steps:
+        get_gemini()
+    if "all" in steps or "tts" in steps:
+        get_tts_client()
+
+
+@app.after_serving
+async def _close_clients():
+    if isinstance(gemini, AsyncGeminiAPI):
+        await gemini.aclose()
+    if _tts_http is not None:
+        await _tts_http.aclose()
+    sync_app.translation_service.shutdown()
+    if sync_app.transcriber is not None:
+        sync_app.transcriber.shutdown()
+
+
+@app.errorhandler(Overloaded)
+async def _shed_request(e):
+    logging.warning(f"Shedding {request.method} {request.path}: {e}")
+    return jsonify({
+        "error": f"The {e.upstream} service is busy, please retry later.",
+        "retry_after": e.retry_after
+    }), 503, {"Retry-After": str(e.retry_after)}
+
+
+@app.before_request
+async def _start_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+async def _record_request(response):
+    start = g.pop("request_start", None)
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        HTTP_SECONDS.observe(time.perf_counter() - start, route=route)
+        HTTP_REQUESTS.inc(route=route, method=request.method, status=response.status_code)
+    return response
+
+# --- Helper Functions ---
+
+async def _aiter(iterable):
+    for item in iterable:
+        yield item
+
+
+async def _prepend(first, rest):
+    yield first
+    async for item in rest:
+        yield item
+
+
+def synthesize_speech(text, voice_id, previous_text=None):
+    """Returns an async iterator over the MP3 chunks for one piece of text, from the audio cache or ElevenLabs."""
+    key = AudioCache.key(text, voice_id, sync_app.TTS_MODEL_ID, sync_app.TTS_OUTPUT_FORMAT)
+    cached = sync_app.tts_audio_cache.get(key)
+    if cached is not None:
+        logging.info(f"TTS cache hit for voice '{voice_id}': '{text[:40]}'")
+        return _aiter(cached)
+    extra = {"previous_text": previous_text} if previous_text else {}
+    return sync_app.upstream_governor["tts"].astream(sync_app.tts_audio_cache.atee(key, get_tts_client().text_to_speech.convert_as_stream(
+        voice_id,
+        text=text,
+        model_id=sync_app.TTS_MODEL_ID,
+        output_format=sync_app.TTS_OUTPUT_FORMAT,
+        **extra
+    )))
+
+
+async def text_to_speech(sentences, lang="ar"):
+    """Async ``app.text_to_speech``: returns (audio chunk async iterator, None) or (None, error message)."""
+    voice_id = sync_app.TTS_VOICES.get(lang)
+    if not voice_id:
+        error_msg = f"Unsupported language/voice selected for TTS: {lang}"
+        logging.error(error_msg)
+        return None, error_msg
+
+    logging.info(f"Requesting streamed TTS from ElevenLabs for lang '{lang}' with voice ID '{voice_id}'")
+    start = time.perf_counter()
+    audio = apipelined_tts(sentences, lambda text, previous: synthesize_speech(text, voice_id, previous))
+    try:
+        # Pull the first chunk now so a failing TTS call can still fall back to a text reply.
+        first_chunk = await audio.__anext__()
+    except StopAsyncIteration:
+        logging.error("ElevenLabs returned empty audio stream.")
+        return None, "TTS service returned empty audio."
+    except GeminiStreamError:
+        raise
+    except Overloaded as e:
+        if e.upstream != "tts":  # the LLM producing the sentences was shed
+            raise
+        logging.warning(f"TTS shed for lang '{lang}': {e}")
+        return None, f"TTS service is busy: {e}"
+    except Exception as e:
+        logging.error(f"ElevenLabs TTS API error for lang '{lang}': {e}", exc_info=True)
+        return None, f"TTS API error: {e}"
+
+    elapsed = time.perf_counter() - start
+    STAGE_SECONDS.observe(elapsed, stage="tts_first_byte")
+    logging.info(f"TTS stream started for lang '{lang}', time-to-first-audio-byte: {elapsed * 1000:.0f} ms")
+    return _prepend(first_chunk, audio), None
+
+
+async def update_history(session_id, user_input_text, response_text):
+    with STAGE_SECONDS.time(stage="history_update"):
+        await asyncio.to_thread(sync_app.session_manager.update_session_chat_history, session_id, user_input_text, response_text)
+
+
+async def stream_chat_response(session_id, prompt, user_input_text):
+    """Forwards Gemini's reply as server-sent events and saves the full text to history at the end."""
+    start = time.perf_counter()
+    chunks = get_gemini().stream_report(prompt)
+    try:
+        # Wait for the first token before committing to a 200 so startup failures still get a JSON error.
+        first = await chunks.__anext__()
+    except (GeminiStreamError, StopAsyncIteration) as e:
+        logging.error(f"Gemini stream error for session {session_id}: {e}")
+        return jsonify({"error": "Failed to get response from language model."}), 500
+    ttft = time.perf_counter() - start
+    STAGE_SECONDS.observe(ttft, stage="llm_first_token")
+    logging.info(f"Gemini stream started for session {session_id}, time-to-first-token: {ttft * 1000:.0f} ms")
+
+    async def generate():
+        parts = [first]
+        yield _sse({"delta": first})
+        try:
+            async for chunk in chunks:
+                parts.append(chunk)
+                yield _sse({"delta": chunk})
+        except GeminiStreamError as e:
+            logging.error(f"Gemini stream interrupted for session {session_id}: {e}")
+            yield _sse({"error": "Response from language model was interrupted."}, event="error")
+            return
+
+        response_text = "".join(parts)
+        await update_history(session_id, user_input_text, response_text)
+        total = time.perf_counter() - start
+        logging.info(f"Gemini stream finished for session {session_id}, total: {total * 1000:.0f} ms")
+        yield _sse({"response": response_text, "ttft_ms": round(ttft * 1000, 1), "total_ms": round(total * 1000, 1)}, event="done")
+
+    return Response(generate(), mimetype='text/event-stream', headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+async def stream_chat_audio_response(session_id, prompt, user_input_text, lang):
+    """Pipelines Gemini's streamed reply into sentence-by-sentence TTS and streams the MP3 to the client."""
+    start = time.perf_counter()
+    parts = []
+
+    async def recorded_reply():
+        async for chunk in get_gemini().stream_report(prompt):
+            parts.append(chunk)
+            yield chunk
+
+    # The LLM keeps generating in a background task while earlier sentences are synthesized.
+    sentences = arun_ahead(aiter_sentences(recorded_reply()))
+    try:
+        audio, tts_error = await text_to_speech(sentences, lang=lang)
+        if tts_error:
+            async for _ in sentences:  # let the LLM finish so the text fallback is complete
+                pass
+    except GeminiStreamError as e:
+        logging.error(f"Gemini stream error for session {session_id}: {e}")
+        return jsonify({"error": "Failed to get response from language model."}), 500
+
+    if tts_error:
+        response_text = "".join(parts)
+        if not response_text:
+            logging.error(f"Gemini returned an empty reply for session {session_id}")
+            return jsonify({"error": "Failed to get response from language model."}), 500
+        await update_history(session_id, user_input_text, response_text)
+        logging.error(f"TTS Error for session {session_id} (lang: {lang}): {tts_error}")
+        return jsonify({
+            "warning": f"Could not generate audio response: {tts_error}. Returning text instead.",
+            "response": response_text
+            }), 200
+
+    logging.info(f"Streaming audio response for session {session_id}, time-to-first-audio-byte: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    async def generate():
+        try:
+            async for chunk in audio:
+                yield chunk
+        except Exception as e:
+            logging.error(f"Audio stream interrupted for session {session_id}: {e}", exc_info=True)
+            return
+        await update_history(session_id, user_input_text, "".join(parts))
+        logging.info(f"Audio stream finished for session {session_id}, total: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    return Response(generate(), mimetype='audio/mpeg')
+
+# --- API Routes ---
+
+@app.route('/api/start_chat', methods=['POST'])
+async def start_chat():
+    """Starts a new chat session."""
+    try:
+        user_data = await request.get_json()
+        if not user_data:
+            return jsonify({"error": "Request body must be JSON."}), 400
+        if not user_data.get('language'):
+            return jsonify({"error": "User data must include 'language' (e.g., 'en-US', 'ar-SA')."}), 400
+
+        logging.info(f"Starting new chat session for language: {user_data.get('language')}")
+        session_id = await asyncio.to_thread(sync_app.session_manager.create_session, user_data)
+        return jsonify({
+            "session_id": session_id,
+            "message": "Chat session started."
+        }), 201
+    except Exception as e:
+        logging.error(f"Error in /api/start_chat: {e}", exc_info=True)
+        return jsonify({"error": "An internal server error occurred initiating chat."}), 500
+
+
+@app.route('/api/chat/<session_id>', methods=['POST'])
+async def chat(session_id):
+    """Handles chat interaction (text/audio in, text/audio out)."""
+    gemini = get_gemini()
+    if not gemini:
+        logging.error(f"Gemini API not initialized. Cannot process chat for session {session_id}.")
+        return jsonify({"error": "Chat service is unavailable due to configuration error."}), 503
+
+    try:
+        session = await asyncio.to_thread(sync_app.session_manager.get_session, session_id)
+        if not session:
+            logging.warning(f"Invalid session ID requested: {session_id}")
+            return jsonify({"error": "Invalid session ID"}), 404
+
+        user_data = session.user_data or {}
+        user_language = user_data.get('language', 'en-US')
+        base_user_language = user_language.split('-')[0]
+        logging.info(f"Chat request for session {session_id}, lang: {user_language}")
+
+        user_input_text = None
+        input_error = None
+        input_type = "unknown"
+        files = await request.files
+        form = await request.form
+
+        if 'audio' in files:
+            audio_file = files['audio']
+            if audio_file and audio_file.filename:
+                input_type = "audio"
+                logging.info(f"Processing audio input for session {session_id}")
+                user_input_text, input_error = await asyncio.to_thread(sync_app.speech_to_text, audio_file, user_language)
+                if input_error:
+                    logging.warning(f"STT Error for session {session_id} (lang: {user_language}): {input_error}")
+            else:
+                if not request.is_json and not form.get('message'):
+                    input_error = "Audio file part found but no file uploaded or filename missing."
+                logging.warning(f"Audio key present, but no valid file for session {session_id}")
+
+        if user_input_text is None and not input_error:
+            if request.is_json:
+                data = await request.get_json()
+                if data and "message" in data:
+                    user_input_text = data.get("message")
+                    if user_input_text: input_type = "text"
+                    else: input_error = "JSON received but 'message' field is empty."
+                elif input_type != "audio":
+                    input_error = "Request is JSON but missing 'message' field."
+            elif 'message' in form:
+                user_input_text = form.get('message')
+                if user_input_text: input_type = "text"
+                else: input_error = "Form data received but 'message' field is empty."
+
+        if user_input_text is None:
+            error_message = input_error if input_error else "Input required: Send JSON with 'message' or form-data with 'audio' file."
+            logging.warning(f"No valid input found for session {session_id}: {error_message}")
+            return jsonify({"error": error_message}), 400
+        elif input_error and input_type == "audio":
+            logging.warning(f"Proceeding for session {session_id} despite STT error: {input_error}")
+
+        # --- Process with Gemini ---
+        chat_history = await asyncio.to_thread(sync_app.session_manager.get_chat_history, session_id)
+
+        with STAGE_SECONDS.time(stage="prompt_build"):
+            prompt = sync_app.prompt_builder.build(
+                session_id, user_data, chat_history, session.summary, user_input_text, input_type, user_language
+            )
+
+        response_format = request.args.get('format', 'text').lower()
+
+        if response_format == 'audio':
+            logging.info(f"Generating streamed audio response (TTS) for session {session_id}, lang: {base_user_language}")
+            return await stream_chat_audio_response(session_id, prompt, user_input_text, base_user_language)
+
+        if request.args.get('stream', 'false').lower() in ['true', '1', 't']:
+            logging.info(f"Streaming Gemini response for session {session_id}")
+            return await stream_chat_response(session_id, prompt, user_input_text)
+
+        logging.info(f"Generating Gemini report for session {session_id}")
+        with STAGE_SECONDS.time(stage="llm"):
+            response_text = await gemini.get_report(prompt)
+
+        if not response_text or response_text.startswith("Error:"):
+            logging.error(f"Gemini Error for session {session_id}: {response_text}")
+            return jsonify({"error": "Failed to get response from language model."}), 500
+
+        logging.info(f"Gemini response received for session {session_id}")
+        await update_history(session_id, user_input_text, response_text)
+        return jsonify({"response": response_text}), 200
+
+    except Overloaded:
+        raise
+    except Exception as e:
+        logging.error(f"Unexpected error in /api/chat/{session_id}: {e}", exc_info=True)
+        return jsonify({"error": "An internal server error occurred during chat processing."}), 500
+
+
+@app.route('/api/sessions/stats', methods=['GET'])
+async def session_stats():
+    """Reports live sessions, approximate memory held and evictions."""
+    return jsonify(await asyncio.to_thread(sync_app.session_manager.stats)), 200
+
+
+@app.route('/api/translator/', methods=['POST'])
+async def do_translation():
+    """Translates text or speech."""
+    try:
+        input_text = None
+        input_error = None
+        target_lang = None
+        source_lang = None
+        input_type = "unknown"
+
+        # --- Extract input data ---
+        if request.is_json:
+            data = await request.get_json()
+            input_text = data.get('text')
+            target_lang = data.get('target_lang')
+            source_lang = data.get('source_lang')
+            if input_text:
+                input_type = "text"
+        else:
+            form = await request.form
+            files = await request.files
+            target_lang = form.get('target_lang')
+            source_lang = form.get('source_lang')
+
+            if 'audio' in files:
+                audio_file = files.get('audio')
+                if audio_file and audio_file.filename:
+                    input_type = "audio"
+                    stt_lang_hint = source_lang or 'en-US'
+                    app.logger.info(f"STT | Processing audio (lang hint: {stt_lang_hint})")
+                    input_text, input_error = await asyncio.to_thread(sync_app.speech_to_text, audio_file, stt_lang_hint)
+                    if input_error:
+                        app.logger.warning(f"STT | Error: {input_error}")
+                        return jsonify({"error": f"Audio processing failed: {input_error}"}), 400
+                else:
+                    input_error = "Audio file provided but no file uploaded or filename missing."
+                    app.logger.warning(f"STT | {input_error}")
+
+            if input_text is None and not input_error:
+                form_text = form.get('text')
+                if form_text:
+                    input_text = form_text
+                    input_type = "text"
+                elif input_type != "audio":
+                    input_error = "No text or audio provided in form-data."
+
+        # --- Validate inputs ---
+        if not target_lang:
+            return jsonify({"error": "'target_lang' is required in JSON or form data."}), 400
+
+        if input_text is None:
+            error_message = input_error or "Input required: JSON with 'text', or form-data with 'text' or 'audio'."
+            return jsonify({"error": error_message}), 400
+
+        # --- Perform translation ---
+        try:
+            with STAGE_SECONDS.time(stage="translate"):
+                translated_text, cached = await asyncio.to_thread(
+                    sync_app.translation_service.translate, input_text, target_lang, source=source_lang
+                )
+            actual_src_lang = source_lang or "auto-detect"
+            app.logger.info(f"Translate | Success (cached: {cached}) | Output: '{translated_text[:100]}...'")
+        except Overloaded:
+            raise
+        except Exception as e:
+            app.logger.error(f"Translate | Error: {e}", exc_info=True)
+            return jsonify({"error": f"Translation failed: {e}"}), 500
+
+        # --- Output format ---
+        output_format = request.args.get('format', 'text').lower()
+
+        if not isinstance(target_lang, str):
+            app.logger.error(f"Internal Error: Invalid target_lang: {target_lang}")
+            return jsonify({"error": "Internal error: Target language missing or invalid."}), 500
+
+        base_target_lang = target_lang.split('-')[0].lower()
+
+        if output_format == 'audio':
+            app.logger.info(f"TTS | Generating audio for language: {base_target_lang}")
+            if translated_text is None:
+                return jsonify({"error": "Internal error: Translation result is missing."}), 500
+
+            audio, tts_error = await text_to_speech(aiter_sentences(_aiter([translated_text])), lang=base_target_lang)
+            if tts_error:
+                app.logger.warning(f"TTS | Error: {tts_error}")
+                return jsonify({
+                    "warning": f"Audio generation failed: {tts_error}. Returning text instead.",
+                    "translated_text": translated_text,
+                    "source_language_detected": actual_src_lang
+                }), 200
+            app.logger.info("TTS | Streaming audio.")
+            return Response(audio, mimetype='audio/mpeg')
+
+        return jsonify({
+            "translated_text": translated_text,
+            "source_language_detected": actual_src_lang,
+            "cached": cached
+        }), 200
+
+    except Overloaded:
+        raise
+    except Exception as e:
+        app.logger.error(f"Translator | Unexpected Error: {e}", exc_info=True)
+        return jsonify({"error": "Internal server error occurred."}), 500
+
+
+@app.route('/api/translator/batch', methods=['POST'])
+async def do_translation_batch():
+    """Translates a list of texts to one target language, concurrently and through the cache."""
+    data = await request.get_json(silent=True) or {}
+    texts = data.get('texts')
+    target_lang = data.get('target_lang')
+    source_lang = data.get('source_lang')
+
+    if not target_lang:
+        return jsonify({"error": "'target_lang' is required."}), 400
+    if not isinstance(texts, list) or not texts:
+        return jsonify({"error": "'texts' must be a non-empty list of strings."}), 400
+    if len(texts) > sync_app.TRANSLATE_BATCH_MAX_TEXTS:
+        return jsonify({"error": f"Too many texts in one batch (max {sync_app.TRANSLATE_BATCH_MAX_TEXTS})."}), 413
+    if not all(isinstance(t, str) and t.strip() for t in texts):
+        return jsonify({"error": "Every entry in 'texts' must be a non-empty string."}), 400
+
+    results, elapsed = await asyncio.to_thread(sync_app.translation_service.translate_batch, texts, target_lang, source=source_lang)
+    cache_hits = sum(1 for r in results if r.get("cached"))
+    failed = sum(1 for r in results if "error" in r)
+    app.logger.info(f"Translate batch | {len(texts)} texts, {cache_hits} cached, {failed} failed, {elapsed * 1000:.0f} ms")
+    return jsonify({
+        "count": len(results),
+        "results": results,
+        "source_language_detected": source_lang or "auto-detect",
+        "cache_hits": cache_hits,
+        "failed": failed,
+        "elapsed_ms": round(elapsed * 1000, 1)
+    }), 200
+
+
+@app.route('/api/translator/stats', methods=['GET'])
+async def translator_stats():
+    """Reports translation cache hit rate and batch latency."""
+    return jsonify(sync_app.translation_service.stats()), 200
+
+
+@app.route('/api/tts/stats', methods=['GET'])
+async def tts_stats():
+    """Reports TTS audio cache hit rate and tier sizes."""
+    return jsonify(sync_app.tts_audio_cache.stats()), 200
+
+
+@app.route('/api/upstreams/stats', methods=['GET'])
+async def upstream_stats():
+    """Reports in-flight calls, queue depth and shed counts per upstream."""
+    return jsonify(sync_app.upstream_governor.stats()), 200
+
+
+def _link_model_unavailable(e):
+    """The 503 both link classifier routes send when the model can't be loaded or run (missing, corrupt, wrong schema)."""
+    logging.error(f"Link classifier model unavailable: {e}", exc_info=True)
+    return jsonify({'error': 'Link classifier model is unavailable.'}), 503
+
+
+@app.route('/api/link_classifier/', methods=['POST'])
+async def predict_url_safety():
+    """Classifies one URL; in 'full' mode the RF prediction and the Gemini check run concurrently."""
+    data = await request.get_json()
+    url = data.get('url')
+
+    if not url:
+        return jsonify({'error': 'URL is missing'}), 400
+
+    mode = request.args.get('mode', sync_app.LINK_CLASSIFIER_MODE).lower()
+    if mode not in ('cascade', 'full'):
+        return jsonify({'error': "'mode' must be 'cascade' or 'full'"}), 400
+
+    try:
+        registry = sync_app.link_model_registry
+        await asyncio.to_thread(registry.get)  # make sure the model version used in the cache key is current
+        cache_key = (mode, registry.version, url)  # the exact string the features are computed from
+        with STAGE_SECONDS.time(stage="link_classify"):
+            result, cached = await sync_app.link_verdict_cache.aget_or_compute(
+                cache_key,
+                lambda: sync_app.link_cascade.classify_async(url, mode=mode, llm=get_gemini()),
+                cache_if=lambda r: r['stage'] != 'rf_fallback',  # don't pin a degraded verdict
+            )
+    except Exception as e:
+        return _link_model_unavailable(e)
+
+    logging.info(f"Link classifier | {url} -> {result['label']} (stage: {result['stage']}, mode: {mode}, cached: {cached})")
+    return jsonify({**result, 'cached': cached})
+
+
+@app.route('/api/link_classifier/batch', methods=['POST'])
+async def predict_url_safety_batch():
+    """Classifies a list of URLs with one vectorized feature pass and one model call."""
+    data = await request.get_json(silent=True) or {}
+    urls = data.get('urls')
+
+    if not isinstance(urls, list) or not urls:
+        return jsonify({'error': "'urls' must be a non-empty list of URLs"}), 400
+    if len(urls) > sync_app.LINK_BATCH_MAX_URLS:
+        return jsonify({'error': f"Too many URLs in one batch (max {sync_app.LINK_BATCH_MAX_URLS})"}), 413
+    if not all(isinstance(u, str) and u for u in urls):
+        return jsonify({'error': "Every entry in 'urls' must be a non-empty string"}), 400
+
+    try:
+        model = await asyncio.to_thread(sync_app.link_model_registry.get)
+    except Exception as e:
+        return _link_model_unavailable(e)
+
+    results = await asyncio.to_thread(sync_app.classify_url_batch, model, urls)
+    logging.info(f"Link classifier batch | Classified {len(urls)} URLs")
+    return jsonify({'count': len(results), 'results': results}), 200
+
+
+@app.route('/api/link_classifier/stats', methods=['GET'])
+async def link_classifier_stats():
+    """Reports cascade stage hit counts and verdict cache statistics."""
+    return jsonify({**sync_app.link_cascade.stats(), "cache": sync_app.link_verdict_cache.stats()}), 200
+
+
+@app.route('/api/link_classifier/model', methods=['GET'])
+async def link_model_info():
+    """Reports the version and load time of the URL classifier being served."""
+    return jsonify(sync_app.link_model_registry.info()), 200
+
+
+@app.route('/metrics', methods=['GET'])
+async def metrics():
+    """Exposes stage latency histograms and request/upstream counters in Prometheus text format."""
+    return Response(REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s : %(message)s')
+    host = os.environ.get('FLASK_RUN_HOST', '127.0.0.1')
+    port = int(os.environ.get('FLASK_RUN_PORT', 5000))
+    workers = int(os.environ.get('ASGI_WORKERS', 1))
+
+    logging.info(f"Starting ASGI server on {host}:{port} ({workers} worker(s))")
+    uvicorn.run("asgi_app:app", host=host, port=port, workers=workers)
@@ -0,0 +1,154 @@
+"""Requests in flight: Flask (werkzeug, one thread per request) vs the ASGI app (uvicorn).
+
+    python benchmarks/bench_asgi_concurrency.py --concurrency 10 100 1000 --requests 2000
+    python benchmarks/bench_asgi_concurrency.py --path link --gemini-latency 0.5
+
+Both apps are served in-process with the Gemini client replaced by the fakes in
+benchmarks/fakes.py, and driven over HTTP by a lightweight asyncio client
+holding --concurrency requests open at once. --path chat sends text chat messages,
+--path link sends unique URLs to the link classifier in 'full' mode. Reports
+throughput, p50/p99 latency and the peak number of threads in the process
+(which includes the load generator's own few threads).
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import httpx
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+from benchmarks.fakes import FakeGemini, AsyncFakeGemini  # noqa: E402
+from benchmarks.run_suite import train_stand_in_model  # noqa: E402
+
+
+class ThreadSampler:
+    """Records the peak ``threading.active_count()`` while the block runs."""
+
+    def __init__(self, interval=0.02):
+        self.interval = interval
+        self.peak = threading.active_count()
+        self._stop = threading.Event()
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, threading.active_count())
+
+
+async def post(host, port, path, payload):
+    """Minimal HTTP/1.1 POST on a fresh connection; returns the status code.
+
+    Hand-rolled so the load generator, which shares the CPU with the server, stays cheap.
+    """
+    body = json.dumps(payload).encode("utf-8")
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("ascii") + body)
+        await writer.drain()
+        status = int((await reader.readline()).split()[1])
+        await reader.read()
+        return status
+    finally:
+        writer.close()
+
+
+async def drive(host, port, path, concurrency, n_requests, session_id, ids):
+    latencies, errors = [], 0
+    queue = asyncio.Queue()
+    for _ in range(n_requests):
+        queue.put_nowait(next(ids))
+
+    async def worker():
+        nonlocal errors
+        while not queue.empty():
+            i = queue.get_nowait()
+            start = time.perf_counter()
+            try:
+                if path == "chat":
+                    status = await post(host, port, f"/api/chat/{session_id}", {"message": f"Message {i}, how was your day?"})
+                else:
+                    status = await post(host, port, "/api/link_classifier/?mode=full", {"url": f"http://site{i}.example.com/login?id={i}"})
+            except (OSError, ValueError, IndexError):
+                status = None
+            if status == 200:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+
+def run(name, port, args, ids):
+    session_id = httpx.post(f"http://127.0.0.1:{port}/api/start_chat", json={"language": "en-US", "name": "Bench"}).json()["session_id"]
+    for concurrency in args.concurrency:
+        with ThreadSampler() as threads:
+            latencies, errors, elapsed = asyncio.run(drive("127.0.0.1", port, args.path, concurrency, args.requests, session_id, ids))
+        ms = np.array(latencies) * 1000 if latencies else np.zeros(1)
+        print(f"{name:<6} c={concurrency:<5} {len(latencies) / elapsed:8.1f} req/s  p50 {np.percentile(ms, 50):7.0f} ms  "
+              f"p99 {np.percentile(ms, 99):7.0f} ms  errors {errors:<4} peak threads {threads.peak}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--path", choices=["chat", "link"], default="chat")
+    parser.add_argument("--gemini-latency", type=float, default=0.5, help="simulated seconds to first token")
+    parser.add_argument("--gemini-generation-seconds", type=float, default=0.5)
+    parser.add_argument("--skip-flask", action="store_true")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    work = tempfile.mkdtemp(prefix="bench-asgi-")
+    model_path = os.path.join(work, "rf_model.pkl")
+    train_stand_in_model(model_path)
+    os.environ.update(LINK_MODEL_PATH=model_path, TTS_CACHE_DIR=os.path.join(work, "tts_cache"))
+    os.environ.setdefault("ASGI_BLOCKING_THREADS", "32")
+
+    import uvicorn
+    from werkzeug.serving import make_server
+    import app as chat_app
+    import asgi_app
+
+    ids = itertools.count()  # every message and URL is unique, so no cache hits
+    gemini_kwargs = dict(latency=args.gemini_latency, stream_seconds=args.gemini_generation_seconds)
+
+    if not args.skip_flask:
+        chat_app.gemini = FakeGemini(**gemini_kwargs)
+        server = make_server("127.0.0.1", 0, chat_app.app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        run("flask", server.server_port, args, ids)
+        server.shutdown()
+
+    config = uvicorn.Config(asgi_app.app, host="127.0.0.1", port=0, log_level="warning", backlog=4096)
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    asgi_app.gemini = AsyncFakeGemini(**gemini_kwargs)  # after startup, which may create the real client (APP_WARMUP)
+    run("asgi", server.servers[0].sockets[0].getsockname()[1], args, ids)
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Measures time-to-first-audio-byte for format=audio responses on a live server.
+
+    python app.py
+    python benchmarks/bench_audio_stream.py --base-url http://127.0.0.1:5000 --turns 5
+
+For every turn it records the time until the first MP3 byte reaches the
+client, the time until the last one does, and the response size. Compare
+against a checkout before streamed TTS to see the difference.
+"""
+import argparse
+import statistics
+import time
+
+import requests
+
+
+def timed_audio(session, url, **kwargs):
+    start = time.perf_counter()
+    first_byte = None
+    size = 0
+    with session.post(url, params={"format": "audio"}, stream=True, timeout=180, **kwargs) as response:
+        response.raise_for_status()
+        if not response.headers.get("Content-Type", "").startswith("audio/"):
+            raise RuntimeError(f"Expected audio, got: {response.text[:200]}")
+        for chunk in response.iter_content(chunk_size=4096):
+            if first_byte is None:
+                first_byte = time.perf_counter() - start
+            size += len(chunk)
+    return first_byte, time.perf_counter() - start, size
+
+
+def report(name, results):
+    first = [r[0] * 1000 for r in results]
+    total = [r[1] * 1000 for r in results]
+    size = statistics.median(r[2] for r in results)
+    print(f"{name:<12} first byte p50 {statistics.median(first):7.0f} ms   "
+          f"complete p50 {statistics.median(total):7.0f} ms   size p50 {size / 1024:7.1f} KiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:5000")
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--language", default="en-US")
+    parser.add_argument("--message", default="Tell me a short story about your weekend.")
+    args = parser.parse_args()
+
+    http = requests.Session()
+    response = http.post(f"{args.base_url}/api/start_chat", json={"language": args.language}, timeout=30)
+    response.raise_for_status()
+    chat_url = f"{args.base_url}/api/chat/{response.json()['session_id']}"
+    translator_url = f"{args.base_url}/api/translator/"
+
+    report("chat", [timed_audio(http, chat_url, json={"message": args.message}) for _ in range(args.turns)])
+    report("translator", [
+        timed_audio(http, translator_url, json={"text": args.message, "target_lang": "ar"}) for _ in range(args.turns)
+    ])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Compares time-to-first-token of streamed chat replies with full-response latency.
+
+Runs against a live server:
+    python app.py
+    python benchmarks/bench_chat_stream.py --base-url http://127.0.0.1:5000 --turns 10
+
+Each turn is sent twice on the same session: once with ?stream=true (time to
+the first SSE "data:" line, and to the final "done" event) and once as a plain
+JSON request (time until the whole reply arrives).
+"""
+import argparse
+import statistics
+import time
+
+import requests
+
+
+def timed_full(session, url, message):
+    start = time.perf_counter()
+    response = session.post(url, json={"message": message}, timeout=120)
+    response.raise_for_status()
+    return time.perf_counter() - start
+
+
+def timed_stream(session, url, message):
+    start = time.perf_counter()
+    ttft = None
+    with session.post(url, params={"stream": "true"}, json={"message": message}, stream=True, timeout=120) as response:
+        response.raise_for_status()
+        for line in response.iter_lines(decode_unicode=True):
+            if ttft is None and line.startswith("data:"):
+                ttft = time.perf_counter() - start
+    return ttft, time.perf_counter() - start
+
+
+def summarize(name, values):
+    values_ms = [v * 1000 for v in values]
+    print(f"{name:<24} p50 {statistics.median(values_ms):8.0f} ms   max {max(values_ms):8.0f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:5000")
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--language", default="en-US")
+    parser.add_argument("--message", default="Tell me about your favourite football match.")
+    args = parser.parse_args()
+
+    http = requests.Session()
+    response = http.post(f"{args.base_url}/api/start_chat", json={"language": args.language}, timeout=30)
+    response.raise_for_status()
+    chat_url = f"{args.base_url}/api/chat/{response.json()['session_id']}"
+
+    full, ttfts, stream_totals = [], [], []
+    for _ in range(args.turns):
+        full.append(timed_full(http, chat_url, args.message))
+        ttft, total = timed_stream(http, chat_url, args.message)
+        ttfts.append(ttft)
+        stream_totals.append(total)
+
+    summarize("full response", full)
+    summarize("stream first token", ttfts)
+    summarize("stream complete", stream_totals)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""URL model served through scikit-learn (joblib .pkl) vs the compiled forest from utils/forest_export.py.
+
+    python benchmarks/bench_forest.py --model ./weights/rf_model.pkl --sizes 1 100 10000
+
+Without --model a stand-in forest is trained on synthetic URLs. The model is
+exported, checked to give identical probabilities, and then compared on:
+load cost in a fresh interpreter (time and RSS added on top of numpy, i.e.
+what a worker pays for its first classification), single-URL latency as in
+LinkCascade.rf_score, and batch throughput as in /api/link_classifier/batch.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, ROOT)
+from benchmarks.bench_link_batch import make_urls  # noqa: E402
+from helpers import extract_features, extract_features_batch  # noqa: E402
+
+LOAD_CHILD = r"""
+import json, sys, time
+import numpy as np
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+
+before = rss_mb()
+start = time.perf_counter()
+if sys.argv[1] == "compiled":
+    from utils.forest_export import CompiledForest
+    model = CompiledForest.load(sys.argv[2])
+else:
+    import joblib
+    model = joblib.load(sys.argv[2])
+model.predict_proba(np.zeros((1, model.n_features_in_)))
+print(json.dumps({"load_s": time.perf_counter() - start, "rss_mb": rss_mb() - before}))
+"""
+
+
+def load_cost(kind, path, runs):
+    results = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", LOAD_CHILD, kind, path], cwd=ROOT, capture_output=True, text=True, check=True)
+        results.append(json.loads(out.stdout))
+    return np.median([r["load_s"] for r in results]) * 1000, np.median([r["rss_mb"] for r in results])
+
+
+def single_latency_us(model, urls):
+    timings = []
+    for url in urls:
+        start = time.perf_counter()
+        model.predict_proba(extract_features(url))
+        timings.append(time.perf_counter() - start)
+    return np.percentile(timings, 50) * 1e6, np.percentile(timings, 99) * 1e6
+
+
+def batch_rate(model, urls, repeat=3):
+    features = extract_features_batch(urls)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        model.predict_proba(features)
+        best = min(best, time.perf_counter() - start)
+    return len(urls) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=None, help="pickled RandomForestClassifier; a stand-in is trained if omitted")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10000, 100000])
+    parser.add_argument("--single", type=int, default=500, help="URLs timed one at a time")
+    parser.add_argument("--runs", type=int, default=3, help="fresh interpreters per load measurement")
+    args = parser.parse_args()
+
+    import joblib
+    from utils.forest_export import CompiledForest, export_forest, verify
+
+    work = tempfile.mkdtemp(prefix="bench-forest-")
+    model_path = args.model
+    if model_path is None:
+        from benchmarks.run_suite import train_stand_in_model
+        model_path = os.path.join(work, "rf_model.pkl")
+        train_stand_in_model(model_path)
+    forest_path = os.path.join(work, "rf_model.forest")
+    sklearn_model = joblib.load(model_path)
+    manifest = export_forest(sklearn_model, forest_path)
+    forest = CompiledForest.load(forest_path)
+
+    urls = make_urls(max(args.sizes + [args.single]), seed=1)
+    mismatches = verify(sklearn_model, forest, extract_features_batch(urls))
+    print(f"{manifest['n_trees']} trees, {manifest['n_nodes']} nodes, max depth {manifest['max_depth']}; "
+          f"{mismatches} of {len(urls)} URLs differ from scikit-learn")
+
+    print(f"\n{'':<10} {'load':>10} {'RSS added':>11} {'single p50':>12} {'single p99':>12}")
+    for name, kind, path, model in (("sklearn", "pickle", model_path, sklearn_model), ("compiled", "compiled", forest_path, forest)):
+        load_ms, rss = load_cost(kind, path, args.runs)
+        p50, p99 = single_latency_us(model, urls[:args.single])
+        print(f"{name:<10} {load_ms:7.0f} ms {rss:8.1f} MB {p50:9.0f} us {p99:9.0f} us")
+
+    print(f"\n{'n_urls':>8} {'sklearn url/s':>15} {'compiled url/s':>15} {'speedup':>9}")
+    for n in args.sizes:
+        sk, co = batch_rate(sklearn_model, urls[:n]), batch_rate(forest, urls[:n])
+        print(f"{n:>8} {sk:>15.0f} {co:>15.0f} {co / sk:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Traffic spike against a saturating upstream, with and without the concurrency governor.
+
+    python benchmarks/bench_governor.py --clients 200 --capacity 16 --latency 0.5 --slo 2.0
+
+--clients threads each send requests back to back for --seconds. The fake
+upstream serves --capacity calls at a time at --latency seconds each; beyond
+that its calls slow down in proportion to the overload, like a rate-limited
+API or a saturated GPU pool. Without a governor every request goes straight
+to the upstream. With one, at most --capacity calls are in flight, up to
+--queue more wait at most --queue-timeout seconds, and the rest are shed at
+once (a 503 with Retry-After in the app). Reports latency of the requests
+that were served, how many were shed, and goodput: requests served within
+--slo seconds per second.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from utils.governor import Limiter, Overloaded, slot  # noqa: E402
+
+
+class SaturatingUpstream:
+    def __init__(self, capacity, latency):
+        self.capacity = capacity
+        self.latency = latency
+        self._lock = threading.Lock()
+        self._inflight = 0
+
+    def call(self):
+        with self._lock:
+            self._inflight += 1
+            overload = max(self._inflight / self.capacity, 1.0)
+        try:
+            time.sleep(self.latency * overload)
+        finally:
+            with self._lock:
+                self._inflight -= 1
+
+
+def run(args, limiter):
+    upstream = SaturatingUpstream(args.capacity, args.latency)
+    served, shed = [], [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.seconds
+
+    def client():
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                with slot(limiter):
+                    upstream.call()
+            except Overloaded as e:
+                with lock:
+                    shed[0] += 1
+                time.sleep(min(e.retry_after, args.seconds) * 0.1)  # a well-behaved client backs off
+                continue
+            with lock:
+                served.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client) for _ in range(args.clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return np.array(served), shed[0]
+
+
+def report(name, served, shed, args):
+    ms = served * 1000 if len(served) else np.zeros(1)
+    goodput = np.count_nonzero(served <= args.slo) / args.seconds
+    print(f"{name:<12} served {len(served):>6}  shed {shed:>6}  p50 {np.percentile(ms, 50):7.0f} ms  "
+          f"p99 {np.percentile(ms, 99):7.0f} ms  goodput {goodput:6.1f}/s within {args.slo:g}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--capacity", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--queue", type=int, default=32)
+    parser.add_argument("--queue-timeout", type=float, default=1.0)
+    parser.add_argument("--slo", type=float, default=2.0, help="latency target in seconds for goodput")
+    args = parser.parse_args()
+
+    served, shed = run(args, None)
+    report("ungoverned", served, shed, args)
+    limiter = Limiter("bench", max_inflight=args.capacity, max_queue=args.queue, queue_timeout=args.queue_timeout)
+    served, shed = run(args, limiter)
+    report("governed", served, shed, args)
+    print(f"limiter: {limiter.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Compares the single-URL and batch link classification paths.
+
+Usage:
+    python benchmarks/bench_link_batch.py --model ./weights/rf_model.pkl --sizes 1000 100000
+
+The single-URL path (extract_features + one-row predict per URL) is timed on at
+most --single-sample URLs and extrapolated, since running it on 100k URLs
+takes minutes.
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+import joblib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from helpers import extract_features, extract_features_batch  # noqa: E402
+
+
+def make_urls(n, seed=42):
+    rng = random.Random(seed)
+    hosts = ["example.com", "bit.ly", "github.com", "192.168.1.10", "login-secure-update.xyz", "news.site.org"]
+    urls = []
+    for _ in range(n):
+        scheme = rng.choice(["http://", "https://"])
+        path = "/".join("".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 8))) for _ in range(rng.randint(0, 4)))
+        query = "&".join(f"k{i}=v{rng.randint(0, 999)}" for i in range(rng.randint(0, 3)))
+        urls.append(f"{scheme}{rng.choice(hosts)}/{path}" + (f"?{query}" if query else ""))
+    return urls
+
+
+def bench_single(model, urls):
+    start = time.perf_counter()
+    for url in urls:
+        model.predict(extract_features(url).reshape(1, -1))
+    return time.perf_counter() - start
+
+
+def bench_batch(model, urls):
+    start = time.perf_counter()
+    model.predict_proba(extract_features_batch(urls))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="./weights/rf_model.pkl")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000])
+    parser.add_argument("--single-sample", type=int, default=2000)
+    args = parser.parse_args()
+
+    model = joblib.load(args.model)
+    print(f"{'n_urls':>8} {'single url/s':>14} {'batch url/s':>14} {'speedup':>9}")
+    for n in args.sizes:
+        urls = make_urls(n)
+        sample = urls[:min(n, args.single_sample)]
+        single_rate = len(sample) / bench_single(model, sample)
+        batch_rate = n / bench_batch(model, urls)
+        print(f"{n:>8} {single_rate:>14.0f} {batch_rate:>14.0f} {batch_rate / single_rate:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
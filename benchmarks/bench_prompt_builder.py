@@ -0,0 +1,114 @@
+"""Prompt size and estimated latency per turn: the old full-history prompt vs PromptBuilder.
+
+    python benchmarks/bench_prompt_builder.py --turns 60 --max-chars 6000
+
+Replays a long synthetic conversation through SessionManager, building each
+turn's prompt both ways. Latency is estimated with a fake LLM whose time to
+first token grows with the prompt length (--prefill-chars-per-s), plus a fixed
+--base-latency, so no network access is needed.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from utils.prompt_builder import PromptBuilder  # noqa: E402
+from utils.session_manager import SessionManager  # noqa: E402
+from utils.session_store import MemorySessionStore  # noqa: E402
+
+PROFILE = {
+    "name": "Mohamed Ahmed", "age_range": "20-25", "language": "ar-EG",
+    "interests": ["football", "movies", "music", "gaming", "travel"],
+    "goals": "Start my own business and improve my English",
+    "personality": "Outgoing, likes jokes, talks fast",
+    "communication_style": "Casual, uses a lot of slang",
+}
+
+
+def legacy_prompt(user_data, chat_history, user_input_text, input_type, user_language):
+    """The prompt /api/chat used to build on every turn."""
+    return f"""
+    **Instructions for the Language Model:**
+    You are a real human friend to {user_data.get("name", "the user")}. Your goal is to provide natural, enjoyable conversations tailored to the user's personality, interests, and communication style. You are the same age as the user ({user_data.get("age_range", "unknown")} years old) and share similar interests. You also speak the same language as the user and use the same accent from their country.
+
+    * **Speak ONLY in the user's specific language ({user_language}). Use phrasing and tone appropriate for that language and region.**
+    * **Keep your responses casual, friendly, and natural—just like a real person talking.**
+    * **Incorporate the user's interests smoothly into conversations.**
+    * **Acknowledge their goals and support them in a realistic way.**
+    * **Adapt to their personality, humor, and way of speaking.**
+    * **Avoid sensitive or unethical topics.**
+    * **Remember you are a true human.**
+
+    **Important:** Ensure your speech feels natural and authentic, matching the user's cultural and linguistic background ({user_language}). Use chat history to maintain consistency. Avoid mentioning you are an AI or language model.
+
+    **User Profile:**
+    {json.dumps(user_data, indent=2)}
+
+    **Chat History (Last ~10 exchanges):**
+    {json.dumps(chat_history[-10:], indent=2)}
+
+    **User Input (Type: {input_type}, Language: {user_language}):**
+    {user_input_text}
+
+    **Your Response (in {user_language}):**
+    """
+
+
+def message(turn):
+    return f"Turn {turn}: did you see the match yesterday? I think the second half was much better. " * 2
+
+
+def reply(turn):
+    return f"Reply {turn}: Yes! The second half was amazing, the midfield finally woke up and pressed high. " * 5
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=60)
+    parser.add_argument("--history-turns", type=int, default=10, help="SESSION_HISTORY_TURNS")
+    parser.add_argument("--max-chars", type=int, default=6000, help="PROMPT_MAX_CHARS")
+    parser.add_argument("--base-latency", type=float, default=0.4, help="fake LLM seconds per request")
+    parser.add_argument("--prefill-chars-per-s", type=float, default=40000, help="fake LLM prompt processing rate")
+    args = parser.parse_args()
+
+    manager = SessionManager(MemorySessionStore(max_history=args.history_turns))
+    builder = PromptBuilder(max_chars=args.max_chars)
+    session_id = manager.create_session(PROFILE)
+
+    def latency(prompt):
+        return args.base_latency + len(prompt) / args.prefill_chars_per_s
+
+    totals = {"legacy": [0, 0.0, 0.0], "builder": [0, 0.0, 0.0]}  # chars, build seconds, est. latency
+    print(f"{'turn':>5} {'legacy chars':>13} {'builder chars':>14} {'legacy s':>9} {'builder s':>10}")
+    for turn in range(1, args.turns + 1):
+        session = manager.get_session(session_id)
+        history = manager.get_chat_history(session_id)
+        text = message(turn)
+
+        start = time.perf_counter()
+        old = legacy_prompt(session.user_data, history, text, "text", "ar-EG")
+        old_build = time.perf_counter() - start
+        start = time.perf_counter()
+        new = builder.build(session_id, session.user_data, history, session.summary, text, "text", "ar-EG")
+        new_build = time.perf_counter() - start
+
+        for name, prompt, build in (("legacy", old, old_build), ("builder", new, new_build)):
+            totals[name][0] += len(prompt)
+            totals[name][1] += build
+            totals[name][2] += latency(prompt)
+        if turn == 1 or turn % 10 == 0:
+            print(f"{turn:>5} {len(old):>13} {len(new):>14} {latency(old):>9.3f} {latency(new):>10.3f}")
+        manager.update_session_chat_history(session_id, text, reply(turn))
+
+    print()
+    for name, (chars, build, est) in totals.items():
+        print(f"{name:<8} avg {chars / args.turns:8.0f} chars/turn, build {build / args.turns * 1e6:6.1f} us/turn, "
+              f"est. latency {est / args.turns:.3f} s/turn")
+    print(f"prompt size -{1 - totals['builder'][0] / totals['legacy'][0]:.0%}, "
+          f"est. latency -{1 - totals['builder'][2] / totals['legacy'][2]:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Throughput of the session store backends under a chat-like workload.
+
+    python benchmarks/bench_session_store.py --threads 8 --sessions 200 --turns 20
+    python benchmarks/bench_session_store.py --backends sqlite --processes 4
+
+Each simulated conversation creates a session and then, per turn, does what
+/api/chat does: get the session, read the history and append a turn. Results
+are turns per second. With --processes the SQLite store is shared by several
+worker processes, like gunicorn workers would share it.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from utils.session_store import make_session_store  # noqa: E402
+
+PROFILE = {"name": "Mohamed Ahmed", "language": "ar", "interests": ["football", "movies", "music"], "goals": "Start my own business"}
+MESSAGE = "Hey! How was the match yesterday? " * 4
+REPLY = "It was amazing, Al Ahly played so well in the second half. " * 6
+
+
+def conversation(store, turns):
+    session_id = str(uuid.uuid4())
+    store.create(session_id, PROFILE)
+    for _ in range(turns):
+        store.get(session_id)
+        store.get_history(session_id)
+        store.append_turn(session_id, MESSAGE, REPLY)
+
+
+def run_threads(store, threads, sessions, turns):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(lambda _: conversation(store, turns), range(sessions)))
+    return time.perf_counter() - start
+
+
+def _process_worker(args):
+    path, threads, sessions, turns = args
+    store = make_session_store("sqlite", path=path)
+    return run_threads(store, threads, sessions, turns)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["memory", "sqlite"])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--processes", type=int, default=1, help="worker processes (sqlite only)")
+    parser.add_argument("--sessions", type=int, default=200, help="conversations per process")
+    parser.add_argument("--turns", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in args.backends:
+            path = os.path.join(tmp, f"{backend}.db")
+            total_turns = args.sessions * args.turns
+            if backend == "sqlite" and args.processes > 1:
+                make_session_store("sqlite", path=path)  # create the schema once
+                start = time.perf_counter()
+                with ProcessPoolExecutor(max_workers=args.processes) as pool:
+                    list(pool.map(_process_worker, [(path, args.threads, args.sessions, args.turns)] * args.processes))
+                elapsed = time.perf_counter() - start
+                total_turns *= args.processes
+                label = f"{backend} x{args.processes} proc"
+            else:
+                store = make_session_store(backend, path=path)
+                elapsed = run_threads(store, args.threads, args.sessions, args.turns)
+                label = backend
+            print(f"{label:<18} {total_turns:>8} turns in {elapsed:6.2f}s  ->  {total_turns / elapsed:9.0f} turns/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Cold start: time to import app.py and the memory a fresh worker holds, before and after a change.
+
+    python benchmarks/bench_startup.py --baseline HEAD~1 --runs 5
+
+Every measurement is a fresh interpreter that imports ``app`` (as a server
+worker does) and reports the import time, resident memory (RSS) and number of
+loaded modules. The current tree is compared with --baseline (any git ref,
+exported with ``git archive``) and with APP_WARMUP=all, which preloads
+everything up front. The last table shows what each warm-up step costs when it
+is instead paid by the first request that needs it.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+CHILD = r"""
+import json, sys, time
+start = time.perf_counter()
+import app
+elapsed = time.perf_counter() - start
+
+def rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+result = {"import_s": elapsed, "rss_mb": rss_mb(), "modules": len(sys.modules)}
+if len(sys.argv) > 1:
+    steps = {}
+    for step in sys.argv[1:]:
+        start = time.perf_counter()
+        app.WARMUP_STEPS[step]()
+        steps[step] = time.perf_counter() - start
+    result["steps"] = steps
+    result["rss_after_steps_mb"] = rss_mb()
+print(json.dumps(result))
+"""
+
+
+def measure(tree, runs, env_extra=None, steps=()):
+    env = {**os.environ, "TTS_CACHE_DIR": os.path.join(tempfile.gettempdir(), "bench-startup-tts"), **(env_extra or {})}
+    results = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", CHILD, *steps], cwd=tree, env=env,
+                             capture_output=True, text=True, check=True)
+        results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return results
+
+
+def export_tree(ref):
+    target = tempfile.mkdtemp(prefix="bench-startup-")
+    archive = subprocess.run(["git", "-C", ROOT, "archive", ref], capture_output=True, check=True).stdout
+    subprocess.run(["tar", "-x", "-C", target], input=archive, check=True)
+    return target
+
+
+def row(name, results):
+    import_ms = np.median([r["import_s"] for r in results]) * 1000
+    rss = np.median([r["rss_mb"] for r in results])
+    modules = int(np.median([r["modules"] for r in results]))
+    print(f"{name:<28} {import_ms:9.0f} ms  {rss:8.1f} MB  {modules:>6} modules")
+    return import_ms, rss
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--baseline", default=None, help="git ref to compare against, e.g. HEAD~1")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'':<28} {'import':>12}  {'RSS':>11}")
+    current = row("current", measure(ROOT, args.runs))
+    if args.baseline:
+        baseline = row(f"baseline ({args.baseline})", measure(export_tree(args.baseline), args.runs))
+        print(f"import time {current[0] / baseline[0] - 1:+.0%}, RSS {current[1] / baseline[1] - 1:+.0%} vs baseline")
+    row("current, APP_WARMUP=all", measure(ROOT, args.runs, {"APP_WARMUP": "all"}))
+
+    steps = ["gemini", "tts", "stt", "translate"]
+    (first,) = measure(ROOT, 1, steps=steps)
+    print("\nfirst-use cost of each lazily loaded dependency (paid by the first request that needs it):")
+    for step, seconds in first["steps"].items():
+        print(f"  {step:<12} {seconds * 1000:7.0f} ms")
+    print(f"  RSS with all of them loaded: {first['rss_after_steps_mb']:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Compares one-blob recognition with silence trimming + parallel chunked recognition.
+
+    python benchmarks/bench_stt_chunking.py --minutes 1 3 --workers 4
+
+Uses a synthetic voice note (tone bursts separated by pauses, with leading and
+trailing dead air) and StubRecognizerBackend, whose latency grows with the
+audio length like a remote recognizer's, so no network access is needed.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import speech_recognition as sr
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from utils.audio_ingest import STT_SAMPLE_RATE, STT_SAMPLE_WIDTH  # noqa: E402
+from utils.stt_pipeline import SpeechTranscriber, StubRecognizerBackend, split_on_pauses  # noqa: E402
+
+
+def synthetic_voice_note(minutes, seed=0):
+    """Alternates 2-6 s of 'speech' with 0.5-3 s pauses, plus 3 s of silence at both ends."""
+    rng = np.random.default_rng(seed)
+    parts = [np.zeros(3 * STT_SAMPLE_RATE)]
+    total = 0
+    while total < minutes * 60 * STT_SAMPLE_RATE:
+        speech = int(rng.uniform(2, 6) * STT_SAMPLE_RATE)
+        t = np.arange(speech) / STT_SAMPLE_RATE
+        parts.append(0.3 * np.sin(2 * np.pi * rng.uniform(150, 300) * t) * (1 + 0.3 * np.sin(2 * np.pi * 3 * t)))
+        pause = int(rng.uniform(0.5, 3) * STT_SAMPLE_RATE)
+        parts.append(rng.normal(0, 0.001, pause))
+        total += speech + pause
+    parts.append(np.zeros(3 * STT_SAMPLE_RATE))
+    return (np.clip(np.concatenate(parts), -1, 1) * 32767).astype(np.int16).tobytes()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, nargs="+", default=[1, 3])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--base-latency", type=float, default=0.3, help="stub seconds per request")
+    parser.add_argument("--per-second", type=float, default=0.05, help="stub seconds per second of audio")
+    args = parser.parse_args()
+
+    backend = StubRecognizerBackend(base_latency=args.base_latency, seconds_per_audio_second=args.per_second)
+    transcriber = SpeechTranscriber(backend, max_workers=args.workers)
+
+    print(f"{'audio':>8} {'blob s':>8} {'chunked s':>10} {'chunks':>7} {'audio kept':>11} {'speedup':>8}")
+    for minutes in args.minutes:
+        pcm = synthetic_voice_note(minutes)
+
+        start = time.perf_counter()
+        backend.recognize(sr.AudioData(pcm, STT_SAMPLE_RATE, STT_SAMPLE_WIDTH), "en-US")
+        blob = time.perf_counter() - start
+
+        start = time.perf_counter()
+        transcriber.transcribe(pcm, "en-US")
+        chunked = time.perf_counter() - start
+
+        chunks = split_on_pauses(pcm)
+        kept = sum(len(c) for c in chunks) / len(pcm)
+        print(f"{minutes:>6.1f} m {blob:>8.2f} {chunked:>10.2f} {len(chunks):>7} {kept:>10.0%} {blob / chunked:>7.1f}x")
+
+    transcriber.shutdown()
+
+
+if __name__ == "__main__":
+    main()
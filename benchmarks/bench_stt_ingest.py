@@ -0,0 +1,86 @@
+"""Compares the legacy temp-file STT ingestion with the in-memory decode path.
+
+    python benchmarks/bench_stt_ingest.py --input voice_note.mp3 --runs 20
+
+Both paths stop right before recognition (no network). The legacy path saves
+the upload to temp_<uuid>.<ext>, has pydub/ffmpeg write a second WAV and reads
+it back through sr.AudioFile. Latency is wall time per file; I/O is taken from
+/proc/self/io (read/write syscalls and bytes of this process, not ffmpeg) plus
+the number of files created on disk.
+"""
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+import uuid
+
+import speech_recognition as sr
+from pydub import AudioSegment
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from utils.audio_ingest import decode_to_pcm  # noqa: E402
+
+
+def legacy_ingest(data, ext):
+    """The pre-in-memory speech_to_text path, minus recognition. Returns (AudioData, files created)."""
+    temp_wav_path = f"temp_{uuid.uuid4()}.wav"
+    temp_orig_path = temp_wav_path.replace(".wav", ext)
+    try:
+        with open(temp_orig_path, "wb") as f:
+            f.write(data)
+        audio_segment = AudioSegment.from_file(temp_orig_path)
+        audio_segment = audio_segment.set_channels(1).set_frame_rate(16000)
+        audio_segment.export(temp_wav_path, format="wav")
+        with sr.AudioFile(temp_wav_path) as source:
+            return sr.Recognizer().record(source), 2
+    finally:
+        for path in {temp_wav_path, temp_orig_path}:
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def in_memory_ingest(data, ext):
+    pcm = decode_to_pcm(io.BytesIO(data), ext)
+    return sr.AudioData(pcm, 16000, 2), 0
+
+
+def proc_io():
+    try:
+        with open("/proc/self/io") as f:
+            return {k: int(v) for k, v in (line.split(": ") for line in f)}
+    except OSError:
+        return {}
+
+
+def run(name, ingest, data, ext, runs):
+    times, files = [], 0
+    before = proc_io()
+    for _ in range(runs):
+        start = time.perf_counter()
+        _, created = ingest(data, ext)
+        times.append(time.perf_counter() - start)
+        files += created
+    after = proc_io()
+    io_delta = {k: (after[k] - before[k]) / runs for k in ("syscr", "syscw", "rchar", "wchar") if k in after}
+    print(f"{name:<10} p50 {statistics.median(times) * 1000:7.1f} ms  max {max(times) * 1000:7.1f} ms  "
+          f"files/run {files / runs:.0f}  " + "  ".join(f"{k}/run {v:,.0f}" for k, v in io_delta.items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", required=True, help="Audio file to ingest (wav, mp3, ogg, m4a, ...)")
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    with open(args.input, "rb") as f:
+        data = f.read()
+    ext = os.path.splitext(args.input)[1].lower()
+
+    run("legacy", legacy_ingest, data, ext, args.runs)
+    run("in-memory", in_memory_ingest, data, ext, args.runs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Link classifier training: the notebook's approach vs train_link_classifier.py.
+
+    python benchmarks/bench_training.py --rows 500000 --workers 4
+
+Writes a synthetic labelled CSV of --rows URLs, then times both pipelines on it:
+the notebook loads every row, builds the features one URL at a time with
+extract_features and fits with a single thread; the training module streams the
+file in chunks, extracts features in --workers processes and fits with n_jobs=-1.
+Both fit the same forest (same random_state), so the models are checked to be
+identical. The parallel stages only speed up with more than one core.
+"""
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+from benchmarks.bench_link_batch import make_urls  # noqa: E402
+from helpers import extract_features  # noqa: E402
+from train_link_classifier import iter_chunks, extract_all  # noqa: E402
+
+
+def write_csv(path, n):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["url", "is_spam"])
+        for url in make_urls(n, seed=11):
+            writer.writerow([url, not (url.startswith("https://") and "bit.ly" not in url)])
+
+
+def notebook_features(path):
+    with open(path, newline="") as f:
+        rows = list(csv.DictReader(f))
+    X = np.vstack([extract_features(row["url"]) for row in rows]).astype(np.float32)
+    y = np.array([int(row["is_spam"].lower() != "true") for row in rows])
+    return X, y
+
+
+def fit(X, y, n_estimators, n_jobs):
+    from sklearn.ensemble import RandomForestClassifier
+    start = time.perf_counter()
+    model = RandomForestClassifier(n_estimators=n_estimators, random_state=42, n_jobs=n_jobs).fit(X, y)
+    return model, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    parser.add_argument("--n-estimators", type=int, default=100)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix="bench-training-"), "urls.csv")
+    write_csv(path, args.rows)
+    print(f"{args.rows} rows, {args.workers} workers, {os.cpu_count()} CPUs")
+
+    start = time.perf_counter()
+    X_nb, y_nb = notebook_features(path)
+    nb_features = time.perf_counter() - start
+    nb_model, nb_fit = fit(X_nb, y_nb, args.n_estimators, n_jobs=None)
+
+    start = time.perf_counter()
+    X, y = extract_all(iter_chunks(path, "url", "is_spam", "spam", args.chunk_size), args.workers)
+    features = time.perf_counter() - start
+    model, fit_seconds = fit(X, y, args.n_estimators, n_jobs=-1)
+
+    print(f"{'':<10} {'features':>10} {'fit':>10} {'total':>10}")
+    print(f"{'notebook':<10} {nb_features:9.1f}s {nb_fit:9.1f}s {nb_features + nb_fit:9.1f}s")
+    print(f"{'module':<10} {features:9.1f}s {fit_seconds:9.1f}s {features + fit_seconds:9.1f}s")
+    sample = X[:10000]
+    same = np.array_equal(X, X_nb) and np.array_equal(nb_model.predict_proba(sample), model.predict_proba(sample))
+    print(f"speedup {(nb_features + nb_fit) / (features + fit_seconds):.1f}x, identical features and model: {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Translation throughput: one translator per request vs TranslationService (cache + batch).
+
+    python benchmarks/bench_translation.py --texts 2000 --phrases 300 --batch-size 20 --workers 8
+
+Texts are drawn from a pool of --phrases phrases with a skewed (Zipf-like)
+distribution, like UI strings and common replies. The upstream is simulated
+by FakeTranslator with --latency seconds per call, so no network is needed.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from utils.translation import TranslationService  # noqa: E402
+
+
+class FakeTranslator:
+    """Stands in for GoogleTranslator: fixed latency per translate() call."""
+    latency = 0.05
+    calls = 0
+
+    def __init__(self, source="auto", target="en"):
+        self.target = target
+
+    def translate(self, text):
+        FakeTranslator.calls += 1
+        time.sleep(self.latency)
+        return f"[{self.target}] {text}"
+
+
+def workload(n, phrases, seed=0):
+    rng = np.random.default_rng(seed)
+    ranks = np.minimum(rng.zipf(1.3, n), phrases) - 1
+    return [f"Common phrase number {r}" for r in ranks]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--phrases", type=int, default=300)
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated seconds per upstream call")
+    args = parser.parse_args()
+    FakeTranslator.latency = args.latency
+    texts = workload(args.texts, args.phrases)
+
+    FakeTranslator.calls = 0
+    start = time.perf_counter()
+    for text in texts:
+        FakeTranslator(source="auto", target="ar").translate(text)
+    legacy = time.perf_counter() - start
+    print(f"{'per-request translator':<24} {legacy:7.2f}s  {FakeTranslator.calls:>6} upstream calls")
+
+    service = TranslationService(max_workers=args.workers, translator_factory=FakeTranslator)
+    FakeTranslator.calls = 0
+    start = time.perf_counter()
+    for text in texts:
+        service.translate(text, "ar")
+    single = time.perf_counter() - start
+    print(f"{'service, one by one':<24} {single:7.2f}s  {FakeTranslator.calls:>6} upstream calls  "
+          f"hit rate {service.stats()['cache']['hit_rate']:.0%}")
+
+    service = TranslationService(max_workers=args.workers, translator_factory=FakeTranslator)
+    FakeTranslator.calls = 0
+    start = time.perf_counter()
+    for i in range(0, len(texts), args.batch_size):
+        service.translate_batch(texts[i:i + args.batch_size], "ar")
+    batched = time.perf_counter() - start
+    stats = service.stats()
+    print(f"{'service, batches of ' + str(args.batch_size):<24} {batched:7.2f}s  {FakeTranslator.calls:>6} upstream calls  "
+          f"hit rate {stats['cache']['hit_rate']:.0%}  avg batch {stats['batches']['avg_ms']:.0f} ms")
+    print(f"speedup: {legacy / single:.1f}x one by one, {legacy / batched:.1f}x batched")
+    service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
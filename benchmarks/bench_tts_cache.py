@@ -0,0 +1,64 @@
+"""Time-to-first-byte and total time for TTS cache misses, memory hits and disk hits.
+
+    python benchmarks/bench_tts_cache.py --sentences 50 --latency 0.6
+
+The upstream is simulated by fake_synthesize, which waits --latency seconds
+and then streams --kb kilobytes of audio like ElevenLabs, so no API key or
+network is needed. Disk hits are measured with a fresh AudioCache on the same
+directory (an empty memory tier, like after a restart).
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from utils.audio_cache import AudioCache  # noqa: E402
+
+
+def fake_synthesize(text, latency, size, chunk=4096):
+    time.sleep(latency)
+    payload = (text.encode("utf-8") * (size // max(len(text), 1) + 1))[:size]
+    for start in range(0, size, chunk):
+        yield payload[start:start + chunk]
+
+
+def measure(cache, sentences, latency, size):
+    ttfb, total = [], []
+    for text in sentences:
+        start = time.perf_counter()
+        key = AudioCache.key(text, "voice", "eleven_multilingual_v2", "mp3_44100_128")
+        audio = cache.get(key)
+        if audio is None:
+            audio = cache.tee(key, fake_synthesize(text, latency, size))
+        first = True
+        for _ in audio:
+            if first:
+                ttfb.append(time.perf_counter() - start)
+                first = False
+        total.append(time.perf_counter() - start)
+    return sum(ttfb) / len(ttfb), sum(total) / len(total)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sentences", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.6, help="simulated seconds to first audio byte")
+    parser.add_argument("--kb", type=int, default=60, help="audio kilobytes per sentence")
+    args = parser.parse_args()
+    sentences = [f"Canned reply number {i}, see you soon!" for i in range(args.sentences)]
+    size = args.kb * 1024
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = AudioCache(tmp)
+        rows = [("miss (ElevenLabs)", measure(cache, sentences, args.latency, size)),
+                ("memory hit", measure(cache, sentences, args.latency, size))]
+        rows.append(("disk hit (mmap)", measure(AudioCache(tmp), sentences, args.latency, size)))
+        print(f"{'':<20} {'ttfb ms':>9} {'total ms':>9}")
+        for label, (ttfb, total) in rows:
+            print(f"{label:<20} {ttfb * 1000:>9.2f} {total * 1000:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
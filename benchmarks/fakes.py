@@ -0,0 +1,221 @@
+"""Local stand-ins for the upstream services, for benchmarks that must run offline.
+
+Each fake sleeps for a configurable latency (with +/- ``jitter`` spread) and
+fails a configurable fraction of calls the same way the real client does:
+
+    FakeGemini        GeminiAPI.get_report / stream_report
+    FakeElevenLabs    the ElevenLabs ``client`` (text_to_speech.convert_as_stream)
+    FakeRecognizer    sr.Recognizer.recognize_google
+    FakeTranslator    deep_translator.GoogleTranslator (see fake_translator_factory)
+
+AsyncFakeGemini and AsyncFakeElevenLabs are the same fakes for asgi_app.py.
+"""
+import random
+import asyncio
+import threading
+import time
+import itertools
+
+import speech_recognition as sr
+from deep_translator.exceptions import RequestError as TranslatorRequestError
+
+from model import GeminiStreamError
+from utils.governor import slot, aslot
+from utils.link_cascade import LLM_PROMPT
+
+
+class FakeUpstream:
+    """Shared latency/failure model; thread-safe and reproducible for a given seed."""
+
+    def __init__(self, latency=0.1, failure_rate=0.0, jitter=0.2, seed=0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.jitter = jitter
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+
+    def _draw(self):
+        """Returns (seconds to wait, whether this call fails)."""
+        with self._lock:
+            self.calls += 1
+            spread = self._rng.uniform(1 - self.jitter, 1 + self.jitter)
+            failed = self._rng.random() < self.failure_rate
+            if failed:
+                self.failures += 1
+        return max(self.latency * spread, 0.0), failed
+
+    def stats(self):
+        with self._lock:
+            return {"calls": self.calls, "failures": self.failures}
+
+
+class FakeGemini(FakeUpstream):
+    """Answers chat prompts with a reply of ``reply_words`` words and link prompts with safe/unsafe.
+
+    ``latency`` is the time to the first token; streamed replies then arrive in
+    ``stream_chunks`` chunks spread over ``stream_seconds``. Like the real
+    client, calls hold a slot of ``limiter`` (if given) while they run.
+    """
+
+    def __init__(self, latency=0.8, failure_rate=0.0, reply_words=60, stream_chunks=10, stream_seconds=1.0, limiter=None, **kwargs):
+        super().__init__(latency, failure_rate, **kwargs)
+        self.limiter = limiter
+        self.reply_words = reply_words
+        self.stream_chunks = stream_chunks
+        self.stream_seconds = stream_seconds
+        self._replies = itertools.count()
+
+    def get_report(self, input_prompt, model_name=None):
+        with slot(self.limiter):
+            return self._get_report(input_prompt)
+
+    def stream_report(self, input_prompt, model_name=None):
+        with slot(self.limiter):
+            yield from self._stream_report(input_prompt)
+
+    def _get_report(self, input_prompt):
+        delay, failed = self._draw()
+        time.sleep(delay)
+        if failed:
+            return "Error: All API keys failed"
+        if input_prompt.startswith(LLM_PROMPT[:24]):
+            return "safe" if len(input_prompt) % 2 else "unsafe"
+        time.sleep(self.stream_seconds)  # a full reply waits for the whole generation
+        return self._reply()
+
+    def _stream_report(self, input_prompt):
+        delay, failed = self._draw()
+        time.sleep(delay)
+        if failed:
+            raise GeminiStreamError("Gemini stream request failed with status 503")
+        words = self._reply().split(" ")
+        size = max(len(words) // self.stream_chunks, 1)
+        for start in range(0, len(words), size):
+            yield " ".join(words[start:start + size]) + " "
+            time.sleep(self.stream_seconds / self.stream_chunks)
+
+    def _reply(self):
+        n = next(self._replies)  # every reply is different, so the TTS cache doesn't hide upstream cost
+        sentence = f"Reply {n} sounds great, tell me more about your day and the match."
+        return " ".join([sentence] * max(self.reply_words // 13, 1))
+
+
+class AsyncFakeGemini(FakeGemini):
+    """FakeGemini with the AsyncGeminiAPI interface; waits with asyncio.sleep instead of blocking a thread."""
+
+    async def get_report(self, input_prompt, model_name=None):
+        async with aslot(self.limiter):
+            return await self._get_report(input_prompt)
+
+    async def stream_report(self, input_prompt, model_name=None):
+        async with aslot(self.limiter):
+            async for chunk in self._stream_report(input_prompt):
+                yield chunk
+
+    async def _get_report(self, input_prompt):
+        delay, failed = self._draw()
+        await asyncio.sleep(delay)
+        if failed:
+            return "Error: All API keys failed"
+        if input_prompt.startswith(LLM_PROMPT[:24]):
+            return "safe" if len(input_prompt) % 2 else "unsafe"
+        await asyncio.sleep(self.stream_seconds)
+        return self._reply()
+
+    async def _stream_report(self, input_prompt):
+        delay, failed = self._draw()
+        await asyncio.sleep(delay)
+        if failed:
+            raise GeminiStreamError("Gemini stream request failed with status 503")
+        words = self._reply().split(" ")
+        size = max(len(words) // self.stream_chunks, 1)
+        for start in range(0, len(words), size):
+            yield " ".join(words[start:start + size]) + " "
+            await asyncio.sleep(self.stream_seconds / self.stream_chunks)
+
+
+class _FakeTextToSpeech:
+    def __init__(self, upstream, chunks, chunk_bytes, chunk_interval):
+        self.upstream = upstream
+        self.chunks = chunks
+        self.chunk_bytes = chunk_bytes
+        self.chunk_interval = chunk_interval
+
+    def convert_as_stream(self, voice_id, text, **kwargs):
+        delay, failed = self.upstream._draw()
+        time.sleep(delay)
+        if failed:
+            raise RuntimeError("ElevenLabs API error: status_code: 500")
+        payload = (b"ID3" + text.encode("utf-8")) * (self.chunk_bytes // (len(text) + 3) + 1)
+        for _ in range(self.chunks):
+            yield payload[:self.chunk_bytes]
+            time.sleep(self.chunk_interval)
+
+
+class FakeElevenLabs(FakeUpstream):
+    """Replaces the ElevenLabs client: ``latency`` to first audio byte, then ``chunks`` chunks of audio."""
+
+    def __init__(self, latency=0.4, failure_rate=0.0, chunks=8, chunk_bytes=4096, chunk_interval=0.02, **kwargs):
+        super().__init__(latency, failure_rate, **kwargs)
+        self.text_to_speech = _FakeTextToSpeech(self, chunks, chunk_bytes, chunk_interval)
+
+
+class _AsyncFakeTextToSpeech(_FakeTextToSpeech):
+    async def convert_as_stream(self, voice_id, text, **kwargs):
+        delay, failed = self.upstream._draw()
+        await asyncio.sleep(delay)
+        if failed:
+            raise RuntimeError("ElevenLabs API error: status_code: 500")
+        payload = (b"ID3" + text.encode("utf-8")) * (self.chunk_bytes // (len(text) + 3) + 1)
+        for _ in range(self.chunks):
+            yield payload[:self.chunk_bytes]
+            await asyncio.sleep(self.chunk_interval)
+
+
+class AsyncFakeElevenLabs(FakeUpstream):
+    """FakeElevenLabs with the AsyncElevenLabs interface."""
+
+    def __init__(self, latency=0.4, failure_rate=0.0, chunks=8, chunk_bytes=4096, chunk_interval=0.02, **kwargs):
+        super().__init__(latency, failure_rate, **kwargs)
+        self.text_to_speech = _AsyncFakeTextToSpeech(self, chunks, chunk_bytes, chunk_interval)
+
+
+class FakeRecognizer(FakeUpstream):
+    """Replaces ``recognize_google``; latency grows with the audio length like the real service."""
+
+    def __init__(self, latency=0.3, failure_rate=0.0, seconds_per_audio_second=0.05, text="how are you today", **kwargs):
+        super().__init__(latency, failure_rate, **kwargs)
+        self.seconds_per_audio_second = seconds_per_audio_second
+        self.text = text
+
+    def recognize_google(self, audio_data, language="en-US", **kwargs):
+        delay, failed = self._draw()
+        duration = len(audio_data.frame_data) / (audio_data.sample_rate * audio_data.sample_width)
+        time.sleep(delay + self.seconds_per_audio_second * duration)
+        if failed:
+            raise sr.RequestError("recognition connection failed: [Errno 104] Connection reset by peer")
+        return self.text
+
+
+class FakeTranslator:
+    """GoogleTranslator-compatible: ``FakeTranslator(source=..., target=...).translate(text)``."""
+
+    def __init__(self, upstream, source="auto", target="en"):
+        self.upstream = upstream
+        self.source = source
+        self.target = target
+
+    def translate(self, text, **kwargs):
+        delay, failed = self.upstream._draw()
+        time.sleep(delay)
+        if failed:
+            raise TranslatorRequestError()
+        return f"[{self.target}] {text.strip()}"
+
+
+def fake_translator_factory(latency=0.15, failure_rate=0.0, **kwargs):
+    """Returns ``(factory, upstream)``; pass the factory as TranslationService's ``translator_factory``."""
+    upstream = FakeUpstream(latency, failure_rate, **kwargs)
+    return lambda source="auto", target="en": FakeTranslator(upstream, source, target), upstream
@@ -0,0 +1,295 @@
+"""Offline load test of the API with local fakes standing in for every upstream service.
+
+    python benchmarks/run_suite.py --concurrency 1 8 32 --requests 200
+    python benchmarks/run_suite.py --scenarios chat_text link_classifier --gemini-latency 1.5 --gemini-failure-rate 0.05
+    python benchmarks/run_suite.py --compare benchmarks/results/suite-20250101-120000.json
+
+The app is served in-process by werkzeug's threaded server, with GeminiAPI,
+the ElevenLabs client, recognize_google and GoogleTranslator replaced by the
+fakes in benchmarks/fakes.py (latency and failure rate configurable per
+upstream). Each scenario is driven over HTTP at every --concurrency level and
+reports p50/p95/p99 latency, throughput and peak RSS. Results are written as
+JSON to --output (default benchmarks/results/suite-<timestamp>.json);
+--compare prints the change in p95 and throughput against an earlier run.
+
+Peak RSS is sampled for the whole process, which includes the load generator.
+Replies, translations and URLs are unique per request so caches don't hide
+the upstream cost; use --repeat to send the same text every time instead.
+"""
+import argparse
+import io
+import itertools
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+from benchmarks.bench_link_batch import make_urls  # noqa: E402
+from benchmarks.fakes import FakeGemini, FakeElevenLabs, FakeRecognizer, fake_translator_factory  # noqa: E402
+
+SCENARIOS = ["chat_text", "chat_stream", "chat_audio", "chat_voice", "translator_text", "translator_audio", "link_classifier"]
+
+
+def train_stand_in_model(path, n=3000):
+    """Fits a small RF on synthetic URLs so the link classifier has a model to serve."""
+    import joblib
+    from sklearn.ensemble import RandomForestClassifier
+    from helpers import extract_features_batch
+
+    urls = make_urls(n, seed=7)
+    labels = np.array([int(u.startswith("https://") and "bit.ly" not in u) for u in urls])
+    model = RandomForestClassifier(n_estimators=100, random_state=0).fit(extract_features_batch(urls), labels)
+    joblib.dump(model, path)
+
+
+def voice_note(seconds=4.0, rate=16000):
+    t = np.arange(int(seconds * rate)) / rate
+    signal = 0.3 * np.sin(2 * np.pi * 220 * t) * (np.sin(2 * np.pi * 0.5 * t) > -0.5)
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes((signal * 32767).astype(np.int16).tobytes())
+    return buf.getvalue()
+
+
+class RssSampler:
+    """Tracks the peak resident set size of this process while running."""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def __enter__(self):
+        self.peak = _rss_bytes()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, _rss_bytes())
+
+
+def _rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        import resource  # no /proc: fall back to the lifetime peak
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class Driver:
+    """Sends one request of a scenario; every worker thread has its own HTTP and chat session."""
+
+    def __init__(self, base_url, repeat=False):
+        self.base_url = base_url
+        self.repeat = repeat
+        self.voice = voice_note()
+        self._local = threading.local()
+        self._ids = itertools.count()  # unique texts/URLs across the whole run
+
+    def http(self):
+        if not hasattr(self._local, "http"):
+            self._local.http = requests.Session()
+        return self._local.http
+
+    def chat_url(self):
+        if not hasattr(self._local, "chat_url"):
+            response = self.http().post(f"{self.base_url}/api/start_chat", json={
+                "name": "Bench", "age_range": "20-25", "language": "en-US", "interests": ["football", "music"],
+            }, timeout=30)
+            response.raise_for_status()
+            self._local.chat_url = f"{self.base_url}/api/chat/{response.json()['session_id']}"
+        return self._local.chat_url
+
+    def text(self, i):
+        return "How was your day? Did you watch the match?" if self.repeat else f"Message {i}: how was your day? Did you watch the match?"
+
+    def send(self, scenario):
+        http = self.http()
+        i = next(self._ids)
+        if scenario == "chat_text":
+            return http.post(self.chat_url(), json={"message": self.text(i)}, timeout=120)
+        if scenario == "chat_stream":
+            return http.post(self.chat_url(), params={"stream": "true"}, json={"message": self.text(i)}, timeout=120)
+        if scenario == "chat_audio":
+            return http.post(self.chat_url(), params={"format": "audio"}, json={"message": self.text(i)}, timeout=120)
+        if scenario == "chat_voice":
+            return http.post(self.chat_url(), files={"audio": ("note.wav", self.voice, "audio/wav")}, timeout=120)
+        if scenario == "translator_text":
+            return http.post(f"{self.base_url}/api/translator/", json={"text": self.text(i), "target_lang": "ar"}, timeout=120)
+        if scenario == "translator_audio":
+            return http.post(f"{self.base_url}/api/translator/", params={"format": "audio"},
+                             json={"text": self.text(i), "target_lang": "en"}, timeout=120)
+        if scenario == "link_classifier":
+            if self.repeat:
+                url = "https://example.com/login"
+            else:
+                url = make_urls(1, seed=i)[0]
+                url += f"{'&' if '?' in url else '?'}r={i}"
+            return http.post(f"{self.base_url}/api/link_classifier/", params={"mode": "cascade"}, json={"url": url}, timeout=120)
+        raise ValueError(f"Unknown scenario: {scenario}")
+
+    def timed(self, scenario):
+        start = time.perf_counter()
+        try:
+            response = self.send(scenario)
+            ok = response.status_code == 200
+            if scenario.endswith("_audio"):
+                ok = ok and response.headers.get("Content-Type", "").startswith("audio/")
+            elif scenario == "chat_stream":
+                ok = ok and "event: done" in response.text
+        except requests.RequestException:
+            ok = False
+        return time.perf_counter() - start, ok
+
+
+def run_scenario(driver, scenario, concurrency, n_requests, warmup):
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(lambda _: driver.timed(scenario), range(warmup)))
+        with RssSampler() as rss:
+            start = time.perf_counter()
+            outcomes = list(pool.map(lambda _: driver.timed(scenario), range(n_requests)))
+            wall = time.perf_counter() - start
+    latencies = np.array([t for t, ok in outcomes if ok]) * 1000
+    errors = sum(1 for _, ok in outcomes if not ok)
+    summary = lambda q: round(float(np.percentile(latencies, q)), 1) if len(latencies) else None  # noqa: E731
+    return {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "requests": n_requests,
+        "ok": n_requests - errors,
+        "errors": errors,
+        "error_rate": round(errors / n_requests, 4),
+        "wall_seconds": round(wall, 3),
+        "throughput_rps": round((n_requests - errors) / wall, 2),
+        "latency_ms": {
+            "p50": summary(50), "p95": summary(95), "p99": summary(99),
+            "mean": round(float(latencies.mean()), 1) if len(latencies) else None,
+            "max": round(float(latencies.max()), 1) if len(latencies) else None,
+        },
+        "peak_rss_mb": round(rss.peak / 2**20, 1),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {(r["scenario"], r["concurrency"]): r for r in json.load(f)["results"]}
+    print(f"\nvs {baseline_path}")
+    for r in results:
+        old = baseline.get((r["scenario"], r["concurrency"]))
+        if not old or not old["latency_ms"]["p95"] or not r["latency_ms"]["p95"] or not old["throughput_rps"]:
+            continue
+        p95 = r["latency_ms"]["p95"] / old["latency_ms"]["p95"] - 1
+        rps = r["throughput_rps"] / old["throughput_rps"] - 1
+        print(f"{r['scenario']:<18} c={r['concurrency']:<4} p95 {p95:+7.1%}   throughput {rps:+7.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", default=SCENARIOS, choices=SCENARIOS)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=100, help="requests per scenario and concurrency level")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--repeat", action="store_true", help="send the same text/URL every time (cache-friendly)")
+    parser.add_argument("--gemini-latency", type=float, default=0.8)
+    parser.add_argument("--gemini-failure-rate", type=float, default=0.0)
+    parser.add_argument("--gemini-generation-seconds", type=float, default=1.0, help="time from first to last token")
+    parser.add_argument("--tts-latency", type=float, default=0.4)
+    parser.add_argument("--tts-failure-rate", type=float, default=0.0)
+    parser.add_argument("--stt-latency", type=float, default=0.3)
+    parser.add_argument("--stt-failure-rate", type=float, default=0.0)
+    parser.add_argument("--translate-latency", type=float, default=0.15)
+    parser.add_argument("--translate-failure-rate", type=float, default=0.0)
+    parser.add_argument("--output", help="results file (default benchmarks/results/suite-<timestamp>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp(prefix="chatapp-bench-")
+    model_path = os.path.join(work, "rf_model.pkl")
+    train_stand_in_model(model_path)
+    os.environ["LINK_MODEL_PATH"] = model_path
+    os.environ["TTS_CACHE_DIR"] = os.path.join(work, "tts_cache")
+    os.environ.setdefault("SESSION_STORE", "memory")
+    logging.disable(logging.CRITICAL)  # keep per-request logging out of the measurements
+
+    import app as chat_app
+    from werkzeug.serving import make_server
+    from utils.translation import TranslationService
+    from utils.stt_pipeline import SpeechTranscriber, GoogleRecognizerBackend
+
+    upstreams = {
+        "gemini": FakeGemini(args.gemini_latency, args.gemini_failure_rate, stream_seconds=args.gemini_generation_seconds),
+        "elevenlabs": FakeElevenLabs(args.tts_latency, args.tts_failure_rate),
+        "recognizer": FakeRecognizer(args.stt_latency, args.stt_failure_rate),
+    }
+    translator_factory, upstreams["translator"] = fake_translator_factory(args.translate_latency, args.translate_failure_rate)
+    chat_app.gemini = upstreams["gemini"]
+    chat_app.client = upstreams["elevenlabs"]
+    chat_app.transcriber = SpeechTranscriber(GoogleRecognizerBackend(upstreams["recognizer"]))
+    chat_app.translation_service = TranslationService(translator_factory=translator_factory)
+
+    server = make_server("127.0.0.1", 0, chat_app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="bench-server", daemon=True).start()
+    driver = Driver(f"http://127.0.0.1:{server.server_port}", repeat=args.repeat)
+
+    results = []
+    print(f"{'scenario':<18} {'conc':>5} {'ok':>6} {'err':>5} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'rss MB':>7}")
+    for scenario in args.scenarios:
+        for concurrency in args.concurrency:
+            r = run_scenario(driver, scenario, concurrency, args.requests, args.warmup)
+            results.append(r)
+            lat = r["latency_ms"]
+            print(f"{scenario:<18} {concurrency:>5} {r['ok']:>6} {r['errors']:>5} {r['throughput_rps']:>8.1f} "
+                  f"{lat['p50'] or 0:>8.0f} {lat['p95'] or 0:>8.0f} {lat['p99'] or 0:>8.0f} {r['peak_rss_mb']:>7.0f}")
+    server.shutdown()
+
+    report = {
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": vars(args),
+        "upstream_calls": {name: upstream.stats() for name, upstream in upstreams.items()},
+        "results": results,
+    }
+    output = args.output or os.path.join(ROOT, "benchmarks", "results", f"suite-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {os.path.relpath(output)}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,43 @@
 import numpy as np
 from urllib.parse import urlparse
-import joblib
+from itertools import chain
 import re
 
 
-def extract_features(url):
-    shorteners = ['bit.ly', 'goo.gl', 'tinyurl', 'ow.ly', 't.co', 'is.gd', 'buff.ly']
-    
-    return np.array([[
+SHORTENERS = ('bit.ly', 'goo.gl', 'tinyurl', 'ow.ly', 't.co', 'is.gd', 'buff.ly')
+IP_PATTERN = re.compile(r'^(http[s]?://)?(\d{1,3}\.){3}\d{1,3}')
+FEATURE_NAMES = (
+    'url_length', 'dot_count', 'has_ip', 'hyphen_count', 'at_count',
+    'suspicious_char_count', 'path_length', 'query_length', 'is_https', 'is_shortened',
+)
+N_FEATURES = len(FEATURE_NAMES)
+# Bump whenever _feature_row changes; models record the version they were trained with
+# and the server refuses to load a model built for a different one.
+FEATURE_SCHEMA_VERSION = 1
+
+
+def _feature_row(url):
+    parsed = urlparse(url)  # parse once, used for both path and query
+    return (
         len(url),                            # url_length
         url.count('.'),                      # dot_count
-        1 if re.match(r'^(http[s]?://)?(\d{1,3}\.){3}\d{1,3}', url) else 0,  # has_ip
+        1 if IP_PATTERN.match(url) else 0,   # has_ip
         url.count('-'),                      # hyphen_count
         url.count('@'),                      # at_count
         url.count('=') + url.count('&') + url.count('%'),  # suspicious_char_count
-        len(urlparse(url).path),             # path_length
-        len(urlparse(url).query),            # query_length
+        len(parsed.path),                    # path_length
+        len(parsed.query),                   # query_length
         1 if url.startswith('https') else 0, # is_https
-        1 if any(s in url for s in shorteners) else 0       # is_shortened
-    ]])
+        1 if any(s in url for s in SHORTENERS) else 0       # is_shortened
+    )
+
+
+def extract_features(url):
+    return np.array([_feature_row(url)])
+
 
+def extract_features_batch(urls):
+    """Builds the (len(urls), 10) feature matrix for a list of URLs in a single pass."""
+    rows = chain.from_iterable(map(_feature_row, urls))
+    return np.fromiter(rows, dtype=np.int64, count=len(urls) * N_FEATURES).reshape(-1, N_FEATURES)
 
@@ -1,59 +1,405 @@
 import requests
-import time
+from requests.adapters import HTTPAdapter
 import json
 import os
+import time
+import logging
 from dotenv import load_dotenv
 
+from utils.key_scheduler import KeyScheduler
+from utils.metrics import REGISTRY
+from utils.governor import slot, aslot
+
+GEMINI_BASE_URL = "https://generativelanguage.googleapis.com/v1"
+
+GEMINI_REQUESTS = REGISTRY.counter(
+    "gemini_requests_total", "Gemini API calls by key, call kind and HTTP status ('error' for transport errors).",
+    ["key", "kind", "status"],
+)
+GEMINI_SECONDS = REGISTRY.histogram(
+    "gemini_request_seconds", "Gemini API call latency (to the response headers for streamed calls).", ["kind"],
+)
+
+
+class GeminiStreamError(Exception):
+    """Raised when a streamed Gemini response cannot be started or is cut off."""
+
+
 class GeminiAPI:
-    def __init__(self):
-        load_dotenv()
-        self.api_keys = [
-            os.environ.get(f"GEMINI_API_KEY_{i}") for i in range(1, 7)
-        ]
-        self.api_keys = [key for key in self.api_keys if key]
-        
-        if not self.api_keys:
-            raise EnvironmentError("No Gemini API keys found in environment variables.")
-    
-    def _call_api_with_retry(self, url, headers, data, max_retries=3):
-        """Retries API call in case of rate limits (429 errors)."""
-        for attempt in range(max_retries):
-            response = requests.post(url, headers=headers, json=data)
-            
-            if response.status_code == 429:  # Rate limit exceeded
-                wait_time = 2 ** attempt  # Exponential backoff
-                print(f"Rate limit hit, retrying in {wait_time} seconds...")
-                time.sleep(wait_time)
-            else:
-                return response.json()
-        
-        return None  # If all retries fail
-    
+    def __init__(self, connect_timeout=3.05, read_timeout=60, pool_size=32, debug=None, limiter=None):
+        self.api_keys = _load_api_keys()
+        self.timeout = (connect_timeout, read_timeout)
+        # Logging every full response is expensive; only done when GEMINI_DEBUG is set.
+        self.debug = _debug_enabled(debug)
+        self.scheduler = KeyScheduler(self.api_keys)
+
+        # One pooled session reuses TLS connections across requests and threads.
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Content-Type": "application/json"})
+        # Optional utils.governor.Limiter: caps concurrent Gemini calls and sheds the excess.
+        self.limiter = limiter
+
+    def _post(self, url, api_key, data):
+        """Makes a single API call; never sleeps. Returns (status_code, response_json, retry_after)."""
+        response = self.session.post(url, headers={"x-goog-api-key": api_key}, json=data, timeout=self.timeout)
+        if response.status_code == 429:  # Rate limit exceeded
+            return 429, None, _retry_after_seconds(response)
+        if response.status_code >= 500:
+            return response.status_code, None, None
+        return response.status_code, _json_body(response), None
+
     def get_report(self, input_prompt, model_name="models/gemini-1.5-pro"):
-        """Generates a Gemini report using the specified model with API key rotation."""
-        headers = {"Content-Type": "application/json"}
+        """Generates a Gemini report using the specified model, trying the healthiest keys first."""
+        with slot(self.limiter):
+            return self._get_report(input_prompt, model_name)
+
+    def _get_report(self, input_prompt, model_name):
+        url = f"{GEMINI_BASE_URL}/{model_name}:generateContent"
+        data = {"contents": [{"parts": [{"text": input_prompt}]}]}
+        tried = set()
+
+        while True:
+            api_key = self.scheduler.acquire(exclude=tried)
+            if api_key is None:
+                break
+            tried.add(api_key)
+            key_name = self.scheduler.name_of(api_key)
+
+            start = time.perf_counter()
+            try:
+                status, response_json, retry_after = self._post(url, api_key, data)
+            except (requests.exceptions.RequestException, json.JSONDecodeError) as e:
+                _record(key_name, "generate", "error", start)
+                logging.warning(f"Request Error with {key_name}: {e}")
+                self.scheduler.report_error(api_key)
+                continue  # Try next API key
+            except Exception:
+                _record(key_name, "generate", "error", start)
+                self.scheduler.report_error(api_key)
+                raise
+            except BaseException:
+                self.scheduler.release(api_key)
+                raise
+            _record(key_name, "generate", status, start)
+
+            if status == 429:
+                logging.warning(f"Rate limit hit on {key_name}, cooling it down and trying next key...")
+                self.scheduler.report_rate_limited(api_key, retry_after)
+                continue
+            if response_json is None:
+                logging.warning(f"Server error {status} with {key_name}. Trying next key...")
+                self.scheduler.report_error(api_key)
+                continue
+            if _key_rejected(status, response_json):
+                logging.error(f"Gemini rejected {key_name} ({status}), benching it and trying next key...")
+                self.scheduler.report_rejected(api_key)
+                continue
+            if status >= 400:
+                self.scheduler.release(api_key)  # the request is at fault, not the key
+                logging.warning(f"Gemini refused the request ({status}): {_error_message(response_json)}")
+                return f"Error: Gemini refused the request ({status})"
+
+            self.scheduler.report_success(api_key)
+            if self.debug:
+                logging.info(f"Gemini response JSON ({key_name}): {json.dumps(response_json, ensure_ascii=False)}")
+
+            text = response_json.get("candidates", [{}])[0].get("content", {}).get("parts", [{}])[0].get("text")
+
+            return text if text else "Error: Text not found in response"
+
+        if not tried:
+            return f"Error: All API keys are cooling down (next ready in {self.scheduler.next_ready_in():.1f}s)"
+        return "Error: All API keys failed"
+
+    def stream_report(self, input_prompt, model_name="models/gemini-1.5-pro"):
+        """Yields the response text in chunks as Gemini generates it (server-sent events).
+
+        Keys are failed over only until the first chunk arrives; after that an
+        interrupted stream raises ``GeminiStreamError``.
+        """
+        with slot(self.limiter):
+            yield from self._stream_report(input_prompt, model_name)
+
+    def _stream_report(self, input_prompt, model_name):
+        url = f"{GEMINI_BASE_URL}/{model_name}:streamGenerateContent"
         data = {"contents": [{"parts": [{"text": input_prompt}]}]}
-        
-        for api_key in self.api_keys:  # Loop through API keys
-            url = f"https://generativelanguage.googleapis.com/v1/{model_name}:generateContent?key={api_key}"
-            
+        tried = set()
+
+        while True:
+            api_key = self.scheduler.acquire(exclude=tried)
+            if api_key is None:
+                break
+            tried.add(api_key)
+            key_name = self.scheduler.name_of(api_key)
+
+            start = time.perf_counter()
             try:
-                response_json = self._call_api_with_retry(url, headers, data)
-                if not response_json:
-                    print(f"API key {api_key} failed. Trying next key...")
-                    continue  # Try next API key
-                
-                print(f"Response JSON: {json.dumps(response_json, indent=2)}")
-                
-                text = response_json.get("candidates", [{}])[0].get("content", {}).get("parts", [{}])[0].get("text")
-                
-                return text if text else "Error: Text not found in response"
-            
+                response = self.session.post(url, params={"alt": "sse"}, headers={"x-goog-api-key": api_key},
+                                             json=data, timeout=self.timeout, stream=True)
             except requests.exceptions.RequestException as e:
-                print(f"Request Error with key {api_key}: {e}")
-            except json.JSONDecodeError as e:
-                print(f"JSON Decode Error with key {api_key}: {e}")
-            
-            time.sleep(1)  # Delay before switching to the next key
-        
+                _record(key_name, "stream", "error", start)
+                logging.warning(f"Stream request error with {key_name}: {e}")
+                self.scheduler.report_error(api_key)
+                continue
+            except Exception:
+                _record(key_name, "stream", "error", start)
+                self.scheduler.report_error(api_key)
+                raise
+            except BaseException:
+                self.scheduler.release(api_key)
+                raise
+            _record(key_name, "stream", response.status_code, start)
+
+            if response.status_code == 429:
+                logging.warning(f"Rate limit hit on {key_name}, cooling it down and trying next key...")
+                self.scheduler.report_rate_limited(api_key, _retry_after_seconds(response))
+                response.close()
+                continue
+            if response.status_code in (401, 403) or (response.status_code == 400 and "API_KEY_INVALID" in response.text):
+                logging.error(f"Gemini rejected {key_name} ({response.status_code}), benching it and trying next key...")
+                self.scheduler.report_rejected(api_key)
+                response.close()
+                continue
+            if response.status_code != 200:
+                logging.warning(f"Stream error {response.status_code} with {key_name}. Trying next key...")
+                self.scheduler.report_error(api_key)
+                response.close()
+                continue
+
+            self.scheduler.report_success(api_key)
+            try:
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith("data:"):
+                        continue
+                    chunk = json.loads(line[len("data:"):])
+                    if self.debug:
+                        logging.info(f"Gemini stream chunk ({key_name}): {json.dumps(chunk, ensure_ascii=False)}")
+                    for part in chunk.get("candidates", [{}])[0].get("content", {}).get("parts", []):
+                        if part.get("text"):
+                            yield part["text"]
+            except (requests.exceptions.RequestException, json.JSONDecodeError) as e:
+                raise GeminiStreamError(f"Stream interrupted on {key_name}: {e}") from e
+            finally:
+                response.close()
+            return
+
+        raise GeminiStreamError("All API keys failed" if tried else "All API keys are cooling down")
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncGeminiAPI:
+    """asyncio counterpart of ``GeminiAPI`` on a pooled ``httpx.AsyncClient``, for the ASGI app.
+
+    Same key scheduling, failover, error strings and metrics; waiting on Gemini
+    holds no thread, so many requests can be in flight per process. Create it
+    inside the running event loop and ``await aclose()`` on shutdown.
+    """
+
+    def __init__(self, connect_timeout=3.05, read_timeout=60, pool_size=256, debug=None, limiter=None):
+        import httpx  # only the ASGI app needs it, so the sync app doesn't pay for the import
+        self._httpx = httpx
+        self.api_keys = _load_api_keys()
+        self.debug = _debug_enabled(debug)
+        self.scheduler = KeyScheduler(self.api_keys)
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            headers={"Content-Type": "application/json"},
+        )
+        self.limiter = limiter
+
+    async def get_report(self, input_prompt, model_name="models/gemini-1.5-pro"):
+        """Generates a Gemini report using the specified model, trying the healthiest keys first."""
+        async with aslot(self.limiter):
+            return await self._get_report(input_prompt, model_name)
+
+    async def _get_report(self, input_prompt, model_name):
+        url = f"{GEMINI_BASE_URL}/{model_name}:generateContent"
+        data = {"contents": [{"parts": [{"text": input_prompt}]}]}
+        tried = set()
+
+        while True:
+            api_key = self.scheduler.acquire(exclude=tried)
+            if api_key is None:
+                break
+            tried.add(api_key)
+            key_name = self.scheduler.name_of(api_key)
+
+            start = time.perf_counter()
+            try:
+                response = await self.client.post(url, headers={"x-goog-api-key": api_key}, json=data)
+                response_json = _json_body(response) if response.status_code < 500 and response.status_code != 429 else None
+            except (self._httpx.HTTPError, json.JSONDecodeError) as e:
+                _record(key_name, "generate", "error", start)
+                logging.warning(f"Request Error with {key_name}: {e}")
+                self.scheduler.report_error(api_key)
+                continue
+            except Exception:
+                _record(key_name, "generate", "error", start)
+                self.scheduler.report_error(api_key)
+                raise
+            except BaseException:  # e.g. the request was cancelled
+                self.scheduler.release(api_key)
+                raise
+            status = response.status_code
+            _record(key_name, "generate", status, start)
+
+            if status == 429:
+                logging.warning(f"Rate limit hit on {key_name}, cooling it down and trying next key...")
+                self.scheduler.report_rate_limited(api_key, _retry_after_seconds(response))
+                continue
+            if response_json is None:
+                logging.warning(f"Server error {status} with {key_name}. Trying next key...")
+                self.scheduler.report_error(api_key)
+                continue
+            if _key_rejected(status, response_json):
+                logging.error(f"Gemini rejected {key_name} ({status}), benching it and trying next key...")
+                self.scheduler.report_rejected(api_key)
+                continue
+            if status >= 400:
+                self.scheduler.release(api_key)  # the request is at fault, not the key
+                logging.warning(f"Gemini refused the request ({status}): {_error_message(response_json)}")
+                return f"Error: Gemini refused the request ({status})"
+
+            self.scheduler.report_success(api_key)
+            if self.debug:
+                logging.info(f"Gemini response JSON ({key_name}): {json.dumps(response_json, ensure_ascii=False)}")
+
+            text = response_json.get("candidates", [{}])[0].get("content", {}).get("parts", [{}])[0].get("text")
+
+            return text if text else "Error: Text not found in response"
+
+        if not tried:
+            return f"Error: All API keys are cooling down (next ready in {self.scheduler.next_ready_in():.1f}s)"
         return "Error: All API keys failed"
+
+    async def stream_report(self, input_prompt, model_name="models/gemini-1.5-pro"):
+        """Async generator over the response text chunks; same failover rules as ``GeminiAPI.stream_report``."""
+        async with aslot(self.limiter):
+            async for chunk in self._stream_report(input_prompt, model_name):
+                yield chunk
+
+    async def _stream_report(self, input_prompt, model_name):
+        url = f"{GEMINI_BASE_URL}/{model_name}:streamGenerateContent"
+        data = {"contents": [{"parts": [{"text": input_prompt}]}]}
+        tried = set()
+
+        while True:
+            api_key = self.scheduler.acquire(exclude=tried)
+            if api_key is None:
+                break
+            tried.add(api_key)
+            key_name = self.scheduler.name_of(api_key)
+
+            start = time.perf_counter()
+            request = self.client.build_request("POST", url, params={"alt": "sse"},
+                                                headers={"x-goog-api-key": api_key}, json=data)
+            try:
+                response = await self.client.send(request, stream=True)
+            except self._httpx.HTTPError as e:
+                _record(key_name, "stream", "error", start)
+                logging.warning(f"Stream request error with {key_name}: {e}")
+                self.scheduler.report_error(api_key)
+                continue
+            except Exception:
+                _record(key_name, "stream", "error", start)
+                self.scheduler.report_error(api_key)
+                raise
+            except BaseException:  # e.g. the request was cancelled
+                self.scheduler.release(api_key)
+                raise
+            _record(key_name, "stream", response.status_code, start)
+
+            if response.status_code == 429:
+                logging.warning(f"Rate limit hit on {key_name}, cooling it down and trying next key...")
+                self.scheduler.report_rate_limited(api_key, _retry_after_seconds(response))
+                await response.aclose()
+                continue
+            if response.status_code in (401, 403) or (response.status_code == 400 and b"API_KEY_INVALID" in await response.aread()):
+                logging.error(f"Gemini rejected {key_name} ({response.status_code}), benching it and trying next key...")
+                self.scheduler.report_rejected(api_key)
+                await response.aclose()
+                continue
+            if response.status_code != 200:
+                logging.warning(f"Stream error {response.status_code} with {key_name}. Trying next key...")
+                self.scheduler.report_error(api_key)
+                await response.aclose()
+                continue
+
+            self.scheduler.report_success(api_key)
+            try:
+                async for line in response.aiter_lines():
+                    if not line or not line.startswith("data:"):
+                        continue
+                    chunk = json.loads(line[len("data:"):])
+                    if self.debug:
+                        logging.info(f"Gemini stream chunk ({key_name}): {json.dumps(chunk, ensure_ascii=False)}")
+                    for part in chunk.get("candidates", [{}])[0].get("content", {}).get("parts", []):
+                        if part.get("text"):
+                            yield part["text"]
+            except (self._httpx.HTTPError, json.JSONDecodeError) as e:
+                raise GeminiStreamError(f"Stream interrupted on {key_name}: {e}") from e
+            finally:
+                await response.aclose()
+            return
+
+        raise GeminiStreamError("All API keys failed" if tried else "All API keys are cooling down")
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+def _load_api_keys():
+    load_dotenv()
+    api_keys = [os.environ.get(f"GEMINI_API_KEY_{i}") for i in range(1, 7)]
+    api_keys = [key for key in api_keys if key]
+    if not api_keys:
+        raise EnvironmentError("No Gemini API keys found in environment variables.")
+    return api_keys
+
+
+def _debug_enabled(debug):
+    return debug if debug is not None else os.getenv("GEMINI_DEBUG", "false").lower() in ['true', '1', 't']
+
+
+def _record(key_name, kind, status, start):
+    GEMINI_SECONDS.observe(time.perf_counter() - start, kind=kind)
+    GEMINI_REQUESTS.inc(key=key_name, kind=kind, status=status)
+
+
+def _key_rejected(status, response_json):
+    """True when Gemini refused the API key itself (invalid, revoked or not authorized), not the request."""
+    if status in (401, 403):
+        return True
+    if status == 400 and isinstance(response_json, dict):
+        details = (response_json.get("error") or {}).get("details") or []
+        return any(isinstance(d, dict) and d.get("reason") == "API_KEY_INVALID" for d in details)
+    return False
+
+
+def _json_body(response):
+    """The response's JSON; an error status with a non-JSON body (e.g. a proxy's HTML 403) gives {}."""
+    try:
+        return response.json()
+    except ValueError:
+        if response.status_code < 400:
+            raise
+        return {}
+
+
+def _error_message(response_json):
+    if isinstance(response_json, dict):
+        return (response_json.get("error") or {}).get("message", "")
+    return ""
+
+
+def _retry_after_seconds(response):
+    value = response.headers.get("Retry-After")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
@@ -0,0 +1,33 @@
+import threading
+
+import pytest
+
+from utils.session_manager import SessionManager
+from utils.session_store import MemorySessionStore, SQLiteSessionStore
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_concurrent_turns_all_reach_history_or_summary(backend, tmp_path):
+    if backend == "memory":
+        store = MemorySessionStore(max_history=2)
+    else:
+        store = SQLiteSessionStore(path=str(tmp_path / "sessions.db"), max_history=2)
+    manager = SessionManager(store=store, summary_max_chars=100000)
+    session_id = manager.create_session({"name": "test"})
+
+    def chat(worker):
+        for i in range(25):
+            manager.update_session_chat_history(session_id, f"q{worker}-{i}", f"a{worker}-{i}")
+
+    threads = [threading.Thread(target=chat, args=(w,)) for w in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    summarized = manager.get_session(session_id).summary.split("\n")
+    kept = [turn["user"] for turn in manager.get_chat_history(session_id)]
+    assert len(summarized) == 98 and len(kept) == 2
+    assert {line.split(" | ")[0].removeprefix("User: ") for line in summarized} | set(kept) == {
+        f"q{w}-{i}" for w in range(4) for i in range(25)
+    }
@@ -0,0 +1,33 @@
+import threading
+
+from utils.translation import TranslationService
+
+
+class FakeTranslator:
+    def __init__(self, source, target):
+        self.target = target
+
+    def translate(self, text):
+        return f"{self.target}:{text}"
+
+
+def test_translators_are_shared_across_request_threads():
+    calls = []
+
+    def factory(source, target):
+        calls.append((source, target))
+        return FakeTranslator(source, target)
+
+    service = TranslationService(translator_factory=factory)
+    results = []
+    # Like Flask's threaded server: every request runs on a thread of its own.
+    for i in range(10):
+        for target in ("fr", "de"):
+            thread = threading.Thread(target=lambda t=target, i=i: results.append(service.translate(f"text {i}", t)))
+            thread.start()
+            thread.join()
+
+    assert len(results) == 20
+    assert sorted(calls) == [("auto", "de"), ("auto", "fr")]
+    assert service.translate("text 3", "fr") == ("fr:text 3", True)
+    service.shutdown()
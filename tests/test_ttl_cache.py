@@ -0,0 +1,42 @@
+import asyncio
+
+from utils.ttl_cache import TTLCache
+
+
+def test_cancelled_leader_does_not_fail_coalesced_waiters():
+    cache = TTLCache()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "value"
+
+    async def scenario():
+        leader = asyncio.ensure_future(cache.aget_or_compute("key", compute))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(cache.aget_or_compute("key", compute))
+        await asyncio.sleep(0)
+        leader.cancel()
+        assert await waiter == ("value", False)
+        assert leader.cancelled()
+        assert await cache.aget_or_compute("key", compute) == ("value", True)
+
+    asyncio.run(scenario())
+    assert len(calls) == 1
+    assert cache.stats()["inflight"] == 0
+
+
+def test_compute_errors_reach_every_waiter_and_are_not_cached():
+    cache = TTLCache()
+
+    async def compute():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream failed")
+
+    async def scenario():
+        results = await asyncio.gather(*(cache.aget_or_compute("key", compute) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(r, ValueError) for r in results)
+
+    asyncio.run(scenario())
+    assert cache.stats()["size"] == 0
@@ -0,0 +1,194 @@
+"""Trains the URL RandomForest served by /api/link_classifier from a labelled CSV.
+
+    python train_link_classifier.py url_spam_classification.csv --out ./weights/rf_model.pkl
+    python train_link_classifier.py corpus.csv --label-column label --label-means safe --export-forest ./weights/rf_model.forest
+
+The CSV is streamed in --chunk-size rows and each chunk's features are computed
+in a worker process with helpers.extract_features_batch, the same code the server
+runs. The forest is fitted on all cores with a fixed --random-state, evaluated on
+a stratified hold-out split and saved next to ``<out>.meta.json``, which records
+the metrics, the training parameters, a hash of the dataset and the feature
+schema version that ModelRegistry checks before serving the model.
+
+Serving treats class 1 as safe and 0 as unsafe. With --label-means spam (the
+default, matching the is_spam column of the original dataset) a true label is
+stored as 0.
+"""
+import os
+import csv
+import sys
+import json
+import time
+import hashlib
+import argparse
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from helpers import extract_features_batch, FEATURE_NAMES, FEATURE_SCHEMA_VERSION
+from utils.model_registry import META_SUFFIX
+
+TRUE_VALUES = {"1", "true", "t", "yes", "y"}
+CLASS_NAMES = {0: "unsafe", 1: "safe"}
+
+
+def iter_chunks(path, url_column, label_column, label_means, chunk_size, max_rows=None):
+    """Yields (urls, labels) lists of up to ``chunk_size`` rows; labels are 1 for safe, 0 for unsafe."""
+    csv.field_size_limit(sys.maxsize)
+    safe_when = label_means == "safe"
+    urls, labels, seen, skipped = [], [], 0, 0
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            url, label = (row.get(url_column) or "").strip(), (row.get(label_column) or "").strip().lower()
+            if not url or not label:
+                skipped += 1
+                continue
+            urls.append(url)
+            labels.append(int((label in TRUE_VALUES) == safe_when))
+            seen += 1
+            if len(urls) == chunk_size:
+                yield urls, labels
+                urls, labels = [], []
+            if max_rows is not None and seen >= max_rows:
+                break
+    if urls:
+        yield urls, labels
+    if skipped:
+        logging.warning(f"Skipped {skipped} rows with an empty '{url_column}' or '{label_column}'")
+
+
+def extract_all(chunks, workers):
+    """Feature matrix (float32, as the forest stores it) and labels for every chunk, in file order.
+
+    At most 2 * ``workers`` chunks are in flight, so memory stays bounded however large the CSV is.
+    """
+    features, labels = [], []
+    if workers <= 1:
+        for urls, chunk_labels in chunks:
+            features.append(extract_features_batch(urls).astype(np.float32))
+            labels.append(np.array(chunk_labels, dtype=np.int8))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for urls, chunk_labels in chunks:
+                pending.append((pool.submit(extract_features_batch, urls), chunk_labels))
+                while len(pending) >= 2 * workers or (pending and pending[0][0].done()):
+                    future, done_labels = pending.popleft()
+                    features.append(future.result().astype(np.float32))
+                    labels.append(np.array(done_labels, dtype=np.int8))
+            for future, done_labels in pending:
+                features.append(future.result().astype(np.float32))
+                labels.append(np.array(done_labels, dtype=np.int8))
+    if not features:
+        raise ValueError("The dataset has no labelled rows")
+    return np.concatenate(features), np.concatenate(labels).astype(np.int64)
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def evaluate(model, X, y):
+    from sklearn.metrics import accuracy_score, classification_report, confusion_matrix, roc_auc_score
+
+    pred = model.predict(X)
+    proba_safe = model.predict_proba(X)[:, list(model.classes_).index(1)] if len(model.classes_) == 2 else None
+    report = classification_report(y, pred, labels=[0, 1], target_names=[CLASS_NAMES[0], CLASS_NAMES[1]],
+                                   output_dict=True, zero_division=0)
+    return {
+        "accuracy": round(float(accuracy_score(y, pred)), 6),
+        "roc_auc": round(float(roc_auc_score(y, proba_safe)), 6) if proba_safe is not None and len(np.unique(y)) == 2 else None,
+        "confusion_matrix": confusion_matrix(y, pred, labels=[0, 1]).tolist(),  # rows: true unsafe, safe
+        "per_class": {name: {k: round(float(v), 6) for k, v in report[name].items()} for name in CLASS_NAMES.values()},
+    }
+
+
+def write_json_atomic(path, payload):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(payload, f, indent=2)
+    os.replace(tmp, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("csv", help="labelled URLs, one per row")
+    parser.add_argument("--out", default="./weights/rf_model.pkl")
+    parser.add_argument("--url-column", default="url")
+    parser.add_argument("--label-column", default="is_spam")
+    parser.add_argument("--label-means", choices=["spam", "safe"], default="spam", help="what a true label means")
+    parser.add_argument("--chunk-size", type=int, default=50000, help="rows per feature extraction task")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="feature extraction processes")
+    parser.add_argument("--max-rows", type=int, default=None)
+    parser.add_argument("--n-estimators", type=int, default=100)
+    parser.add_argument("--max-depth", type=int, default=None)
+    parser.add_argument("--min-samples-leaf", type=int, default=1)
+    parser.add_argument("--test-size", type=float, default=0.2)
+    parser.add_argument("--random-state", type=int, default=42)
+    parser.add_argument("--export-forest", default=None, help="also write a compiled forest directory (utils/forest_export.py)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    import joblib
+    import sklearn
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.model_selection import train_test_split
+
+    start = time.perf_counter()
+    chunks = iter_chunks(args.csv, args.url_column, args.label_column, args.label_means, args.chunk_size, args.max_rows)
+    X, y = extract_all(chunks, args.workers)
+    extract_seconds = time.perf_counter() - start
+    logging.info(f"Extracted features for {len(y)} URLs in {extract_seconds:.1f}s with {args.workers} workers "
+                 f"({np.count_nonzero(y == 1)} safe, {np.count_nonzero(y == 0)} unsafe)")
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=args.test_size, random_state=args.random_state, stratify=y if len(np.unique(y)) > 1 else None
+    )
+    params = {"n_estimators": args.n_estimators, "max_depth": args.max_depth,
+              "min_samples_leaf": args.min_samples_leaf, "random_state": args.random_state}
+    model = RandomForestClassifier(n_jobs=-1, **params)
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+    logging.info(f"Fitted {args.n_estimators} trees on {len(y_train)} URLs in {fit_seconds:.1f}s")
+    # The server predicts a few rows per request from many threads; a per-call thread pool only adds overhead.
+    model.n_jobs = None
+
+    metrics = evaluate(model, X_test, y_test)
+    logging.info(f"Hold-out accuracy {metrics['accuracy']:.4f}, ROC AUC {metrics['roc_auc']}")
+
+    meta = {
+        "feature_schema_version": FEATURE_SCHEMA_VERSION,
+        "feature_names": list(FEATURE_NAMES),
+        "classes": {str(k): v for k, v in CLASS_NAMES.items()},
+        "metrics": metrics,
+        "feature_importances": dict(zip(FEATURE_NAMES, np.round(model.feature_importances_, 6).tolist())),
+        "params": params,
+        "data": {"path": os.path.abspath(args.csv), "sha256": file_sha256(args.csv), "rows": int(len(y)),
+                 "train_rows": int(len(y_train)), "test_rows": int(len(y_test)), "test_size": args.test_size,
+                 "url_column": args.url_column, "label_column": args.label_column, "label_means": args.label_means},
+        "timings_seconds": {"features": round(extract_seconds, 3), "fit": round(fit_seconds, 3)},
+        "sklearn_version": sklearn.__version__,
+        "trained_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    # Metadata first: a running server hot-swaps on the model's mtime and reads the sidecar then.
+    write_json_atomic(args.out + META_SUFFIX, meta)
+    joblib.dump(model, f"{args.out}.tmp")
+    os.replace(f"{args.out}.tmp", args.out)
+    logging.info(f"Wrote {args.out} and {args.out + META_SUFFIX}")
+
+    if args.export_forest:
+        from utils.forest_export import export_forest
+        manifest = export_forest(model, args.export_forest, {"feature_schema_version": FEATURE_SCHEMA_VERSION})
+        logging.info(f"Exported compiled forest to {args.export_forest} (digest {manifest['digest'][:12]})")
+
+
+if __name__ == "__main__":
+    main()
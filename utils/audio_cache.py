@@ -0,0 +1,196 @@
+import os
+import mmap
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+
+class AudioCache:
+    """Content-addressed cache for synthesized audio with a memory tier and a disk tier.
+
+    Entries are keyed by a hash of everything that determines the audio (text,
+    voice, model, output format). Both tiers are bounded in bytes and evict the
+    least recently used entry. Disk hits are streamed from a memory map and
+    promoted to the memory tier. New audio is cached by ``tee``-ing the
+    upstream stream, so the first caller is not slowed down.
+    """
+
+    def __init__(self, directory=None, memory_max_bytes=32 * 2**20, disk_max_bytes=512 * 2**20, chunk_size=32 * 1024):
+        self.directory = directory if disk_max_bytes > 0 else None
+        self.memory_max_bytes = memory_max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self.chunk_size = chunk_size
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # key -> bytes, least recently used first
+        self._memory_bytes = 0
+        self._disk = OrderedDict()  # key -> size
+        self._disk_bytes = 0
+        self._counts = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0,
+                        "memory_evictions": 0, "disk_evictions": 0}
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            self._load_disk_index()
+
+    @staticmethod
+    def key(text, voice_id, model_id, output_format):
+        return hashlib.sha256("\x1f".join((voice_id, model_id, output_format, text)).encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Returns an iterator over the cached audio chunks, or None on a miss."""
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self._counts["memory_hits"] += 1
+                return self._iter_bytes(data)
+            on_disk = key in self._disk
+            if on_disk:
+                self._disk.move_to_end(key)
+        if on_disk:
+            try:
+                handle = open(self._path(key), "rb")
+            except FileNotFoundError:  # evicted by another process
+                with self._lock:
+                    self._forget_disk_locked(key)
+            else:
+                with self._lock:
+                    self._counts["disk_hits"] += 1
+                try:
+                    os.utime(self._path(key))  # keeps the LRU order across restarts
+                except OSError:
+                    pass
+                return self._iter_file(key, handle)
+        with self._lock:
+            self._counts["misses"] += 1
+        return None
+
+    def tee(self, key, chunks):
+        """Yields ``chunks`` unchanged and caches the audio once the stream completes."""
+        parts = []
+        for chunk in chunks:
+            parts.append(chunk)
+            yield chunk
+        # Only reached if the stream was consumed to the end without errors.
+        self.put(key, b"".join(parts))
+
+    async def atee(self, key, chunks):
+        """``tee`` for an async iterator of chunks."""
+        parts = []
+        async for chunk in chunks:
+            parts.append(chunk)
+            yield chunk
+        self.put(key, b"".join(parts))
+
+    def put(self, key, data):
+        if not data:
+            return
+        with self._lock:
+            self._counts["stores"] += 1
+            self._remember_locked(key, data)
+        if self.directory:
+            self._write_disk(key, data)
+
+    def stats(self):
+        with self._lock:
+            lookups = self._counts["memory_hits"] + self._counts["disk_hits"] + self._counts["misses"]
+            hits = lookups - self._counts["misses"]
+            return {
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "memory_max_bytes": self.memory_max_bytes,
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_bytes,
+                "disk_max_bytes": self.disk_max_bytes if self.directory else 0,
+                **self._counts,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def _iter_bytes(self, data):
+        view = memoryview(data)
+        for start in range(0, len(data), self.chunk_size):
+            yield bytes(view[start:start + self.chunk_size])
+
+    def _iter_file(self, key, handle):
+        with handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for start in range(0, len(mapped), self.chunk_size):
+                yield mapped[start:start + self.chunk_size]
+            data = mapped[:]
+        with self._lock:
+            self._remember_locked(key, data)
+
+    def _remember_locked(self, key, data):
+        if len(data) > self.memory_max_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+        self._memory[key] = data
+        self._memory_bytes += len(data)
+        while self._memory_bytes > self.memory_max_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self._counts["memory_evictions"] += 1
+
+    def _write_disk(self, key, data):
+        if len(data) > self.disk_max_bytes:
+            return
+        path = self._path(key)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)  # readers never see a partial file
+        except OSError as e:
+            logging.warning(f"Could not write TTS cache entry {key}: {e}")
+            return
+        with self._lock:
+            self._forget_disk_locked(key)
+            self._disk[key] = len(data)
+            self._disk_bytes += len(data)
+            evicted = self._trim_disk_locked()
+        self._remove_files(evicted)
+
+    def _trim_disk_locked(self):
+        evicted = []
+        while self._disk_bytes > self.disk_max_bytes:
+            old_key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            self._counts["disk_evictions"] += 1
+            evicted.append(old_key)
+        return evicted
+
+    def _remove_files(self, keys):
+        for key in keys:
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def _forget_disk_locked(self, key):
+        size = self._disk.pop(key, None)
+        if size is not None:
+            self._disk_bytes -= size
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def _load_disk_index(self):
+        """Rebuilds the disk LRU from the files already in the cache directory (oldest mtime first)."""
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                if name.endswith(".tmp"):
+                    os.remove(path)
+                    continue
+                st = os.stat(path)
+                if st.st_size:
+                    entries.append((st.st_mtime, name, st.st_size))
+        with self._lock:
+            for _, key, size in sorted(entries):
+                self._disk[key] = size
+                self._disk_bytes += size
+            evicted = self._trim_disk_locked()
+        self._remove_files(evicted)
@@ -0,0 +1,168 @@
+import io
+import wave
+import threading
+import subprocess
+
+
+STT_SAMPLE_RATE = 16000
+STT_SAMPLE_WIDTH = 2  # bytes, signed 16-bit little endian
+STT_CHANNELS = 1
+PCM_BYTES_PER_SECOND = STT_SAMPLE_RATE * STT_SAMPLE_WIDTH * STT_CHANNELS
+FFMPEG_STDERR_MAX_BYTES = 64 * 1024  # error text kept for the exception message
+
+
+class AudioIngestError(Exception):
+    """Raised when an uploaded audio file cannot be decoded."""
+
+
+class AudioTooLargeError(AudioIngestError):
+    """Raised when an upload or its decoded audio exceeds the configured limits."""
+
+
+def decode_to_pcm(stream, ext="", max_bytes=25 * 1024 * 1024, max_seconds=600, chunk_size=64 * 1024, timeout=120):
+    """Decodes an uploaded audio stream to mono 16 kHz 16-bit PCM without touching the filesystem.
+
+    WAV files are decoded and resampled in-process (read directly when already
+    mono/16 kHz/16-bit). Anything else is piped through ffmpeg (stdin -> stdout),
+    which decodes and resamples in one pass; the upload is fed to it in
+    ``chunk_size`` pieces, so memory is bounded by the decoded PCM (at most
+    ``max_seconds``). ffmpeg is killed if decoding takes longer than ``timeout`` seconds.
+    """
+    if ext == ".wav":
+        data = _read_bounded(stream, max_bytes, chunk_size)
+        pcm = _pcm_from_wav(data)
+        if pcm is None:
+            try:
+                # Plain PCM WAV in another rate/layout: resampling in-process beats spawning ffmpeg.
+                from pydub import AudioSegment
+                segment = AudioSegment.from_wav(io.BytesIO(data))
+                segment = segment.set_channels(STT_CHANNELS).set_frame_rate(STT_SAMPLE_RATE).set_sample_width(STT_SAMPLE_WIDTH)
+                pcm = segment.raw_data
+            except Exception:
+                return _ffmpeg_to_pcm(io.BytesIO(data), max_bytes, max_seconds, chunk_size, timeout)
+        return _check_duration(pcm, max_seconds)
+    return _ffmpeg_to_pcm(stream, max_bytes, max_seconds, chunk_size, timeout)
+
+
+def _read_bounded(stream, max_bytes, chunk_size):
+    buffer = io.BytesIO()
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            return buffer.getvalue()
+        if buffer.tell() + len(chunk) > max_bytes:
+            raise AudioTooLargeError(f"Audio upload exceeds {max_bytes} bytes.")
+        buffer.write(chunk)
+
+
+def _pcm_from_wav(data):
+    """Returns the frames of a WAV that is already in the target format, else None."""
+    try:
+        with wave.open(io.BytesIO(data), "rb") as wav:
+            if (wav.getnchannels(), wav.getframerate(), wav.getsampwidth()) != (STT_CHANNELS, STT_SAMPLE_RATE, STT_SAMPLE_WIDTH):
+                return None
+            if wav.getcomptype() != "NONE":
+                return None
+            return wav.readframes(wav.getnframes())
+    except (wave.Error, EOFError):
+        return None
+
+
+def _check_duration(pcm, max_seconds):
+    if len(pcm) > max_seconds * PCM_BYTES_PER_SECOND:
+        raise AudioTooLargeError(f"Audio is longer than {max_seconds} seconds.")
+    return pcm
+
+
+def _ffmpeg_to_pcm(stream, max_bytes, max_seconds, chunk_size, timeout):
+    from pydub import AudioSegment  # only for the ffmpeg path it detected; pydub is slow to import
+    command = [
+        AudioSegment.converter, "-hide_banner", "-loglevel", "error",
+        "-i", "cache:pipe:0",  # the cache protocol lets ffmpeg seek in piped containers (e.g. m4a)
+        "-ac", str(STT_CHANNELS), "-ar", str(STT_SAMPLE_RATE),
+        "-f", "s16le", "-acodec", "pcm_s16le", "pipe:1",
+    ]
+    try:
+        proc = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except OSError as e:
+        raise AudioIngestError(f"Could not start audio decoder '{AudioSegment.converter}': {e}") from e
+
+    too_large = threading.Event()
+    timed_out = threading.Event()
+    stderr = bytearray()
+
+    def feed():
+        sent = 0
+        try:
+            while True:
+                chunk = stream.read(chunk_size)
+                if not chunk:
+                    break
+                sent += len(chunk)
+                if sent > max_bytes:
+                    too_large.set()
+                    proc.kill()
+                    return
+                proc.stdin.write(chunk)
+        except (BrokenPipeError, ValueError):
+            pass  # decoder exited early; its stderr says why
+        finally:
+            try:
+                proc.stdin.close()
+            except OSError:
+                pass
+
+    def drain_stderr():
+        # Read stderr as it comes: a decoder logging per-packet errors on a long
+        # corrupt upload would otherwise fill the pipe and stall before stdout ends.
+        for line in iter(proc.stderr.readline, b""):
+            if len(stderr) < FFMPEG_STDERR_MAX_BYTES:
+                stderr.extend(line[:FFMPEG_STDERR_MAX_BYTES - len(stderr)])
+
+    def expire():
+        timed_out.set()
+        proc.kill()
+
+    threads = [
+        threading.Thread(target=feed, name="audio-ingest-feed", daemon=True),
+        threading.Thread(target=drain_stderr, name="audio-ingest-stderr", daemon=True),
+    ]
+    for thread in threads:
+        thread.start()
+    watchdog = threading.Timer(timeout, expire)
+    watchdog.daemon = True
+    watchdog.start()
+
+    try:
+        max_pcm_bytes = max_seconds * PCM_BYTES_PER_SECOND
+        pcm = bytearray()
+        while True:
+            chunk = proc.stdout.read(chunk_size)
+            if not chunk:
+                break
+            pcm += chunk
+            if len(pcm) > max_pcm_bytes:
+                proc.kill()
+                raise AudioTooLargeError(f"Audio is longer than {max_seconds} seconds.")
+        try:
+            returncode = proc.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            timed_out.set()
+            returncode = proc.wait()
+    finally:
+        watchdog.cancel()
+        if proc.poll() is None:
+            proc.kill()
+        proc.wait()
+        for thread in threads:
+            thread.join(timeout)
+
+    if too_large.is_set():
+        raise AudioTooLargeError(f"Audio upload exceeds {max_bytes} bytes.")
+    if timed_out.is_set():
+        raise AudioIngestError(f"Audio conversion took longer than {timeout} seconds.")
+    if returncode != 0 or not pcm:
+        message = stderr.decode("utf-8", "ignore").strip()
+        raise AudioIngestError(f"Audio conversion failed: {message or f'ffmpeg exited with {returncode}'}")
+    return bytes(pcm)
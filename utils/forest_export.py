@@ -0,0 +1,228 @@
+"""Flattens a trained scikit-learn RandomForestClassifier into memory-mappable NumPy arrays.
+
+    python -m utils.forest_export ./weights/rf_model.pkl ./weights/rf_model.forest
+
+The export is a directory of ``.npy`` files plus ``manifest.json``. ``CompiledForest``
+scores it with a few vectorized NumPy operations per tree level, without importing
+scikit-learn, and returns exactly the probabilities of the original model's
+``predict_proba``. Point LINK_MODEL_PATH at the directory to serve it.
+"""
+import os
+import sys
+import json
+import shutil
+import hashlib
+import argparse
+import tempfile
+
+import numpy as np
+
+FORMAT_VERSION = 2
+MANIFEST = "manifest.json"
+ARRAYS = ("feature", "threshold", "left", "value", "roots", "classes")
+
+
+def flatten_forest(model):
+    """Concatenates the nodes of every tree into one set of arrays; node ids are global.
+
+    Nodes are renumbered breadth-first so that a node's right child always
+    follows its left child, and a step down the tree is ``left[node] + went_right``.
+    """
+    if getattr(model, "n_outputs_", 1) != 1:
+        raise ValueError("Only single-output forests can be exported")
+    feature, threshold, left, value, roots = [], [], [], [], []
+    offset, max_depth = 0, 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        order, first_child = _breadth_first(tree.children_left, tree.children_right)
+        is_leaf = tree.children_left[order] == -1
+        # Leaves point at themselves and never go right, so a row that reached
+        # its leaf stays there.
+        left.append(np.where(is_leaf, np.arange(len(order)), first_child) + offset)
+        feature.append(np.where(is_leaf, 0, tree.feature[order]))
+        threshold.append(np.where(is_leaf, np.inf, _round_down_to_float32(tree.threshold[order])))
+        # Same normalization as DecisionTreeClassifier.predict_proba.
+        counts = tree.value[order, 0, :].astype(np.float64)
+        normalizer = counts.sum(axis=1, keepdims=True)
+        normalizer[normalizer == 0.0] = 1.0
+        value.append(counts / normalizer)
+        roots.append(offset)
+        offset += len(order)
+        max_depth = max(max_depth, tree.max_depth)
+    arrays = {
+        "feature": np.concatenate(feature).astype(np.int32),
+        "threshold": np.concatenate(threshold).astype(np.float32),
+        "left": np.concatenate(left).astype(np.int32),
+        "value": np.concatenate(value),
+        "roots": np.array(roots, dtype=np.int32),
+        "classes": np.asarray(model.classes_),
+    }
+    meta = {"n_features": int(model.n_features_in_), "n_trees": len(roots), "n_nodes": offset, "max_depth": int(max_depth)}
+    return arrays, meta
+
+
+def _breadth_first(children_left, children_right):
+    """Returns the nodes in breadth-first order and, per new position, the new id of the left child."""
+    order = [0]
+    for node in order:  # grows while iterating
+        if children_left[node] != -1:
+            order.append(children_left[node])
+            order.append(children_right[node])
+    order = np.array(order)
+    new_id = np.empty(len(order), dtype=np.int64)
+    new_id[order] = np.arange(len(order))
+    first_child = np.where(children_left[order] == -1, -1, new_id[children_left[order]])
+    return order, first_child
+
+
+def _round_down_to_float32(thresholds):
+    # scikit-learn compares float32 inputs with float64 thresholds. For a float32 x,
+    # x <= t holds exactly when x <= the largest float32 not above t, so the
+    # thresholds can be stored (and compared) as float32 without changing a split.
+    t32 = thresholds.astype(np.float32)
+    above = t32.astype(np.float64) > thresholds
+    t32[above] = np.nextafter(t32[above], np.float32(-np.inf))
+    return t32
+
+
+def export_forest(model, out_dir, extra=None):
+    """Writes the flattened forest to ``out_dir`` and returns its manifest.
+
+    ``extra`` is merged into the manifest, e.g. the model's ``feature_schema_version``.
+
+    The files are written to a temporary directory that then replaces ``out_dir``,
+    so processes that have the old export memory-mapped keep reading intact files
+    and ModelRegistry picks up the new one when the manifest's mtime changes.
+    """
+    arrays, meta = flatten_forest(model)
+    digest = hashlib.sha256()
+    for name in ARRAYS:
+        digest.update(np.ascontiguousarray(arrays[name]).tobytes())
+    manifest = {"format": FORMAT_VERSION, **meta, "classes": arrays["classes"].tolist(), "digest": digest.hexdigest(), **(extra or {})}
+
+    out_dir = os.path.abspath(out_dir)
+    tmp_dir = tempfile.mkdtemp(prefix=".forest-", dir=os.path.dirname(out_dir))
+    os.chmod(tmp_dir, 0o755)
+    for name in ARRAYS:
+        np.save(os.path.join(tmp_dir, f"{name}.npy"), arrays[name])
+    with open(os.path.join(tmp_dir, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+    if os.path.exists(out_dir):
+        old_dir = f"{tmp_dir}.old"
+        os.rename(out_dir, old_dir)
+        os.rename(tmp_dir, out_dir)
+        shutil.rmtree(old_dir)
+    else:
+        os.rename(tmp_dir, out_dir)
+    return manifest
+
+
+class CompiledForest:
+    """Drop-in for the RandomForestClassifier's ``predict_proba``, ``predict`` and ``classes_``.
+
+    All trees are walked together: each step gathers every row's current node in
+    every tree and moves it to the left or right child. Inputs are cast to float32
+    like scikit-learn does, and a row goes right exactly when scikit-learn's
+    ``x <= threshold`` is false, so the splits are identical.
+    """
+
+    def __init__(self, arrays, manifest, chunk_size=4096):
+        if manifest.get("format") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported forest format {manifest.get('format')}, expected {FORMAT_VERSION}")
+        for name in ARRAYS:
+            setattr(self, name, arrays[name])
+        self.manifest = manifest
+        self.classes_ = self.classes
+        self.n_features_in_ = manifest["n_features"]
+        self.digest = manifest["digest"]
+        self.chunk_size = chunk_size  # rows per pass; bounds the (rows, trees) temporaries
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Opens an export; with ``mmap`` the arrays stay in the page cache, shared by all workers."""
+        with open(os.path.join(path, MANIFEST)) as f:
+            manifest = json.load(f)
+        # np.asarray drops the memmap subclass (and its per-operation overhead) but keeps the mapping.
+        arrays = {name: np.asarray(np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r" if mmap else None)) for name in ARRAYS}
+        return cls(arrays, manifest)
+
+    def predict_proba(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has {X.shape[1]} features, but the forest expects {self.n_features_in_}")
+        if len(X) <= self.chunk_size:
+            return self._predict_chunk(X)
+        return np.concatenate([self._predict_chunk(X[i:i + self.chunk_size]) for i in range(0, len(X), self.chunk_size)])
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+    def _predict_chunk(self, X):
+        n_trees = len(self.roots)
+        # One flat entry per (row, tree) pair; X is read through flat offsets.
+        node = np.tile(self.roots, len(X))
+        offset = np.repeat(np.arange(len(X), dtype=np.int32) * X.shape[1], n_trees)
+        x = X.ravel()
+        # Most paths are much shorter than the deepest one, so pairs that stop
+        # moving (they reached a leaf) are dropped after every step.
+        active, current = np.arange(len(node)), node
+        while len(active):
+            step = self.left[current] + (x[offset + self.feature[current]] > self.threshold[current])
+            moving = step != current
+            active, current, offset = active[moving], step[moving], offset[moving]
+            node[active] = current
+        # cumsum adds the trees one after another, like the forest's own accumulation,
+        # so the result matches predict_proba bit for bit.
+        leaves = self.value[node].reshape(len(X), n_trees, -1)
+        return np.cumsum(leaves, axis=1)[:, -1] / n_trees
+
+
+def verification_inputs(forest, n=10000, seed=0):
+    """Random rows plus every split threshold and its neighbours, so each branch is exercised."""
+    rng = np.random.default_rng(seed)
+    split = np.asarray(forest.left) != np.arange(len(forest.left))
+    X = np.empty((n, forest.n_features_in_))
+    for f in range(forest.n_features_in_):
+        thresholds = np.asarray(forest.threshold, dtype=np.float64)[split & (np.asarray(forest.feature) == f)]
+        high = thresholds.max() + 2 if len(thresholds) else 2
+        edges = np.concatenate([thresholds, np.floor(thresholds), np.ceil(thresholds)]) if len(thresholds) else np.zeros(1)
+        X[:, f] = np.where(rng.random(n) < 0.5, rng.integers(0, int(high) + 1, n), rng.choice(edges, n))
+    return X
+
+
+def verify(model, forest, X):
+    """Returns the number of rows whose probabilities differ from the scikit-learn model's."""
+    expected = model.predict_proba(X)
+    actual = forest.predict_proba(X)
+    return int(np.count_nonzero((expected != actual).any(axis=1)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("model", help="pickled RandomForestClassifier (joblib)")
+    parser.add_argument("out_dir", help="directory to write, e.g. ./weights/rf_model.forest")
+    parser.add_argument("--verify-rows", type=int, default=10000, help="rows to compare against scikit-learn (0 to skip)")
+    args = parser.parse_args()
+
+    import joblib
+    from utils.model_registry import META_SUFFIX
+    model = joblib.load(args.model)
+    extra = {}
+    if os.path.exists(args.model + META_SUFFIX):  # carry the training metadata's schema version over
+        with open(args.model + META_SUFFIX) as f:
+            extra["feature_schema_version"] = json.load(f).get("feature_schema_version")
+    manifest = export_forest(model, args.out_dir, extra)
+    print(f"Exported {manifest['n_trees']} trees, {manifest['n_nodes']} nodes, max depth {manifest['max_depth']} "
+          f"to {args.out_dir} (digest {manifest['digest'][:12]})")
+    if args.verify_rows:
+        forest = CompiledForest.load(args.out_dir)
+        mismatches = verify(model, forest, verification_inputs(forest, args.verify_rows))
+        print(f"Verified {args.verify_rows} rows against scikit-learn: {mismatches} mismatches")
+        if mismatches:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
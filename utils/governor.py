@@ -0,0 +1,213 @@
+import math
+import time
+import asyncio
+import threading
+from collections import deque
+from contextlib import contextmanager, asynccontextmanager, nullcontext
+
+from utils.metrics import REGISTRY
+
+INFLIGHT = REGISTRY.gauge("upstream_inflight", "Upstream calls in progress.", ["upstream"])
+QUEUED = REGISTRY.gauge("upstream_queued", "Requests waiting for an upstream slot.", ["upstream"])
+SHED = REGISTRY.counter("upstream_shed_total", "Requests rejected before calling an upstream, by reason (queue_full, timeout).", ["upstream", "reason"])
+QUEUE_SECONDS = REGISTRY.histogram("upstream_queue_seconds", "Time spent waiting for an upstream slot.", ["upstream"])
+
+
+class Overloaded(Exception):
+    """Raised when a request is shed instead of waiting for a busy upstream; maps to 503 with Retry-After."""
+
+    def __init__(self, upstream, reason, retry_after):
+        super().__init__(f"{upstream} is overloaded ({reason}), retry in {retry_after}s")
+        self.upstream = upstream
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    __slots__ = ("granted", "queued_at", "event", "loop", "future")
+
+    def __init__(self, event=None, loop=None, future=None):
+        self.granted = False
+        self.queued_at = time.perf_counter()
+        self.event = event
+        self.loop = loop
+        self.future = future
+
+    def wake(self):
+        if self.event is not None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(_resolve, self.future)
+
+
+class Limiter:
+    """Caps concurrent calls to one upstream, with a bounded FIFO queue and a queueing deadline.
+
+    A request that finds all ``max_inflight`` slots busy waits in line; if the
+    line already holds ``max_queue`` requests, or no slot frees up within
+    ``queue_timeout`` seconds, it is shed with ``Overloaded`` instead of adding
+    to the pile-up. Threads use ``slot()`` and coroutines ``aslot()``; both share
+    the same slots and queue.
+    """
+
+    def __init__(self, name, max_inflight=32, max_queue=64, queue_timeout=5.0):
+        if max_inflight <= 0:
+            raise ValueError("max_inflight must be positive")
+        self.name = name
+        self.max_inflight = max_inflight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._lock = threading.Lock()
+        self._inflight = 0
+        self._waiters = deque()
+        self._avg_hold = 1.0  # EWMA of seconds a slot is held, for Retry-After
+        self._counts = {"admitted": 0, "waited": 0, "shed_queue_full": 0, "shed_timeout": 0}
+        self._wait_seconds = 0.0
+        self._peak_queued = 0
+
+    @contextmanager
+    def slot(self):
+        waiter = self._enter(lambda: _Waiter(event=threading.Event()))
+        if waiter is not None:
+            waiter.event.wait(self.queue_timeout)
+            self._settle_wait(waiter)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._release(time.perf_counter() - start)
+
+    @asynccontextmanager
+    async def aslot(self):
+        loop = asyncio.get_running_loop()
+        waiter = self._enter(lambda: _Waiter(loop=loop, future=loop.create_future()))
+        if waiter is not None:
+            try:
+                await asyncio.wait({waiter.future}, timeout=self.queue_timeout)
+            except BaseException:  # cancelled while queued: give back a slot that was already handed over
+                if self._abandon(waiter):
+                    self._release(0.0)
+                raise
+            self._settle_wait(waiter)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._release(time.perf_counter() - start)
+
+    def stream(self, chunks):
+        """Yields from ``chunks`` while holding a slot; the slot is taken on the first ``next()``."""
+        with self.slot():
+            yield from chunks
+
+    async def astream(self, chunks):
+        """``stream`` for an async iterator of chunks."""
+        async with self.aslot():
+            async for chunk in chunks:
+                yield chunk
+
+    def stats(self):
+        with self._lock:
+            waited = self._counts["waited"]
+            return {
+                "inflight": self._inflight,
+                "queued": len(self._waiters),
+                "max_inflight": self.max_inflight,
+                "max_queue": self.max_queue,
+                "queue_timeout_seconds": self.queue_timeout,
+                **self._counts,
+                "peak_queued": self._peak_queued,
+                "avg_wait_ms": round(self._wait_seconds / waited * 1000, 1) if waited else 0.0,
+            }
+
+    def _enter(self, make_waiter):
+        """Takes a free slot (returns None) or joins the queue (returns the waiter)."""
+        with self._lock:
+            if self._inflight < self.max_inflight and not self._waiters:
+                self._inflight += 1
+                self._counts["admitted"] += 1
+                INFLIGHT.set(self._inflight, upstream=self.name)
+                return None
+            if len(self._waiters) >= self.max_queue:
+                self._counts["shed_queue_full"] += 1
+                retry_after = self._retry_after_locked()
+            else:
+                waiter = make_waiter()
+                self._waiters.append(waiter)
+                self._counts["waited"] += 1
+                self._peak_queued = max(self._peak_queued, len(self._waiters))
+                QUEUED.set(len(self._waiters), upstream=self.name)
+                return waiter
+        SHED.inc(upstream=self.name, reason="queue_full")
+        raise Overloaded(self.name, "queue_full", retry_after)
+
+    def _settle_wait(self, waiter):
+        """Keeps the slot handed over while waiting, or sheds the request if the deadline passed first."""
+        waited = time.perf_counter() - waiter.queued_at
+        with self._lock:
+            granted = waiter.granted
+            self._wait_seconds += waited
+            if granted:
+                self._counts["admitted"] += 1
+            else:
+                self._waiters.remove(waiter)
+                self._counts["shed_timeout"] += 1
+                QUEUED.set(len(self._waiters), upstream=self.name)
+                retry_after = self._retry_after_locked()
+        QUEUE_SECONDS.observe(waited, upstream=self.name)
+        if not granted:
+            SHED.inc(upstream=self.name, reason="timeout")
+            raise Overloaded(self.name, "timeout", retry_after)
+
+    def _release(self, held):
+        with self._lock:
+            self._avg_hold += 0.1 * (held - self._avg_hold)
+            if self._waiters:
+                waiter = self._waiters.popleft()  # hand the slot straight to the next in line
+                waiter.granted = True
+                waiter.wake()
+                QUEUED.set(len(self._waiters), upstream=self.name)
+                return
+            self._inflight -= 1
+            INFLIGHT.set(self._inflight, upstream=self.name)
+
+    def _abandon(self, waiter):
+        """Leaves the queue; returns True if a slot had already been handed to ``waiter``."""
+        with self._lock:
+            if waiter.granted:
+                return True
+            self._waiters.remove(waiter)
+            QUEUED.set(len(self._waiters), upstream=self.name)
+            return False
+
+    def _retry_after_locked(self):
+        # Roughly how long until everyone already waiting has been served.
+        rounds = (len(self._waiters) + 1) / self.max_inflight
+        return min(max(math.ceil(self._avg_hold * rounds), 1), 60)
+
+
+class Governor:
+    """One ``Limiter`` per upstream (e.g. llm, tts, stt, translate)."""
+
+    def __init__(self, limits):
+        self.limiters = {name: Limiter(name, **config) for name, config in limits.items()}
+
+    def __getitem__(self, name):
+        return self.limiters[name]
+
+    def stats(self):
+        return {name: limiter.stats() for name, limiter in self.limiters.items()}
+
+
+def slot(limiter):
+    """``limiter.slot()``, or a no-op when there is no limiter."""
+    return limiter.slot() if limiter is not None else nullcontext()
+
+
+def aslot(limiter):
+    return limiter.aslot() if limiter is not None else nullcontext()
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
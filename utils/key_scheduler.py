@@ -0,0 +1,123 @@
+import time
+import threading
+
+
+class _KeyState:
+    __slots__ = ("name", "key", "inflight", "successes", "failures", "rate_limited", "rejected",
+                 "consecutive_failures", "cooldown_until", "last_used")
+
+    def __init__(self, name, key):
+        self.name = name
+        self.key = key
+        self.inflight = 0
+        self.successes = 0
+        self.failures = 0
+        self.rate_limited = 0
+        self.rejected = 0
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+        self.last_used = 0.0
+
+
+class KeyScheduler:
+    """Hands out API keys healthiest-first and spreads load across them.
+
+    Every key tracks its 429/error history and a cooldown window. ``acquire``
+    never sleeps: keys that are cooling down are skipped, and when none is
+    available the caller gets ``None`` immediately.
+    """
+
+    def __init__(self, keys, base_cooldown=2.0, max_cooldown=60.0, rejected_cooldown=600.0, clock=time.monotonic):
+        if not keys:
+            raise ValueError("KeyScheduler needs at least one key")
+        self.base_cooldown = base_cooldown
+        self.max_cooldown = max_cooldown
+        self.rejected_cooldown = rejected_cooldown
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._states = [_KeyState(f"key_{i}", key) for i, key in enumerate(keys, start=1)]
+        self._by_key = {s.key: s for s in self._states}
+
+    def acquire(self, exclude=()):
+        """Returns the healthiest available key not in ``exclude``, or None if all are cooling down."""
+        now = self._clock()
+        with self._lock:
+            ready = [s for s in self._states if s.cooldown_until <= now and s.key not in exclude]
+            if not ready:
+                return None
+            # Fewest recent failures first, then least busy, then least recently used (round robin).
+            best = min(ready, key=lambda s: (s.consecutive_failures, s.inflight, s.last_used))
+            best.inflight += 1
+            best.last_used = now
+            return best.key
+
+    def report_success(self, key):
+        with self._lock:
+            state = self._by_key[key]
+            state.inflight -= 1
+            state.successes += 1
+            state.consecutive_failures = 0
+
+    def report_rate_limited(self, key, retry_after=None):
+        """Marks a key as throttled (HTTP 429) and puts it in cooldown."""
+        with self._lock:
+            state = self._by_key[key]
+            state.inflight -= 1
+            state.rate_limited += 1
+            self._penalize_locked(state, retry_after)
+
+    def report_error(self, key):
+        """Marks a transport or 5xx failure for a key and puts it in a (shorter) cooldown."""
+        with self._lock:
+            state = self._by_key[key]
+            state.inflight -= 1
+            state.failures += 1
+            self._penalize_locked(state, None, scale=0.5)
+
+    def report_rejected(self, key):
+        """Marks a key the API refused (invalid, revoked or unauthorized) and benches it for ``rejected_cooldown``."""
+        with self._lock:
+            state = self._by_key[key]
+            state.inflight -= 1
+            state.rejected += 1
+            state.consecutive_failures += 1
+            state.cooldown_until = self._clock() + self.rejected_cooldown
+
+    def release(self, key):
+        """Gives a key back without judging its health, e.g. the request itself was invalid or was cancelled."""
+        with self._lock:
+            self._by_key[key].inflight -= 1
+
+    def name_of(self, key):
+        """Returns the key's non-secret name (e.g. ``key_2``) for logs and metrics."""
+        return self._by_key[key].name
+
+    def next_ready_in(self):
+        """Seconds until the first key leaves cooldown (0 if one is ready now)."""
+        now = self._clock()
+        with self._lock:
+            return max(0.0, min(s.cooldown_until for s in self._states) - now)
+
+    def stats(self):
+        now = self._clock()
+        with self._lock:
+            return {
+                s.name: {
+                    "inflight": s.inflight,
+                    "successes": s.successes,
+                    "failures": s.failures,
+                    "rate_limited": s.rate_limited,
+                    "rejected": s.rejected,
+                    "consecutive_failures": s.consecutive_failures,
+                    "cooldown_remaining": round(max(0.0, s.cooldown_until - now), 2),
+                }
+                for s in self._states
+            }
+
+    def _penalize_locked(self, state, retry_after, scale=1.0):
+        state.consecutive_failures += 1
+        if retry_after is not None:
+            cooldown = retry_after
+        else:
+            cooldown = self.base_cooldown * scale * 2 ** (state.consecutive_failures - 1)
+        state.cooldown_until = self._clock() + min(cooldown, self.max_cooldown)
@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import threading
+
+from utils.governor import Overloaded
+
+
+LLM_PROMPT = "I will send you a link. Respond with only one word: safe or unsafe. No explanation, no punctuation, no newline—just the word,  link : {url} "
+
+
+class LinkCascade:
+    """Classifies URLs with the local RF model and escalates to the LLM only when the model is unsure.
+
+    The model's probability that a URL is safe (class 1) is compared against an
+    uncertainty band ``[low, high]``: outside the band the RF label is final,
+    inside it the LLM decides. Per-stage hit counts are kept so the band can be tuned.
+    """
+
+    def __init__(self, registry, get_llm, low=0.35, high=0.65):
+        if not 0.0 <= low <= high <= 1.0:
+            raise ValueError(f"Invalid uncertainty band [{low}, {high}]")
+        self.registry = registry
+        self.get_llm = get_llm  # callable returning the GeminiAPI instance (or None)
+        self.low = low
+        self.high = high
+        self._lock = threading.Lock()
+        self._hits = {"rf": 0, "llm": 0, "rf_fallback": 0}
+
+    def rf_score(self, url):
+        """Returns the RF model's probability that the URL is safe."""
+        model = self.registry.get()
+        from helpers import extract_features  # numpy is loaded with the first URL
+        proba = model.predict_proba(extract_features(url))[0]
+        return float(proba[list(model.classes_).index(1)])
+
+    def classify(self, url, mode="cascade"):
+        """Returns a dict with the label, the stage that decided it and the RF confidence.
+
+        ``mode="full"`` keeps the original behaviour of always asking the LLM.
+        """
+        p_safe = self.rf_score(url)
+        if not self._needs_llm(p_safe, mode):
+            return self._decide(url, mode, p_safe, asked=False)
+        return self._decide(url, mode, p_safe, self._ask_llm(url))
+
+    async def classify_async(self, url, mode="cascade", llm=None):
+        """Async ``classify``: the RF model runs in a worker thread and ``llm`` is an ``AsyncGeminiAPI``.
+
+        In ``full`` mode the RF prediction and the LLM call overlap.
+        """
+        rf = asyncio.to_thread(self.rf_score, url)
+        if mode == "full":
+            p_safe, llm_label = await asyncio.gather(rf, self._ask_llm_async(url, llm))
+            return self._decide(url, mode, p_safe, llm_label)
+        p_safe = await rf
+        if not self._needs_llm(p_safe, mode):
+            return self._decide(url, mode, p_safe, asked=False)
+        return self._decide(url, mode, p_safe, await self._ask_llm_async(url, llm))
+
+    def _needs_llm(self, p_safe, mode):
+        return mode != "cascade" or self.low <= p_safe <= self.high
+
+    def _decide(self, url, mode, p_safe, llm_label=None, asked=True):
+        rf_label = 'Safe' if p_safe >= 0.5 else 'Unsafe'
+        result = {'label': rf_label, 'stage': 'rf', 'rf_safe_probability': round(p_safe, 4)}
+
+        if not asked:
+            self._count("rf")
+            return result
+
+        llm_verdict = _normalize_label(llm_label) if llm_label is not None else None
+        if llm_verdict is None:
+            if llm_label is None:
+                logging.warning(f"LinkCascade | LLM unavailable, falling back to RF label for {url}")
+            else:
+                logging.warning(f"LinkCascade | Unparseable LLM reply {llm_label!r}, falling back to RF label for {url}")
+            result['stage'] = 'rf_fallback'
+            self._count("rf_fallback")
+            return result
+
+        # In cascade mode the LLM decides every uncertain URL; in full mode it
+        # only counts as the deciding stage when it overrules the RF model.
+        if mode == "cascade" or llm_verdict != rf_label:
+            result['label'] = llm_verdict
+            result['stage'] = 'llm'
+        self._count(result['stage'])
+        return result
+
+    def stats(self):
+        """Returns per-stage hit counts and the configured uncertainty band."""
+        with self._lock:
+            hits = dict(self._hits)
+        total = sum(hits.values())
+        return {
+            "band": {"low": self.low, "high": self.high},
+            "hits": hits,
+            "total": total,
+            "llm_rate": round(hits["llm"] / total, 4) if total else 0.0,
+        }
+
+    def _ask_llm(self, url):
+        llm = self.get_llm()
+        if llm is None:
+            return None
+        try:
+            reply = llm.get_report(LLM_PROMPT.format(url=url))
+        except Overloaded as e:  # shed: answer from the RF model alone
+            logging.warning(f"LinkCascade | {e}")
+            return None
+        if not reply or reply.startswith("Error:"):
+            return None
+        return reply
+
+    async def _ask_llm_async(self, url, llm):
+        if llm is None:
+            return None
+        try:
+            reply = await llm.get_report(LLM_PROMPT.format(url=url))
+        except Overloaded as e:
+            logging.warning(f"LinkCascade | {e}")
+            return None
+        if not reply or reply.startswith("Error:"):
+            return None
+        return reply
+
+    def _count(self, stage):
+        with self._lock:
+            self._hits[stage] += 1
+
+
+def _normalize_label(text):
+    word = text.strip().strip('.').lower()
+    if word == "safe":
+        return "Safe"
+    if word == "unsafe":
+        return "Unsafe"
+    return None
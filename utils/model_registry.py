@@ -0,0 +1,166 @@
+import io
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+
+
+META_SUFFIX = ".meta.json"
+
+
+class ModelSchemaError(ValueError):
+    """The model on disk was trained on a different feature schema than the server computes."""
+
+
+class ModelRegistry:
+    """Keeps one shared, warm instance of a pickled model for all request threads.
+
+    The model is loaded lazily on first use (or eagerly with ``load()``) and is
+    hot-swapped when the file's mtime changes, so a retrained ``.pkl`` can be
+    dropped in place without restarting the server. ``path`` may also be a
+    directory written by ``utils.forest_export``, which is memory-mapped and
+    served without scikit-learn; its manifest is the file that is watched.
+
+    With ``schema_version`` (a number, or a callable returning one) a model is only
+    accepted if its metadata - the ``<path>.meta.json`` sidecar written by
+    train_link_classifier.py, or the compiled forest's manifest - records the same
+    ``feature_schema_version``. Models without metadata are loaded with a warning.
+    """
+
+    def __init__(self, path, check_interval=5.0, loader=None, schema_version=None):
+        self.path = path
+        self.check_interval = check_interval  # seconds between mtime checks
+        self._loader = loader
+        self._schema_version = schema_version
+        self._lock = threading.Lock()
+        self._model = None
+        self._mtime = None
+        self._version = None
+        self._load_time = None
+        self._loaded_at = None
+        self._last_check = 0.0
+        self._reloads = 0
+        self._format = None
+        self._meta = None
+
+    def load(self):
+        """Loads (or reloads) the model from disk and swaps it in."""
+        with self._lock:
+            return self._load_locked()
+
+    def get(self):
+        """Returns the current model, loading it or hot-swapping it if the file changed."""
+        model = self._model
+        if model is not None and time.monotonic() - self._last_check < self.check_interval:
+            return model
+
+        if model is None:
+            with self._lock:
+                if self._model is None:
+                    return self._load_locked()
+                return self._model
+
+        # A model is already being served: never make readers wait on a reload.
+        if not self._lock.acquire(blocking=False):
+            return model
+        try:
+            self._last_check = time.monotonic()
+            try:
+                mtime = os.path.getmtime(self._watched_path())
+            except OSError as e:
+                logging.warning(f"ModelRegistry | Cannot stat {self.path}, keeping current model: {e}")
+                return self._model
+            if mtime != self._mtime:
+                logging.info(f"ModelRegistry | {self.path} changed on disk, hot-swapping model.")
+                try:
+                    self._load_locked()
+                except Exception as e:
+                    # e.g. the file is still being written; keep serving the old model
+                    logging.error(f"ModelRegistry | Reload failed, keeping version {self._version}: {e}", exc_info=True)
+            return self._model
+        finally:
+            self._lock.release()
+
+    @property
+    def version(self):
+        """Content hash of the model currently served, or None before the first load."""
+        return self._version
+
+    def info(self):
+        """Returns load statistics and the version of the model currently served."""
+        return {
+            "path": self.path,
+            "format": self._format,
+            "loaded": self._model is not None,
+            "version": self._version,
+            "feature_schema_version": (self._meta or {}).get("feature_schema_version"),
+            "mtime": self._mtime,
+            "load_time_ms": round(self._load_time * 1000, 2) if self._load_time is not None else None,
+            "loaded_at": self._loaded_at,
+            "reloads": self._reloads,
+        }
+
+    def _watched_path(self):
+        if os.path.isdir(self.path):
+            from utils.forest_export import MANIFEST
+            return os.path.join(self.path, MANIFEST)
+        return self.path
+
+    def _read_meta(self):
+        if os.path.isdir(self.path):
+            meta_path = self._watched_path()
+        else:
+            meta_path = self.path + META_SUFFIX
+        try:
+            with open(meta_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _check_schema(self, meta):
+        expected = self._schema_version() if callable(self._schema_version) else self._schema_version
+        if expected is None:
+            return
+        found = (meta or {}).get("feature_schema_version")
+        if found is None:
+            logging.warning(f"ModelRegistry | {self.path} has no feature_schema_version, cannot check it matches {expected}")
+        elif found != expected:
+            raise ModelSchemaError(f"{self.path} was trained on feature schema {found}, the server computes schema {expected}")
+
+    def _load_locked(self):
+        mtime = os.path.getmtime(self._watched_path())
+        start = time.perf_counter()
+        meta = self._read_meta()
+        self._check_schema(meta)
+        if os.path.isdir(self.path):
+            from utils.forest_export import CompiledForest
+            model = CompiledForest.load(self.path)
+            version = model.digest[:12]
+            model_format = "compiled"
+        else:
+            with open(self.path, "rb") as f:
+                data = f.read()
+            version = hashlib.sha256(data).hexdigest()[:12]
+            model = (self._loader or _joblib_load)(io.BytesIO(data))
+            model_format = "pickle"
+        load_time = time.perf_counter() - start
+
+        if self._model is not None:
+            self._reloads += 1
+        self._model = model
+        self._meta = meta
+        self._format = model_format
+        self._mtime = mtime
+        self._version = version
+        self._load_time = load_time
+        self._loaded_at = time.time()
+        self._last_check = time.monotonic()
+        logging.info(f"ModelRegistry | Loaded {self.path} (version {version}) in {load_time * 1000:.1f} ms")
+        return model
+
+
+def _joblib_load(f):
+    import joblib  # with scikit-learn, the slowest import in the app; only paid when a model is loaded
+    return joblib.load(f)
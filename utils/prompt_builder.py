@@ -0,0 +1,106 @@
+import json
+
+from utils.ttl_cache import TTLCache
+
+
+INSTRUCTIONS = """**Instructions for the Language Model:**
+You are a real human friend to {name}. Your goal is to provide natural, enjoyable conversations tailored to the user's personality, interests, and communication style. You are the same age as the user ({age_range} years old) and share similar interests. You also speak the same language as the user and use the same accent from their country.
+
+* **Speak ONLY in the user's specific language ({language}). Use phrasing and tone appropriate for that language and region.**
+* **Keep your responses casual, friendly, and natural—just like a real person talking.**
+* **Incorporate the user's interests smoothly into conversations.**
+* **Acknowledge their goals and support them in a realistic way.**
+* **Adapt to their personality, humor, and way of speaking.**
+* **Avoid sensitive or unethical topics.**
+* **Remember you are a true human.**
+
+**Important:** Ensure your speech feels natural and authentic, matching the user's cultural and linguistic background ({language}). Use chat history to maintain consistency. Avoid mentioning you are an AI or language model.
+
+**User Profile:**
+{profile}
+"""
+
+SUMMARY_HEADING = "\n**Earlier in the Conversation (summary):**\n"
+HISTORY_HEADING = "\n**Chat History (most recent last):**\n"
+
+
+def summarize_turns(summary, turns, max_chars=1500, turn_chars=160):
+    """Folds (user, bot) turns into a rolling summary of the conversation so far.
+
+    Each turn becomes one short line; the oldest lines are dropped once the
+    summary exceeds ``max_chars``. This is extractive and costs no LLM call,
+    so it can run on every turn.
+    """
+    lines = summary.split("\n") if summary else []
+    for user, bot in turns:
+        lines.append(f"User: {_clip(user, turn_chars)} | You: {_clip(bot, turn_chars)}")
+    while lines and sum(len(line) + 1 for line in lines) > max_chars:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+class PromptBuilder:
+    """Builds the chat prompt within a character budget.
+
+    The instructions and the compactly serialized profile are rendered once per
+    session and cached. Recent turns are added newest-first while they fit the
+    budget; older context comes from the session's rolling summary.
+    """
+
+    def __init__(self, max_chars=8000, summary_max_chars=1500, profile_cache_size=10000, profile_cache_ttl=6 * 3600):
+        self.max_chars = max_chars
+        self.summary_max_chars = summary_max_chars
+        self._profiles = TTLCache(maxsize=profile_cache_size, ttl=profile_cache_ttl)
+
+    def build(self, session_id, user_data, chat_history, summary, user_input_text, input_type, user_language):
+        """``chat_history`` is a list of {"user", "bot"} dicts, oldest first."""
+        header = self.render_header(session_id, user_data, user_language)
+        tail = (
+            f"\n**User Input (Type: {input_type}, Language: {user_language}):**\n{user_input_text}\n\n"
+            f"**Your Response (in {user_language}):**\n"
+        )
+
+        budget = self.max_chars - len(header) - len(tail) - len(HISTORY_HEADING) - len(SUMMARY_HEADING)
+        recent = []
+        dropped = len(chat_history)
+        for turn in reversed(chat_history):
+            line = f"User: {turn['user']}\nYou: {turn['bot']}\n"
+            if len(line) > budget:
+                break
+            recent.append(line)
+            budget -= len(line)
+            dropped -= 1
+        recent.reverse()
+
+        # Turns that didn't fit are folded into this prompt's copy of the summary.
+        older = [(t["user"], t["bot"]) for t in chat_history[:dropped]]
+        if older:
+            summary = summarize_turns(summary, older, self.summary_max_chars)
+        while summary and len(summary) + 1 > budget:
+            summary = summary.partition("\n")[2]  # drop the oldest line
+
+        parts = [header]
+        if summary:
+            parts.append(f"{SUMMARY_HEADING}{summary}\n")
+        if recent:
+            parts.append(HISTORY_HEADING + "".join(recent))
+        parts.append(tail)
+        return "".join(parts)
+
+    def render_header(self, session_id, user_data, user_language):
+        """Returns the instructions and profile for a session, rendered once and cached."""
+        header, _ = self._profiles.get_or_compute(
+            (session_id, user_language),
+            lambda: INSTRUCTIONS.format(
+                name=user_data.get("name", "the user"),
+                age_range=user_data.get("age_range", "unknown"),
+                language=user_language,
+                profile=json.dumps(user_data, ensure_ascii=False, separators=(",", ":")),
+            ),
+        )
+        return header
+
+
+def _clip(text, limit):
+    text = " ".join(str(text).split())
+    return text if len(text) <= limit else text[:limit - 1] + "…"
@@ -1,25 +1,43 @@
 import uuid
 
+from utils.session_store import MemorySessionStore
+from utils.prompt_builder import summarize_turns
+
+
 class SessionManager:
-    def __init__(self):
-        self.sessions = {}
+    """Creates and looks up chat sessions on top of a pluggable ``SessionStore``.
+
+    The default is the in-process ``MemorySessionStore``; pass a shared store
+    (e.g. ``SQLiteSessionStore``) to run several workers or survive restarts.
+    """
+
+    def __init__(self, store=None, summary_max_chars=1500):
+        self.store = store or MemorySessionStore()
+        self.summary_max_chars = summary_max_chars
 
     def create_session(self, user_data):
         session_id = str(uuid.uuid4())
-        self.sessions[session_id] = {"user_data": user_data, "chat_history": []}
+        self.store.create(session_id, user_data)
         return session_id
 
     def get_session(self, session_id):
-        return self.sessions.get(session_id)
+        """Returns the session's SessionRecord (``user_data``, ``summary``, ...), or None if it doesn't exist or expired."""
+        return self.store.get(session_id)
 
+    def get_chat_history(self, session_id):
+        """Returns a snapshot of the session's history as a list of {"user", "bot"} dicts."""
+        return [{"user": user, "bot": bot} for user, bot in self.store.get_history(session_id)]
 
     def update_session_chat_history(self, session_id, message, response):
-        session = self.get_session(session_id)
-        if session:
-            session["chat_history"].append({"user": message, "bot": response})
-            self.sessions[session_id] = session #update session
+        # Turns pushed out of the capped history live on in the rolling summary; the store folds
+        # them in with the append itself, so concurrent turns can't overwrite each other's summary.
+        self.store.append_turn(
+            session_id, message, response,
+            summarize=lambda summary, evicted: summarize_turns(summary, evicted, self.summary_max_chars),
+        )
 
+    def delete_session(self, session_id): #optional , use when you want to end the session
+        self.store.delete(session_id)
 
-    def delete_session(self, session_id): #optional , use when you want to end the session 
-        if session_id in self.sessions:
-            del self.sessions[session_id]
\ No newline at end of file
+    def stats(self):
+        return self.store.stats()
@@ -0,0 +1,359 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict, deque, namedtuple
+
+
+SessionRecord = namedtuple("SessionRecord", ["user_data", "created_at", "last_access", "summary"])
+
+
+class SessionStore:
+    """Interface for session backends used by ``SessionManager``.
+
+    A store owns session profiles and their (user, bot) history, enforces the
+    idle TTL, the session cap and the history cap, and reports ``stats()``.
+    """
+    name = "base"
+
+    def create(self, session_id, user_data):
+        raise NotImplementedError
+
+    def get(self, session_id):
+        """Returns a SessionRecord and refreshes the idle timer, or None if missing/expired."""
+        raise NotImplementedError
+
+    def get_history(self, session_id):
+        """Returns the retained (user, bot) turns, oldest first."""
+        raise NotImplementedError
+
+    def append_turn(self, session_id, message, response, summarize=None):
+        """Appends a turn; returns the turns pushed out by the history cap, or None if the session is missing.
+
+        If turns are pushed out and ``summarize`` is given, the summary becomes
+        ``summarize(summary, evicted)`` atomically with the append, so concurrent
+        turns of one session can't drop each other's evicted turns.
+        """
+        raise NotImplementedError
+
+    def set_summary(self, session_id, summary):
+        """Stores the rolling summary of turns that no longer fit in the history."""
+        raise NotImplementedError
+
+    def delete(self, session_id):
+        raise NotImplementedError
+
+    def stats(self):
+        raise NotImplementedError
+
+
+class _MemorySession:
+    __slots__ = ("user_data", "chat_history", "summary", "created_at", "last_access", "nbytes")
+
+    def __init__(self, user_data, max_history, now):
+        self.user_data = user_data
+        self.chat_history = deque(maxlen=max_history)
+        self.summary = ""
+        self.created_at = now
+        self.last_access = now
+        self.nbytes = sys.getsizeof(self) + sys.getsizeof(self.chat_history) + _sizeof_user_data(user_data)
+
+
+class MemorySessionStore(SessionStore):
+    """Thread-safe in-process store with idle-TTL and max-session eviction (the default).
+
+    Sessions are kept in least-recently-used order, so expired and surplus
+    sessions are always at the front and eviction is O(1) per session.
+    """
+    name = "memory"
+
+    def __init__(self, ttl_seconds=6 * 3600, max_sessions=10000, max_history=10, clock=time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self.max_history = max_history
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._sessions = OrderedDict()
+        self._bytes = 0
+        self._created = 0
+        self._evictions = {"ttl": 0, "capacity": 0}
+
+    def create(self, session_id, user_data):
+        now = self._clock()
+        with self._lock:
+            self._expire_locked(now)
+            while len(self._sessions) >= self.max_sessions:
+                self._evict_oldest_locked("capacity")
+            session = _MemorySession(user_data, self.max_history, now)
+            self._sessions[session_id] = session
+            self._bytes += session.nbytes
+            self._created += 1
+
+    def get(self, session_id):
+        now = self._clock()
+        with self._lock:
+            self._expire_locked(now)
+            session = self._sessions.get(session_id)
+            if not session:
+                return None
+            session.last_access = now
+            self._sessions.move_to_end(session_id)
+            return SessionRecord(session.user_data, session.created_at, session.last_access, session.summary)
+
+    def get_history(self, session_id):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            return list(session.chat_history) if session else []
+
+    def append_turn(self, session_id, message, response, summarize=None):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if not session:
+                return None
+            history = session.chat_history
+            evicted = []
+            if len(history) == history.maxlen:
+                evicted.append(history[0])
+                dropped = _sizeof_turn(history[0])
+                session.nbytes -= dropped
+                self._bytes -= dropped
+            turn = (message, response)
+            history.append(turn)
+            added = _sizeof_turn(turn)
+            session.nbytes += added
+            self._bytes += added
+            if evicted and summarize:
+                self._set_summary_locked(session, summarize(session.summary, evicted))
+            session.last_access = self._clock()
+            self._sessions.move_to_end(session_id)
+            return evicted
+
+    def set_summary(self, session_id, summary):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session:
+                self._set_summary_locked(session, summary)
+
+    def _set_summary_locked(self, session, summary):
+        delta = sys.getsizeof(summary) - sys.getsizeof(session.summary)
+        session.summary = summary
+        session.nbytes += delta
+        self._bytes += delta
+
+    def delete(self, session_id):
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session:
+                self._bytes -= session.nbytes
+
+    def stats(self):
+        with self._lock:
+            self._expire_locked(self._clock())
+            return {
+                "backend": self.name,
+                "live_sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "ttl_seconds": self.ttl_seconds,
+                "max_history": self.max_history,
+                "bytes_held": self._bytes,
+                "sessions_created": self._created,
+                "evictions": dict(self._evictions),
+            }
+
+    def _expire_locked(self, now):
+        deadline = now - self.ttl_seconds
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if oldest.last_access > deadline:
+                break
+            self._evict_oldest_locked("ttl")
+
+    def _evict_oldest_locked(self, reason):
+        _, session = self._sessions.popitem(last=False)
+        self._bytes -= session.nbytes
+        self._evictions[reason] += 1
+
+
+class SQLiteSessionStore(SessionStore):
+    """Persistent store in a SQLite database in WAL mode, shareable by several worker processes.
+
+    WAL lets readers run concurrently with the single writer, and appending a
+    turn is one small INSERT. Sessions survive restarts. Each thread gets its
+    own connection. Expiry and the session cap are enforced by a sweep that
+    runs at most every ``sweep_interval`` seconds.
+    """
+    name = "sqlite"
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS sessions (
+            id TEXT PRIMARY KEY,
+            user_data TEXT NOT NULL,
+            summary TEXT NOT NULL DEFAULT '',
+            created_at REAL NOT NULL,
+            last_access REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS sessions_last_access ON sessions (last_access);
+        CREATE TABLE IF NOT EXISTS turns (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT NOT NULL,
+            user TEXT NOT NULL,
+            bot TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS turns_session ON turns (session_id, seq);
+    """
+
+    def __init__(self, path="sessions.db", ttl_seconds=6 * 3600, max_sessions=10000, max_history=10,
+                 sweep_interval=30.0, clock=time.time):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self.max_history = max_history
+        self.sweep_interval = sweep_interval
+        self._clock = clock  # wall clock: timestamps are shared between processes
+        self._local = threading.local()
+        self._sweep_lock = threading.Lock()
+        self._last_sweep = 0.0
+        self._stats_lock = threading.Lock()
+        self._created = 0
+        self._evictions = {"ttl": 0, "capacity": 0}
+        with self._connect() as conn:
+            conn.executescript(self.SCHEMA)
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(sessions)")]
+            if "summary" not in columns:  # databases created before rolling summaries
+                conn.execute("ALTER TABLE sessions ADD COLUMN summary TEXT NOT NULL DEFAULT ''")
+
+    def create(self, session_id, user_data):
+        now = self._clock()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO sessions (id, user_data, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (session_id, json.dumps(user_data, ensure_ascii=False, separators=(",", ":")), now, now),
+            )
+        with self._stats_lock:
+            self._created += 1
+        self._maybe_sweep(now)
+
+    def get(self, session_id):
+        now = self._clock()
+        conn = self._connect()
+        with conn:
+            row = conn.execute(
+                "SELECT user_data, created_at, last_access, summary FROM sessions WHERE id = ?", (session_id,)
+            ).fetchone()
+            if row is None or row[2] <= now - self.ttl_seconds:
+                return None
+            conn.execute("UPDATE sessions SET last_access = ? WHERE id = ?", (now, session_id))
+        return SessionRecord(json.loads(row[0]), row[1], now, row[3])
+
+    def get_history(self, session_id):
+        rows = self._connect().execute(
+            "SELECT user, bot FROM (SELECT seq, user, bot FROM turns WHERE session_id = ? ORDER BY seq DESC LIMIT ?) "
+            "ORDER BY seq",
+            (session_id, self.max_history),
+        ).fetchall()
+        return [tuple(row) for row in rows]
+
+    def append_turn(self, session_id, message, response, summarize=None):
+        now = self._clock()
+        with self._connect() as conn:
+            # The UPDATE takes the write lock, so the summary read below can't change until commit.
+            updated = conn.execute("UPDATE sessions SET last_access = ? WHERE id = ?", (now, session_id)).rowcount
+            if not updated:
+                return None
+            conn.execute("INSERT INTO turns (session_id, user, bot) VALUES (?, ?, ?)", (session_id, message, response))
+            # Keep only the newest max_history turns for this session.
+            evicted = conn.execute(
+                "SELECT seq, user, bot FROM turns WHERE session_id = ? ORDER BY seq DESC LIMIT -1 OFFSET ?",
+                (session_id, self.max_history),
+            ).fetchall()
+            if evicted:
+                conn.execute("DELETE FROM turns WHERE session_id = ? AND seq <= ?", (session_id, evicted[0][0]))
+            evicted = [(user, bot) for _, user, bot in reversed(evicted)]
+            if evicted and summarize:
+                (summary,) = conn.execute("SELECT summary FROM sessions WHERE id = ?", (session_id,)).fetchone()
+                conn.execute("UPDATE sessions SET summary = ? WHERE id = ?", (summarize(summary, evicted), session_id))
+        return evicted
+
+    def set_summary(self, session_id, summary):
+        with self._connect() as conn:
+            conn.execute("UPDATE sessions SET summary = ? WHERE id = ?", (summary, session_id))
+
+    def delete(self, session_id):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM turns WHERE session_id = ?", (session_id,))
+            conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def stats(self):
+        conn = self._connect()
+        live = conn.execute(
+            "SELECT COUNT(*) FROM sessions WHERE last_access > ?", (self._clock() - self.ttl_seconds,)
+        ).fetchone()[0]
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        with self._stats_lock:
+            return {
+                "backend": self.name,
+                "path": self.path,
+                "live_sessions": live,
+                "max_sessions": self.max_sessions,
+                "ttl_seconds": self.ttl_seconds,
+                "max_history": self.max_history,
+                "bytes_held": page_count * page_size,
+                "sessions_created": self._created,  # by this process
+                "evictions": dict(self._evictions),  # by this process
+            }
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")  # durable at checkpoints; cheap appends
+            self._local.conn = conn
+        return conn
+
+    def _maybe_sweep(self, now):
+        if now - self._last_sweep < self.sweep_interval or not self._sweep_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_sweep = now
+            with self._connect() as conn:
+                expired = conn.execute(
+                    "DELETE FROM sessions WHERE last_access <= ?", (now - self.ttl_seconds,)
+                ).rowcount
+                surplus = conn.execute(
+                    "DELETE FROM sessions WHERE id IN (SELECT id FROM sessions ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                    (self.max_sessions,),
+                ).rowcount
+                if expired or surplus:
+                    conn.execute("DELETE FROM turns WHERE session_id NOT IN (SELECT id FROM sessions)")
+            with self._stats_lock:
+                self._evictions["ttl"] += expired
+                self._evictions["capacity"] += surplus
+        finally:
+            self._sweep_lock.release()
+
+
+def make_session_store(backend="memory", **options):
+    """Builds a session store by name: 'memory' (default) or 'sqlite'."""
+    if backend == "memory":
+        options.pop("path", None)
+        return MemorySessionStore(**options)
+    if backend == "sqlite":
+        path = options.get("path") or "sessions.db"
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        options["path"] = path
+        return SQLiteSessionStore(**options)
+    raise ValueError(f"Unknown session store backend: {backend}")
+
+
+def _sizeof_turn(turn):
+    return sum(sys.getsizeof(part) for part in turn) + sys.getsizeof(turn)
+
+
+def _sizeof_user_data(user_data):
+    # Approximation: the size of the profile serialized compactly.
+    return len(json.dumps(user_data, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
@@ -0,0 +1,146 @@
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import speech_recognition as sr
+
+from utils.audio_ingest import STT_SAMPLE_RATE, STT_SAMPLE_WIDTH
+
+
+class GoogleRecognizerBackend:
+    """Recognizes audio with Google's free web speech API through SpeechRecognition."""
+
+    def __init__(self, recognizer=None):
+        self.recognizer = recognizer or sr.Recognizer()
+
+    def recognize(self, audio_data, language):
+        return self.recognizer.recognize_google(audio_data, language=language)
+
+
+class StubRecognizerBackend:
+    """Local stand-in for tests and benchmarks: sleeps like a remote service and returns a fixed text.
+
+    Latency is ``base_latency + seconds_per_audio_second * duration``, which
+    mimics how upload and recognition time grow with the audio length.
+    """
+
+    def __init__(self, text="lorem ipsum", base_latency=0.0, seconds_per_audio_second=0.0):
+        self.text = text
+        self.base_latency = base_latency
+        self.seconds_per_audio_second = seconds_per_audio_second
+
+    def recognize(self, audio_data, language):
+        duration = len(audio_data.frame_data) / (audio_data.sample_rate * audio_data.sample_width)
+        time.sleep(self.base_latency + self.seconds_per_audio_second * duration)
+        return self.text
+
+
+def find_speech(pcm, frame_ms=30, margin_db=10.0, floor_db=-60.0, min_silence_ms=300, min_speech_ms=100, pad_ms=150):
+    """Energy-based voice activity detection on 16 kHz mono 16-bit PCM.
+
+    A frame counts as speech when it is ``margin_db`` louder than the noise
+    floor (10th percentile of frame energies, never below ``floor_db`` dBFS),
+    capped at ``margin_db`` below the loudest frame.
+    Returns ``(start, end)`` byte offsets of speech regions; pauses shorter
+    than ``min_silence_ms`` are bridged and every region is padded by ``pad_ms``.
+    """
+    samples = np.frombuffer(pcm, dtype=np.int16)
+    frame_len = STT_SAMPLE_RATE * frame_ms // 1000
+    n_frames = len(samples) // frame_len
+    if n_frames == 0:
+        return [(0, len(pcm))] if len(pcm) else []
+
+    frames = samples[:n_frames * frame_len].astype(np.float32).reshape(n_frames, frame_len)
+    rms = np.sqrt(np.mean(frames * frames, axis=1)) / 32768.0
+    db = 20 * np.log10(np.maximum(rms, 1e-10))
+    if db.max() < floor_db + margin_db:
+        return []  # nothing rises above the floor: all silence
+    # Never put the threshold above the loudest frames, or audio with no pauses would be dropped entirely.
+    threshold = min(max(np.percentile(db, 10), floor_db) + margin_db, db.max() - margin_db)
+    voiced = db > threshold
+
+    # Collect runs of voiced frames as [start_frame, end_frame)
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], voiced.astype(np.int8), [0]))))
+    regions = list(zip(edges[::2], edges[1::2]))
+
+    min_gap = max(1, min_silence_ms // frame_ms)
+    merged = []
+    for start, end in regions:
+        if merged and start - merged[-1][1] < min_gap:
+            merged[-1][1] = end
+        else:
+            merged.append([start, end])
+
+    min_frames = max(1, min_speech_ms // frame_ms)
+    pad = pad_ms // frame_ms
+    bytes_per_frame = frame_len * STT_SAMPLE_WIDTH
+    return [
+        (max(0, start - pad) * bytes_per_frame, min(len(pcm), (end + pad) * bytes_per_frame))
+        for start, end in merged if end - start >= min_frames
+    ]
+
+
+def split_on_pauses(pcm, max_chunk_seconds=15.0, **vad_options):
+    """Trims silence and groups speech regions into chunks of at most ``max_chunk_seconds``.
+
+    Chunks are cut at pauses; a single region longer than the limit is split
+    at fixed length. Returns a list of PCM byte strings in playback order.
+    """
+    max_bytes = int(max_chunk_seconds * STT_SAMPLE_RATE) * STT_SAMPLE_WIDTH
+    chunks = []
+    current = []
+    current_len = 0
+    for start, end in find_speech(pcm, **vad_options):
+        while end - start > max_bytes:  # one long stretch of speech with no usable pause
+            if current:
+                chunks.append(b"".join(current))
+                current, current_len = [], 0
+            chunks.append(pcm[start:start + max_bytes])
+            start += max_bytes
+        if current and current_len + (end - start) > max_bytes:
+            chunks.append(b"".join(current))
+            current, current_len = [], 0
+        current.append(pcm[start:end])
+        current_len += end - start
+    if current:
+        chunks.append(b"".join(current))
+    return chunks
+
+
+class SpeechTranscriber:
+    """Transcribes long PCM audio by trimming silence and recognizing pause-delimited chunks in parallel.
+
+    The backend is pluggable (anything with ``recognize(audio_data, language)``)
+    and chunks run on a shared, bounded thread pool; results are stitched back in order.
+    """
+
+    def __init__(self, backend, max_workers=4, max_chunk_seconds=15.0, **vad_options):
+        self.backend = backend
+        self.max_chunk_seconds = max_chunk_seconds
+        self.vad_options = vad_options
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="stt-chunk")
+
+    def transcribe(self, pcm, language):
+        """Returns the recognized text; raises sr.UnknownValueError / sr.RequestError like recognize_google."""
+        chunks = split_on_pauses(pcm, self.max_chunk_seconds, **self.vad_options)
+        if not chunks:
+            raise sr.UnknownValueError()
+        kept = sum(len(c) for c in chunks)
+        logging.info(f"STT | {len(chunks)} chunk(s), kept {kept / max(len(pcm), 1):.0%} of audio after silence trimming")
+
+        futures = [self._executor.submit(self._recognize_chunk, chunk, language) for chunk in chunks]
+        texts = [future.result() for future in futures]
+        text = " ".join(t for t in texts if t)
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+    def _recognize_chunk(self, chunk, language):
+        try:
+            return self.backend.recognize(sr.AudioData(chunk, STT_SAMPLE_RATE, STT_SAMPLE_WIDTH), language)
+        except sr.UnknownValueError:
+            return ""  # a chunk with no intelligible speech shouldn't sink the whole message
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
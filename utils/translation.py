@@ -0,0 +1,117 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.ttl_cache import TTLCache
+from utils.governor import slot, Overloaded
+
+
+class TranslationService:
+    """Translates text with reused translator instances and a bounded translation cache.
+
+    deep_translator translators keep per-call state on the instance, so a call
+    checks an idle instance for its (source, target) pair out of a shared pool
+    and returns it afterwards; the pool only grows to the pair's peak
+    concurrency, however many request threads come and go. Translations are cached by
+    (source, target, text); concurrent misses for the same text share one call.
+    Only cache misses take a slot from ``limiter`` (a ``utils.governor.Limiter``).
+    """
+
+    def __init__(self, cache_size=20000, cache_ttl=24 * 3600, max_workers=8, translator_factory=None, limiter=None):
+        self._translator_factory = translator_factory
+        self.limiter = limiter
+        self._translators = {}  # (source, target) -> idle instances
+        self._translators_lock = threading.Lock()
+        self._cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="translate")
+        self.max_workers = max_workers
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._batch_texts = 0
+        self._batch_seconds = 0.0
+        self._batch_max_seconds = 0.0
+
+    def translate(self, text, target, source=None):
+        """Returns ``(translated_text, cached)``."""
+        source = source or "auto"
+        text = text.strip()  # the same string is the cache key and what gets translated
+        return self._cache.get_or_compute(
+            (source, target, text),
+            lambda: self._call_upstream(text, target, source),
+            cache_if=lambda result: result is not None,
+        )
+
+    def translate_batch(self, texts, target, source=None):
+        """Translates a list of texts concurrently (bounded by ``max_workers``).
+
+        Returns ``(results, elapsed_seconds)``, where ``results`` has one dict per
+        input, in order: ``{"text", "translated_text", "cached"}``, or
+        ``{"text", "error"}`` if that text failed. If any text was shed by the
+        limiter, ``Overloaded`` is raised once the others finish (their
+        translations stay cached, so a retry is cheap).
+        """
+        start = time.perf_counter()
+        unique = list(dict.fromkeys(texts))  # translate repeated texts once
+        futures = {text: self._pool.submit(self.translate, text, target, source) for text in unique}
+        outcomes = {}
+        overloaded = None
+        for text, future in futures.items():
+            try:
+                translated, cached = future.result()
+                outcomes[text] = {"text": text, "translated_text": translated, "cached": cached}
+            except Overloaded as e:
+                overloaded = e
+            except Exception as e:
+                outcomes[text] = {"text": text, "error": str(e)}
+        elapsed = time.perf_counter() - start
+
+        with self._stats_lock:
+            self._batches += 1
+            self._batch_texts += len(texts)
+            self._batch_seconds += elapsed
+            self._batch_max_seconds = max(self._batch_max_seconds, elapsed)
+        if overloaded is not None:
+            raise overloaded
+        return [outcomes[text] for text in texts], elapsed
+
+    def stats(self):
+        with self._stats_lock:
+            batches = {
+                "count": self._batches,
+                "texts": self._batch_texts,
+                "avg_ms": round(self._batch_seconds / self._batches * 1000, 1) if self._batches else 0.0,
+                "max_ms": round(self._batch_max_seconds * 1000, 1),
+            }
+        return {"cache": self._cache.stats(), "batches": batches, "max_workers": self.max_workers}
+
+    def warm_up(self):
+        """Imports the translator package now rather than on the first cache miss."""
+        self._factory()
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
+
+    def _call_upstream(self, text, target, source):
+        with slot(self.limiter):
+            translator = self._checkout(source, target)
+            try:
+                return translator.translate(text)
+            finally:
+                self._checkin(source, target, translator)
+
+    def _factory(self):
+        if self._translator_factory is None:
+            from deep_translator import GoogleTranslator  # imported on the first cache miss
+            self._translator_factory = GoogleTranslator
+        return self._translator_factory
+
+    def _checkout(self, source, target):
+        with self._translators_lock:
+            idle = self._translators.get((source, target))
+            if idle:
+                return idle.pop()
+        return self._factory()(source=source, target=target)
+
+    def _checkin(self, source, target, translator):
+        with self._translators_lock:
+            self._translators.setdefault((source, target), []).append(translator)
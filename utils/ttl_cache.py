@@ -0,0 +1,153 @@
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class TTLCache:
+    """Thread-safe bounded cache with LRU eviction, per-entry TTL and single-flight loading.
+
+    ``get_or_compute`` coalesces concurrent misses for the same key: the first
+    caller computes the value, everyone else waits for that result instead of
+    making their own upstream call.
+    """
+
+    def __init__(self, maxsize=10000, ttl=3600.0, clock=time.monotonic):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._data = OrderedDict()  # key -> (expires_at, value), oldest first
+        self._inflight = {}  # key -> Future
+        self._tasks = set()  # running aget_or_compute computations
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._coalesced = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            found, value = self._lookup_locked(key)
+            if found:
+                self._hits += 1
+                return value
+            self._misses += 1
+            return default
+
+    def set(self, key, value):
+        with self._lock:
+            self._store_locked(key, value)
+
+    def get_or_compute(self, key, compute, cache_if=None):
+        """Returns ``(value, hit)``, calling ``compute()`` at most once per key across threads.
+
+        ``cache_if(value)`` can veto caching of a result (e.g. a degraded fallback).
+        Exceptions from ``compute`` propagate to every waiting caller and are not cached.
+        """
+        hit, value, future, leader = self._claim(key)
+        if hit:
+            return value, True
+        if not leader:
+            return future.result(), False
+
+        try:
+            value = compute()
+        except BaseException as e:
+            self._fail(key, future, e)
+            raise
+        self._settle(key, future, value, cache_if)
+        return value, False
+
+    async def aget_or_compute(self, key, compute, cache_if=None):
+        """``get_or_compute`` for a coroutine function ``compute``; waiters await instead of blocking a thread.
+
+        A caller that is cancelled stops waiting, but the computation finishes for the others.
+        """
+        hit, value, future, leader = self._claim(key)
+        if hit:
+            return value, True
+        if leader:
+            # The computation runs in a task of its own, so cancelling the caller
+            # that started it neither cancels it nor fails the callers waiting on it.
+            task = asyncio.ensure_future(self._acompute(key, future, compute, cache_if))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return await asyncio.shield(asyncio.wrap_future(future)), False
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "coalesced": self._coalesced,
+                "inflight": len(self._inflight),
+            }
+
+    def _claim(self, key):
+        """Returns ``(hit, value, future, leader)``; the leader must settle or fail ``future``."""
+        with self._lock:
+            found, value = self._lookup_locked(key)
+            if found:
+                self._hits += 1
+                return True, value, None, False
+            future = self._inflight.get(key)
+            if future is not None:
+                self._coalesced += 1
+                return False, None, future, False
+            self._misses += 1
+            future = self._inflight[key] = Future()
+            return False, None, future, True
+
+    async def _acompute(self, key, future, compute, cache_if):
+        try:
+            value = await compute()
+        except BaseException as e:
+            self._fail(key, future, e)
+            return
+        self._settle(key, future, value, cache_if)
+
+    def _settle(self, key, future, value, cache_if):
+        with self._lock:
+            if cache_if is None or cache_if(value):
+                self._store_locked(key, value)
+            del self._inflight[key]
+        future.set_result(value)
+
+    def _fail(self, key, future, error):
+        with self._lock:
+            del self._inflight[key]
+        future.set_exception(error)
+
+    def _lookup_locked(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._data[key]
+            self._expirations += 1
+            return False, None
+        self._data.move_to_end(key)
+        return True, value
+
+    def _store_locked(self, key, value):
+        self._data[key] = (self._clock() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self._evictions += 1
@@ -0,0 +1,138 @@
+import re
+import queue
+import asyncio
+import threading
+
+
+# A sentence ends at . ! ? … or the Arabic question mark, followed by whitespace, or at a newline.
+SENTENCE_END = re.compile(r'(?<=[.!?…؟])\s+|\n+')
+
+_DONE = object()
+
+
+def iter_sentences(text_chunks, min_chars=40):
+    """Regroups a stream of text chunks (e.g. LLM tokens) into whole sentences.
+
+    Sentences shorter than ``min_chars`` are merged with the next one so TTS is
+    not called for every "Hi!". Whatever is left when the stream ends is
+    yielded as the last sentence.
+    """
+    buffer = ""
+    for chunk in text_chunks:
+        sentences, buffer = _split_sentences(buffer + chunk, min_chars)
+        yield from sentences
+    if buffer.strip():
+        yield buffer.strip()
+
+
+async def aiter_sentences(text_chunks, min_chars=40):
+    """``iter_sentences`` for an async iterable of text chunks."""
+    buffer = ""
+    async for chunk in text_chunks:
+        sentences, buffer = _split_sentences(buffer + chunk, min_chars)
+        for sentence in sentences:
+            yield sentence
+    if buffer.strip():
+        yield buffer.strip()
+
+
+def _split_sentences(buffer, min_chars):
+    """Returns the complete sentences in ``buffer`` and the unfinished remainder."""
+    sentences = []
+    start = 0
+    for match in SENTENCE_END.finditer(buffer):
+        if match.end() - start >= min_chars:
+            sentence = buffer[start:match.start()].strip()
+            if sentence:
+                sentences.append(sentence)
+            start = match.end()
+    return sentences, buffer[start:]
+
+
+def run_ahead(iterable, max_buffered=8):
+    """Consumes ``iterable`` in a background thread so it keeps producing while the caller works.
+
+    Used to let the LLM keep generating the next sentences while the current
+    one is being synthesized. Exceptions from the producer are re-raised in the
+    consumer; closing the generator early stops the producer.
+    """
+    items = queue.Queue(maxsize=max_buffered)
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for item in iterable:
+                if not _put(items, (item, None), stop):
+                    return
+            _put(items, (_DONE, None), stop)
+        except BaseException as e:
+            _put(items, (_DONE, e), stop)
+
+    threading.Thread(target=produce, name="tts-run-ahead", daemon=True).start()
+    try:
+        while True:
+            item, error = items.get()
+            if item is _DONE:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
+
+
+def pipelined_tts(sentences, synthesize):
+    """Yields audio chunks for each sentence in order as soon as they are synthesized.
+
+    ``synthesize(text, previous_text)`` must return an iterator of audio bytes;
+    the previous sentence is passed along so the TTS service can keep prosody
+    continuous across calls.
+    """
+    previous = None
+    for sentence in sentences:
+        yield from synthesize(sentence, previous)
+        previous = sentence
+
+
+async def arun_ahead(aiterable, max_buffered=8):
+    """``run_ahead`` for async iterables: a task keeps consuming while the caller awaits other work."""
+    items = asyncio.Queue(maxsize=max_buffered)
+
+    async def produce():
+        try:
+            async for item in aiterable:
+                await items.put((item, None))
+            await items.put((_DONE, None))
+        except Exception as e:
+            await items.put((_DONE, e))
+
+    task = asyncio.create_task(produce())
+    try:
+        while True:
+            item, error = await items.get()
+            if item is _DONE:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        task.cancel()
+
+
+async def apipelined_tts(sentences, synthesize):
+    """``pipelined_tts`` for an async iterable of sentences; ``synthesize`` returns an async iterator of audio bytes."""
+    previous = None
+    async for sentence in sentences:
+        async for chunk in synthesize(sentence, previous):
+            yield chunk
+        previous = sentence
+
+
+def _put(items, entry, stop):
+    while not stop.is_set():
+        try:
+            items.put(entry, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False